@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+LeuitLog ingest benchmark.
+
+Starts a SyslogListener (UDP) or TcpSyslogListener (TCP) in process,
+writing through the daemon's normal logging pipeline into a temporary
+directory, and drives it from a child process at a fixed rate.
+
+Each message carries its send time, so the time until the record is
+handed to the log file handler gives the end-to-end latency; buffered
+records reach the file at most flush_interval_ms later. Reports
+throughput, loss and latency percentiles as JSON.
+
+Usage:
+    python3 bench/bench_ingest.py --transport udp --rate 20000 --duration 5
+    python3 bench/bench_ingest.py --transport tcp --rate 0 --size 1024 --output tcp.json
+"""
+
+import sys
+import json
+import time
+import socket
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import configparser
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import leuitlog_core as core
+
+
+# Sender pacing: messages are sent in bursts this many seconds apart
+SEND_TICK = 0.001
+
+# UDP source sockets the sender spreads messages over
+UDP_SOURCE_PORTS = 16
+
+
+def build_message(sequence: int, size: int) -> bytes:
+    """Build an RFC 5424 message carrying its sequence number and send time."""
+    message = f'<134>1 - bench app - - - {sequence} {time.time():.6f} '.encode()
+    return message + b'x' * max(0, size - len(message))
+
+
+def run_sender(args: argparse.Namespace) -> int:
+    """Send messages at the requested rate and print the count as JSON."""
+    host, port = args.target.rsplit(':', 1)
+    address = (host, int(port))
+
+    if args.transport == 'udp':
+        # Several source ports, so SO_REUSEPORT spreads the flows
+        sockets = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(UDP_SOURCE_PORTS)]
+        sock = sockets[0]
+        send = lambda data: sockets[hash(data) % UDP_SOURCE_PORTS].sendto(data, address)
+    else:
+        sock = socket.create_connection(address)
+        send = lambda data: sock.sendall(str(len(data)).encode() + b' ' + data)
+
+    sent = 0
+    started = time.perf_counter()
+    deadline = started + args.duration
+
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        # Catch up to the schedule, or send one burst when unthrottled
+        due = int((now - started) * args.rate) if args.rate else sent + 64
+        while sent < due:
+            send(build_message(sent, args.size))
+            sent += 1
+        if args.rate:
+            time.sleep(SEND_TICK)
+
+    for sock in (sockets if args.transport == 'udp' else [sock]):
+        sock.close()
+    print(json.dumps({'sent': sent, 'elapsed': time.perf_counter() - started}))
+    return 0
+
+
+class LatencyHandler(logging.Handler):
+    """Record send-to-write latency of benchmark messages."""
+
+    def __init__(self):
+        super().__init__()
+        self.latencies = []
+        self.first = None
+        self.last = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        now = time.time()
+        parts = record.getMessage().split(' ', 3)
+        if len(parts) < 3 or parts[0] != 'app:':
+            return
+        try:
+            self.latencies.append(now - float(parts[2]))
+        except ValueError:
+            return
+        if self.first is None:
+            self.first = now
+        self.last = now
+
+
+def free_port(kind: int) -> int:
+    """Pick a free local port for a socket type."""
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_benchmark(args: argparse.Namespace) -> dict:
+    """Run one ingest measurement and return its results."""
+    kind = socket.SOCK_DGRAM if args.transport == 'udp' else socket.SOCK_STREAM
+    port = free_port(kind)
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        config = configparser.ConfigParser()
+        config.read_dict({
+            'logging': {
+                'log_dir': log_dir,
+                'log_file': 'bench.log',
+                'max_size_mb': '64',
+                'backup_count': '2',
+                'write_buffer_kb': str(args.write_buffer_kb),
+                'fsync': args.fsync,
+            },
+            'service': {'pid_file': '', 'listen_port': str(port)},
+        })
+        logger = core.setup_logging(config)
+        logger.propagate = False
+
+        # Observe records right after the file handler has written them
+        latency = LatencyHandler()
+        for handler in logger.handlers:
+            if isinstance(handler, core.AsyncLogHandler):
+                handler.target = core.TeeHandler([handler.target, latency])
+
+        if args.transport == 'udp':
+            if args.ingest_processes:
+                listener = core.IngestWorkers(
+                    args.ingest_processes, port, logger,
+                    receive_buffer=args.receive_buffer_kb * 1024
+                )
+            else:
+                listener = core.SyslogListener(
+                    port, logger,
+                    receive_buffer=args.receive_buffer_kb * 1024,
+                    num_sockets=args.listen_sockets
+                )
+            listener.start()
+            stop = threading.Event()
+
+            def serve() -> None:
+                while not stop.is_set():
+                    listener.process_messages(timeout=0.1)
+
+            server = threading.Thread(target=serve, daemon=True)
+            if not getattr(listener, 'threaded', False):
+                server.start()
+        else:
+            listener = core.TcpSyslogListener(port, logger)
+            listener.start()
+
+        sender = subprocess.run([
+            sys.executable, __file__,
+            '--target', f'127.0.0.1:{port}',
+            '--transport', args.transport,
+            '--rate', str(args.rate),
+            '--duration', str(args.duration),
+            '--size', str(args.size),
+        ], capture_output=True, text=True, check=True)
+        sent = json.loads(sender.stdout)
+
+        # Wait for queued records to reach the file, until all arrived
+        # or nothing more arrives for a second
+        deadline = time.monotonic() + args.settle
+        previous, idle_since = -1, time.monotonic()
+        while len(latency.latencies) < sent['sent'] and time.monotonic() < deadline:
+            if len(latency.latencies) != previous:
+                previous, idle_since = len(latency.latencies), time.monotonic()
+            elif time.monotonic() - idle_since > 1.0:
+                break
+            time.sleep(0.05)
+        if args.transport == 'udp':
+            stop.set()
+            if server.is_alive():
+                server.join()
+        listener.stop()
+        core.close_logging(logger)
+
+    received = len(latency.latencies)
+    latencies = sorted(latency.latencies)
+    span = (latency.last - latency.first) if received > 1 else 0.0
+
+    return {
+        'benchmark': 'ingest',
+        'transport': args.transport,
+        'target_rate': args.rate,
+        'size': args.size,
+        'duration': args.duration,
+        'ingest_processes': args.ingest_processes,
+        'write_buffer_kb': args.write_buffer_kb,
+        'fsync': args.fsync,
+        'sent': sent['sent'],
+        'send_rate': sent['sent'] / sent['elapsed'] if sent['elapsed'] else 0.0,
+        'received': received,
+        'loss': sent['sent'] - received,
+        'loss_ratio': (sent['sent'] - received) / sent['sent'] if sent['sent'] else 0.0,
+        'throughput': received / span if span else 0.0,
+        'latency_ms': {
+            'p50': percentile(latencies, 0.50) * 1000,
+            'p90': percentile(latencies, 0.90) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+            'max': (latencies[-1] * 1000) if latencies else 0.0,
+        },
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'time': time.time(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--transport', choices=('udp', 'tcp'), default='udp')
+    parser.add_argument('--rate', type=int, default=10000, help='Messages per second (0 = unthrottled)')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds to send for')
+    parser.add_argument('--size', type=int, default=200, help='Message size in bytes')
+    parser.add_argument('--listen-sockets', type=int, default=1, help='UDP SO_REUSEPORT sockets')
+    parser.add_argument('--ingest-processes', type=int, default=0, help='UDP ingest worker processes (0 = in process)')
+    parser.add_argument('--receive-buffer-kb', type=int, default=0, help='UDP SO_RCVBUF (0 = default)')
+    parser.add_argument('--write-buffer-kb', type=int, default=256, help='Log write buffer (0 = write each record)')
+    parser.add_argument('--fsync', choices=core.LeuitFileHandler.FSYNC_POLICIES, default='never')
+    parser.add_argument('--settle', type=float, default=30.0, help='Longest wait for the writer after sending')
+    parser.add_argument('--output', help='Write JSON results to this file instead of stdout')
+    parser.add_argument('--target', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.target:
+        return run_sender(args)
+
+    result = json.dumps(run_benchmark(args), indent=2)
+    if args.output:
+        Path(args.output).write_text(result + '\n')
+    else:
+        print(result)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
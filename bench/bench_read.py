@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+LeuitLog Web UI read path benchmark.
+
+Generates synthetic log files in the daemon's text format and measures
+read_log_tail() and the /api/logs endpoint on them: latency of the
+first (cold) request, median of warm requests for the newest, middle
+and oldest pages, and peak Python memory per request, with and without
+the daemon's line index. Needs Flask, like the Web UI itself.
+
+Generated files are kept in --work-dir and reused by later runs.
+
+Usage:
+    python3 bench/bench_read.py --sizes 1,10,100
+    python3 bench/bench_read.py --sizes 1,10,100,500 --work-dir /var/tmp/leuitlog-bench --output read.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+import tracemalloc
+import configparser
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import leuitlog_core as core
+import leuitlog_webui as webui
+
+
+# Synthetic lines written per second of log time
+LINES_PER_SECOND = 50
+
+LEVELS = ('INFO', 'INFO', 'INFO', 'WARNING', 'ERROR', 'DEBUG')
+SOURCES = ('router1', 'switch-core', 'fw01', 'web01', '10.0.0.17', 'leuitlog')
+
+
+def generate_log(path: Path, size_mb: int) -> None:
+    """
+    Write a synthetic log file of about `size_mb` megabytes.
+
+    Args:
+        path: File to create
+        size_mb: Target size in megabytes
+    """
+    rng = random.Random(size_mb)
+    target = size_mb * 1024 * 1024
+    start = time.time() - target // 120 // LINES_PER_SECOND
+    written = 0
+    line_number = 0
+
+    with open(path, 'w', encoding='utf-8') as f:
+        while written < target:
+            chunk = []
+            second = datetime.fromtimestamp(start + line_number // LINES_PER_SECOND).astimezone()
+            stamp = second.strftime(core.LOG_DATE_FORMAT)
+            for _ in range(LINES_PER_SECOND):
+                chunk.append(
+                    f"{stamp} | {rng.choice(LEVELS):<8} | {rng.choice(SOURCES):<15} | "
+                    f"app[{rng.randint(100, 9999)}]: event {line_number} "
+                    f"{'x' * rng.randint(10, 120)}\n"
+                )
+                line_number += 1
+            data = ''.join(chunk)
+            f.write(data)
+            written += len(data)
+
+
+def time_call(func, repeat: int) -> dict:
+    """
+    Measure a call: cold latency, warm median and peak memory.
+
+    Args:
+        func: Callable without arguments
+        repeat: Number of warm calls
+
+    Returns:
+        Dictionary of measurements in milliseconds and bytes
+    """
+    started = time.perf_counter()
+    func()
+    cold = time.perf_counter() - started
+
+    warm = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        warm.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'cold_ms': cold * 1000,
+        'warm_median_ms': statistics.median(warm) * 1000,
+        'warm_max_ms': max(warm) * 1000,
+        'peak_memory_bytes': peak,
+    }
+
+
+def forget_counts() -> None:
+    """Drop the Web UI's cached line counts and maps so the next call is cold."""
+    webui._line_count_cache.clear()
+    webui._segment_count_cache.clear()
+    webui._segment_maps.clear()
+
+
+def bench_file(path: Path, args: argparse.Namespace, indexed: bool) -> list:
+    """Measure every request kind on one file."""
+    config = configparser.ConfigParser()
+    config.read_dict({
+        'logging': {
+            'log_dir': str(path.parent),
+            'log_file': path.name,
+            'max_size_mb': '1024',
+            'backup_count': '0',
+        },
+        'service': {'pid_file': str(path.parent / 'bench.pid'), 'listen_port': '0'},
+    })
+    webui.config = config
+
+    index_path = Path(str(path) + core.LINE_INDEX_SUFFIX)
+    if index_path.exists():
+        index_path.unlink()
+    if indexed:
+        core.LineIndex(path).update()
+
+    forget_counts()
+    _, total_lines, total_pages = webui.read_log_tail(args.limit, 1)
+    client = webui.app.test_client()
+
+    requests = {
+        'read_log_tail newest': lambda: webui.read_log_tail(args.limit, 1),
+        'read_log_tail middle': lambda: webui.read_log_tail(args.limit, total_pages // 2),
+        'read_log_tail oldest': lambda: webui.read_log_tail(args.limit, total_pages),
+        '/api/logs newest': lambda: client.get(f'/api/logs/1?limit={args.limit}'),
+        '/api/logs middle': lambda: client.get(f'/api/logs/{total_pages // 2}?limit={args.limit}'),
+        '/api/logs level filter': lambda: client.get(f'/api/logs/1?limit={args.limit}&level=error'),
+    }
+
+    results = []
+    for name, func in requests.items():
+        forget_counts()
+        result = {
+            'benchmark': 'read',
+            'request': name,
+            'file_mb': path.stat().st_size / (1024 * 1024),
+            'lines': total_lines,
+            'limit': args.limit,
+            'line_index': indexed,
+        }
+        result.update(time_call(func, args.repeat))
+        results.append(result)
+        print(
+            f"{result['file_mb']:8.1f} MB  index={'yes' if indexed else 'no ':<3}  {name:<24} "
+            f"cold {result['cold_ms']:9.2f} ms  warm {result['warm_median_ms']:9.2f} ms  "
+            f"peak {result['peak_memory_bytes'] / 1024:9.1f} KB",
+            file=sys.stderr
+        )
+
+    if index_path.exists():
+        index_path.unlink()
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='1,10,100', help='Comma-separated file sizes in MB')
+    parser.add_argument('--limit', type=int, default=100, help='Lines per page')
+    parser.add_argument('--repeat', type=int, default=5, help='Warm calls per request')
+    parser.add_argument('--work-dir', help='Directory for generated files (default: temporary)')
+    parser.add_argument('--output', help='Write JSON results to this file instead of stdout')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = Path(args.work_dir or tmp_dir)
+        work_dir.mkdir(parents=True, exist_ok=True)
+
+        results = []
+        for size_mb in sizes:
+            path = work_dir / f'bench-{size_mb}mb.log'
+            if not path.exists():
+                print(f"Generating {path} ...", file=sys.stderr)
+                generate_log(path, size_mb)
+            for indexed in (False, True):
+                results.extend(bench_file(path, args, indexed))
+
+    report = json.dumps({
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'time': time.time(),
+        'results': results,
+    }, indent=2)
+
+    if args.output:
+        Path(args.output).write_text(report + '\n')
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
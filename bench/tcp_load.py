@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+LeuitLog TCP syslog load generator.
+
+Opens many concurrent connections and sends syslog messages with RFC 6587
+framing as fast as the receiver accepts them.
+
+By default an in-process TcpSyslogListener is started on a free local
+port, writing through the daemon's normal logging pipeline into a
+temporary directory, and the senders run in a child process. The
+sustained rate is measured from the first to the last logged message.
+
+Usage:
+    python3 bench/tcp_load.py --clients 200 --messages 2000
+    python3 bench/tcp_load.py --target 127.0.0.1:5514 --framing lf
+"""
+
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import configparser
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import leuitlog_core as core
+
+
+def build_frame(index: int, size: int, framing: str) -> bytes:
+    """
+    Build one framed syslog message.
+
+    Args:
+        index: Message number, embedded in the text
+        size: Approximate message size in bytes
+        framing: 'octet', 'lf' or 'mixed'
+
+    Returns:
+        Framed message
+    """
+    message = f'<134>Jan  1 00:00:00 bench app[1]: message {index} '.encode()
+    message += b'x' * max(0, size - len(message))
+
+    if framing == 'octet' or (framing == 'mixed' and index % 2):
+        return str(len(message)).encode() + b' ' + message
+    return message + b'\n'
+
+
+async def run_client(host: str, port: int, count: int, size: int,
+                     framing: str, batch: int) -> None:
+    """Send `count` messages over one connection."""
+    reader, writer = await asyncio.open_connection(host, port)
+
+    for first in range(0, count, batch):
+        writer.write(b''.join(
+            build_frame(index, size, framing)
+            for index in range(first, min(count, first + batch))
+        ))
+        # Honour the receiver's flow control
+        await writer.drain()
+
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run_clients(args: argparse.Namespace) -> None:
+    """Run all senders concurrently."""
+    host, port = args.target.rsplit(':', 1)
+    await asyncio.gather(*(
+        run_client(host, int(port), args.messages, args.size, args.framing, args.batch)
+        for _ in range(args.clients)
+    ))
+
+
+def free_port() -> int:
+    """Pick a free local TCP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_benchmark(args: argparse.Namespace) -> int:
+    """Measure an in-process listener against a child load generator."""
+    expected = args.clients * args.messages
+    port = free_port()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        config = configparser.ConfigParser()
+        config.read_dict({
+            'logging': {
+                'log_dir': log_dir,
+                'log_file': 'bench.log',
+                'max_size_mb': '64',
+                'backup_count': '2',
+            },
+            'service': {'pid_file': '', 'listen_port': '0'},
+        })
+        logger = core.setup_logging(config)
+        logger.propagate = False
+
+        listener = core.TcpSyslogListener(
+            port, logger, max_connections=args.clients + 16
+        )
+        listener.start()
+
+        sender = subprocess.Popen([
+            sys.executable, __file__,
+            '--target', f'127.0.0.1:{port}',
+            '--clients', str(args.clients),
+            '--messages', str(args.messages),
+            '--size', str(args.size),
+            '--framing', args.framing,
+            '--batch', str(args.batch),
+        ])
+
+        # Start the clock at the first message so process startup is excluded
+        while listener.received == 0 and sender.poll() is None:
+            time.sleep(0.001)
+        started = time.perf_counter()
+
+        deadline = time.monotonic() + args.timeout
+        while listener.received < expected and time.monotonic() < deadline:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - started
+
+        sender.wait()
+        received = listener.received
+        listener.stop()
+        stats = core.get_write_stats(logger)
+        core.close_logging(logger)
+
+    rate = received / elapsed if elapsed else 0.0
+    print(f"clients:   {args.clients}")
+    print(f"framing:   {args.framing}, {args.size} byte messages")
+    print(f"received:  {received}/{expected}")
+    print(f"elapsed:   {elapsed:.2f} s")
+    print(f"rate:      {rate:,.0f} msg/s ({rate * args.size / 1e6:.1f} MB/s)")
+    if stats:
+        print(f"dropped:   {stats['dropped']}, max queue depth {stats['queue_max_depth']}")
+
+    return 0 if received == expected else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--target', help='Send to HOST:PORT instead of an in-process listener')
+    parser.add_argument('--clients', type=int, default=200, help='Concurrent connections')
+    parser.add_argument('--messages', type=int, default=2000, help='Messages per connection')
+    parser.add_argument('--size', type=int, default=200, help='Message size in bytes')
+    parser.add_argument('--framing', choices=('octet', 'lf', 'mixed'), default='octet')
+    parser.add_argument('--batch', type=int, default=64, help='Messages per write')
+    parser.add_argument('--timeout', type=float, default=120.0, help='Seconds to wait for delivery')
+    args = parser.parse_args()
+
+    if args.target:
+        asyncio.run(run_clients(args))
+        return 0
+    return run_benchmark(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
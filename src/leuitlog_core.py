@@ -19,15 +19,45 @@ import fcntl
 from datetime import datetime
 from pathlib import Path
 from logging.handlers import RotatingFileHandler
-from typing import Optional
+from collections import OrderedDict, deque, namedtuple
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
 import configparser
 import socket
 import select
+import selectors
+import threading
+import struct
+import zlib
+import re
+import io
+import bisect
+import queue
+import asyncio
+import marshal
+import fnmatch
+import ipaddress
+import multiprocessing
+from multiprocessing import shared_memory
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 # Global flag for graceful shutdown
 shutdown_requested = False
+# Set by SIGHUP: re-read the configuration and reopen the log files
+reload_requested = False
 config = None
 
+# Seconds the main loop may sleep when no source is ready
+IDLE_WAKEUP_INTERVAL = 1.0
+
+# Text log line format; records are written in timestamp order
+LOG_FORMAT = '%(asctime)s | %(levelname)-8s | %(source)-15s | %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S %z'
+
 
 class ConfigError(Exception):
     """Raised when configuration is invalid."""
@@ -51,12 +81,24 @@ def load_config(config_path: str) -> configparser.ConfigParser:
         raise ConfigError(f"Configuration file not found: {config_path}")
     
     config = configparser.ConfigParser()
+    # Keys keep their case, since [routes] keys are stream file names
+    config.optionxform = str
     
     try:
         config.read(config_path)
     except configparser.Error as e:
         raise ConfigError(f"Failed to parse configuration file: {e}")
     
+    # Every other key is lowercase; reject the rest instead of ignoring them
+    for section in [config.default_section] + config.sections():
+        if section == 'routes':
+            continue
+        for key in config[section]:
+            if key != key.lower():
+                raise ConfigError(
+                    f"Invalid configuration key: {section}.{key} (keys are lowercase)"
+                )
+    
     # Validate required sections
     required_sections = ['logging', 'service']
     for section in required_sections:
@@ -79,274 +121,5200 @@ def load_config(config_path: str) -> configparser.ConfigParser:
         int(config['logging']['max_size_mb'])
         int(config['logging']['backup_count'])
         int(config['service']['listen_port'])
+        
+        # Optional tuning keys
+        config.getint('service', 'receive_buffer_kb', fallback=0)
+        config.getint('service', 'listen_sockets', fallback=1)
+        config.getint('service', 'receive_batch', fallback=64)
+        if config.getint('service', 'ingest_processes', fallback=0) < 0:
+            raise ValueError("ingest_processes must not be negative")
+        if config.getint('service', 'ingest_ring_kb', fallback=4096) < 64:
+            raise ValueError("ingest_ring_kb must be at least 64")
+        config.getint('service', 'tcp_port', fallback=0)
+        config.getint('service', 'tcp_max_connections', fallback=512)
+        config.getint('service', 'tcp_max_message_kb', fallback=64)
+        config.getfloat('service', 'metrics_interval', fallback=10)
+        config.getfloat('service', 'journal_cursor_interval', fallback=5)
+        config.getfloat('service', 'stats_interval', fallback=10)
+        if config.getfloat('service', 'stats_retention_hours', fallback=24) <= 0:
+            raise ValueError("stats_retention_hours must be positive")
+        config.getint('logging', 'queue_size', fallback=10000)
+        config.getboolean('logging', 'async_write', fallback=True)
+        config.getboolean('logging', 'line_index', fallback=True)
+        config.getboolean('logging', 'search_index', fallback=True)
+        config.getint('logging', 'compress_frame_kb', fallback=1024)
+        config.getint('logging', 'write_buffer_kb', fallback=256)
+        if config.getint('logging', 'flush_interval_ms', fallback=50) < 1:
+            raise ValueError("flush_interval_ms must be at least 1")
+        if config.getfloat('logging', 'fsync_interval', fallback=1.0) <= 0:
+            raise ValueError("fsync_interval must be positive")
+        if config.getfloat('logging', 'dedup_window', fallback=0) < 0:
+            raise ValueError("dedup_window must not be negative")
+        config.getint('logging', 'dedup_max_repeats', fallback=1000)
+        if config.getint('logging', 'index_interval', fallback=256) < 1:
+            raise ValueError("index_interval must be at least 1")
+        if config.getint('logging', 'retention_max_mb', fallback=0) < 0:
+            raise ValueError("retention_max_mb must not be negative")
+        if config.getfloat('logging', 'retention_max_days', fallback=0) < 0:
+            raise ValueError("retention_max_days must not be negative")
+        if config.getfloat('logging', 'retention_interval', fallback=60) <= 0:
+            raise ValueError("retention_interval must be positive")
+        if config.getint('routing', 'max_open_files', fallback=64) < 1:
+            raise ValueError("max_open_files must be at least 1")
+        config.getint('routing', 'stream_max_size_mb', fallback=10)
+        config.getint('routing', 'stream_backup_count', fallback=2)
+        config.getboolean('routing', 'keep_in_main_log', fallback=True)
     except ValueError as e:
         raise ConfigError(f"Invalid numeric value in configuration: {e}")
     
+    codec = config.get('logging', 'compress', fallback='none')
+    if codec not in ('none',) + COMPRESSION_CODECS:
+        raise ConfigError(
+            f"Invalid logging.compress: {codec} (expected none, gzip or zstd)"
+        )
+    if codec == 'zstd' and zstandard is None:
+        raise ConfigError(
+            "logging.compress = zstd requires the zstandard package"
+        )
+    
+    structured_log = config.get('logging', 'structured_log', fallback='none')
+    if structured_log not in ('none', 'jsonl'):
+        raise ConfigError(
+            f"Invalid logging.structured_log: {structured_log} (expected none or jsonl)"
+        )
+    
+    syslog_source = config.get('service', 'syslog_source', fallback='address')
+    if syslog_source not in ('address', 'hostname'):
+        raise ConfigError(
+            f"Invalid service.syslog_source: {syslog_source} (expected address or hostname)"
+        )
+    
+    parse_journal_match(config.get('service', 'journal_match', fallback=''))
+    parse_routes(config)
+    
+    fsync = config.get('logging', 'fsync', fallback='never')
+    if fsync not in LeuitFileHandler.FSYNC_POLICIES:
+        raise ConfigError(
+            f"Invalid logging.fsync: {fsync} "
+            f"(expected one of: {', '.join(LeuitFileHandler.FSYNC_POLICIES)})"
+        )
+    
+    overflow_policy = config.get('logging', 'overflow_policy', fallback='block')
+    if overflow_policy not in AsyncLogHandler.OVERFLOW_POLICIES:
+        raise ConfigError(
+            f"Invalid logging.overflow_policy: {overflow_policy} "
+            f"(expected one of: {', '.join(AsyncLogHandler.OVERFLOW_POLICIES)})"
+        )
+    
     return config
 
 
-def setup_logging(config: configparser.ConfigParser) -> logging.Logger:
+# Metric name -> (Prometheus type, help text). Names are exported with
+# a 'leuitlog_' prefix.
+METRIC_HELP = {
+    'messages_received_total': ('counter', 'Messages received, by transport'),
+    'bytes_received_total': ('counter', 'Message bytes received, by transport'),
+    'parse_errors_total': ('counter', 'Syslog messages without a valid PRI header, by transport'),
+    'kernel_drops_total': ('counter', 'Datagrams dropped by the kernel (SO_RXQ_OVFL), by transport'),
+    'tcp_connections': ('gauge', 'Open TCP syslog connections'),
+    'tcp_connections_refused_total': ('counter', 'TCP connections refused at the connection limit'),
+    'tcp_connections_paused': ('gauge', 'TCP connections not read until the write queue drains'),
+    'duplicates_suppressed_total': ('counter', 'Repeated messages folded by duplicate suppression'),
+    'write_queue_depth': ('gauge', 'Records waiting in the write queue'),
+    'write_queue_capacity': ('gauge', 'Maximum records in the write queue'),
+    'records_written_total': ('counter', 'Records written by the writer thread'),
+    'records_dropped_total': ('counter', 'Records dropped by the write queue overflow policy'),
+    'write_latency_seconds': ('histogram', 'Time from receiving a record to writing it'),
+    'rotation_seconds': ('histogram', 'Duration of log file rotations'),
+    'file_writes_total': ('counter', 'Buffered writes to the log files'),
+    'records_lost_total': ('counter', 'Buffered records discarded after failed writes to the log files'),
+    'fsync_seconds': ('histogram', 'Duration of log file fsyncs'),
+    'loop_iteration_seconds': ('histogram', 'Main loop work per wakeup, excluding the wait'),
+    'records_routed_total': ('counter', 'Records written to a routed stream'),
+    'route_streams_open': ('gauge', 'Routed stream files currently open'),
+    'route_streams_closed_total': ('counter', 'Routed stream files closed to stay within max_open_files'),
+    'log_files_bytes': ('gauge', 'Size of the log files under retention, including index sidecars'),
+    'retention_segments_removed_total': ('counter', 'Log segments removed by retention, by reason'),
+    'retention_bytes_removed_total': ('counter', 'Bytes of log segments removed by retention, by reason'),
+}
+
+# Histogram bucket upper bounds in seconds
+METRIC_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class Metrics:
     """
-    Set up the logging system with rotation.
+    Thread-safe counters, gauges and histograms for the daemon.
+    
+    Hot paths update metrics once per batch, not per message. The main
+    loop periodically writes a snapshot to the stats file, which the
+    Web UI serves in Prometheus text format.
+    """
+    
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        # (name, labels) -> value; labels is a tuple of (key, value) pairs
+        self._values = {}
+        # name -> [bucket counts..., +Inf count, sum]
+        self._histograms = {}
+    
+    def add(self, name: str, value: float = 1, **labels) -> None:
+        """Increase a counter."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+    
+    def set(self, name: str, value: float, **labels) -> None:
+        """Set a gauge, or a counter maintained elsewhere."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = value
+    
+    def observe(self, name: str, *values: float) -> None:
+        """Record one or more histogram observations."""
+        buckets = METRIC_BUCKETS
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = [0] * (len(buckets) + 1) + [0.0]
+            for value in values:
+                histogram[bisect.bisect_left(buckets, value)] += 1
+                histogram[-1] += value
+    
+    def reset(self) -> None:
+        """Forget all values."""
+        with self._lock:
+            self._values.clear()
+            self._histograms.clear()
+    
+    def snapshot(self) -> dict:
+        """
+        Get all metrics in a JSON-serializable form.
+        
+        Returns:
+            Dictionary with 'values' and 'histograms' lists
+        """
+        with self._lock:
+            values = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._values.items())
+            ]
+            histograms = [
+                {
+                    'name': name,
+                    'buckets': list(METRIC_BUCKETS),
+                    'counts': histogram[:-1],
+                    'sum': histogram[-1],
+                }
+                for name, histogram in sorted(self._histograms.items())
+            ]
+        return {'time': time.time(), 'values': values, 'histograms': histograms}
+    
+    def write(self, path: Path) -> None:
+        """
+        Atomically write a snapshot to a stats file.
+        
+        Args:
+            path: Stats file path
+        """
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+
+# Metrics of this process
+metrics = Metrics()
+
+
+def metrics_file_path(config: configparser.ConfigParser) -> Optional[Path]:
+    """
+    Get the path of the daemon's stats file.
     
     Args:
         config: Parsed configuration object
         
     Returns:
-        Configured logger instance
+        Configured path, a file next to the PID file by default, or
+        None if publishing is disabled
     """
-    log_dir = Path(config['logging']['log_dir']).expanduser()
-    log_file = config['logging']['log_file']
-    max_size_mb = int(config['logging']['max_size_mb'])
-    backup_count = int(config['logging']['backup_count'])
+    if config.getfloat('service', 'metrics_interval', fallback=10) <= 0:
+        return None
     
-    # Create log directory if it doesn't exist
-    log_dir.mkdir(parents=True, exist_ok=True)
+    metrics_file = config.get('service', 'metrics_file', fallback='')
+    if metrics_file:
+        return Path(metrics_file).expanduser()
+    return Path(config['service']['pid_file']).expanduser().parent / 'leuitlog.metrics.json'
+
+
+class AsyncLogHandler(logging.Handler):
+    """
+    Queue log records in memory and write them from a dedicated thread.
     
-    # Set secure permissions on log directory
-    os.chmod(log_dir, 0o750)
+    Ingest threads only append to a bounded queue; formatting and disk
+    writes (including rotation) happen in the writer thread, so a slow
+    disk never blocks the socket drain. When the queue is full the
+    overflow policy decides whether to block, drop the oldest queued
+    record or drop the incoming one.
+    """
     
-    log_path = log_dir / log_file
+    OVERFLOW_POLICIES = ('block', 'drop-oldest', 'drop-newest')
     
-    # Create logger
-    logger = logging.getLogger('leuitlog')
-    logger.setLevel(logging.INFO)
+    # Minimum seconds between two "messages dropped" reports
+    DROP_REPORT_INTERVAL = 10.0
     
-    # Remove any existing handlers
-    logger.handlers.clear()
+    def __init__(self, target: logging.Handler, max_queue: int = 10000,
+                 overflow_policy: str = 'block', batch_size: int = 256):
+        """
+        Initialize the handler and start the writer thread.
+        
+        Args:
+            target: Handler that formats and writes the records
+            max_queue: Maximum number of queued records
+            overflow_policy: One of OVERFLOW_POLICIES
+            batch_size: Maximum records written per writer wakeup
+        """
+        super().__init__()
+        
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ConfigError(f"Unknown overflow policy: {overflow_policy}")
+        
+        self.target = target
+        self.max_queue = max(1, max_queue)
+        self.overflow_policy = overflow_policy
+        self.batch_size = max(1, batch_size)
+        
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closing = False
+        # Held by the writer while it writes, so the target can be swapped
+        self._target_lock = threading.Lock()
+        # Threads whose records are queued beyond max_queue instead of
+        # waiting or being dropped (event loops that pace themselves)
+        self._overfill_threads = set()
+        
+        # Counters
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self._reported_drops = 0
+        self._last_drop_report = 0.0
+        
+        self._writer = threading.Thread(
+            target=self._writer_loop,
+            name='leuitlog-writer',
+            daemon=True
+        )
+        self._writer.start()
     
-    # Create rotating file handler
-    handler = RotatingFileHandler(
-        log_path,
-        maxBytes=max_size_mb * 1024 * 1024,
-        backupCount=backup_count,
-        encoding='utf-8'
-    )
+    def emit(self, record: logging.LogRecord) -> None:
+        """Queue a record according to the overflow policy."""
+        with self._cond:
+            if self._closing:
+                # Writer is gone, write synchronously
+                self.target.handle(record)
+                return
+            
+            if (len(self._queue) >= self.max_queue
+                    and threading.get_ident() not in self._overfill_threads):
+                if self.overflow_policy == 'drop-newest':
+                    self.dropped += 1
+                    return
+                if self.overflow_policy == 'drop-oldest':
+                    dropped = self._queue.popleft()
+                    self.dropped += 1
+                    seq = getattr(dropped, 'write_seq', None)
+                    if seq is not None:
+                        write_progress.release(seq)
+                else:
+                    while len(self._queue) >= self.max_queue and not self._closing:
+                        self._cond.wait()
+            
+            # Queued records stay referenced until the target has them
+            seq = getattr(record, 'write_seq', None)
+            if seq is not None:
+                write_progress.hold(seq)
+            self._queue.append(record)
+            self.enqueued += 1
+            depth = len(self._queue)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            self._cond.notify_all()
     
-    # Set log format with consistent timestamp
-    formatter = logging.Formatter(
-        '%(asctime)s | %(levelname)-8s | %(source)-15s | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S %z'
-    )
-    handler.setFormatter(formatter)
+    def _writer_loop(self) -> None:
+        """Write queued records in batches until closed and drained."""
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing:
+                    self._cond.wait()
+                
+                if not self._queue and self._closing:
+                    break
+                
+                count = min(len(self._queue), self.batch_size)
+                batch = [self._queue.popleft() for _ in range(count)]
+                # Wake producers blocked on a full queue
+                self._cond.notify_all()
+            
+            with self._target_lock:
+                for record in batch:
+                    self.target.handle(record)
+                    seq = getattr(record, 'write_seq', None)
+                    if seq is not None:
+                        write_progress.release(seq)
+                self._report_drops()
+            self.written += len(batch)
+            
+            now = time.time()
+            metrics.observe('write_latency_seconds', *[now - record.created for record in batch])
     
-    logger.addHandler(handler)
+    def _report_drops(self, force: bool = False) -> None:
+        """Write a warning when records were dropped since the last report."""
+        dropped = self.dropped - self._reported_drops
+        now = time.monotonic()
+        if not dropped:
+            return
+        if not force and now - self._last_drop_report < self.DROP_REPORT_INTERVAL:
+            return
+        
+        self._reported_drops += dropped
+        self._last_drop_report = now
+        record = logging.LogRecord(
+            'leuitlog', logging.WARNING, __file__, 0,
+            f"Write queue full, dropped {dropped} message(s) "
+            f"(policy: {self.overflow_policy})",
+            None, None
+        )
+        record.source = 'leuitlog'
+        self.target.handle(record)
     
-    # Set secure permissions on log file
-    if log_path.exists():
-        os.chmod(log_path, 0o640)
+    def stats(self) -> dict:
+        """
+        Get write pipeline counters.
+        
+        Returns:
+            Dictionary with queue depth and message counters
+        """
+        with self._cond:
+            depth = len(self._queue)
+        return {
+            'queue_depth': depth,
+            'queue_max_depth': self.max_depth,
+            'queue_capacity': self.max_queue,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'dropped': self.dropped
+        }
     
-    return logger
+    def headroom(self) -> int:
+        """
+        Get the number of records the queue takes before it is full.
+        
+        Returns:
+            Free queue slots (0 when full)
+        """
+        return max(0, self.max_queue - len(self._queue))
+    
+    def allow_overfill(self, thread_id: int, allow: bool = True) -> None:
+        """
+        Let one thread queue records beyond max_queue.
+        
+        Its records never wait for the writer and are never dropped by
+        the overflow policy; the thread is expected to stop producing
+        when headroom() reaches 0.
+        
+        Args:
+            thread_id: Thread identifier (threading.get_ident())
+            allow: False to remove the exemption again
+        """
+        with self._cond:
+            if allow:
+                self._overfill_threads.add(thread_id)
+            else:
+                self._overfill_threads.discard(thread_id)
+    
+    def replace_target(self, build) -> logging.Handler:
+        """
+        Swap the handler that writes the records, keeping the queue.
+        
+        The writer is paused while `build` runs and the previous target
+        is flushed before the new one writes, so queued records are
+        neither lost nor reordered.
+        
+        Args:
+            build: Callable taking the previous target and returning the new one
+            
+        Returns:
+            The previous target, for the caller to close
+        """
+        with self._target_lock:
+            previous = self.target
+            target = build(previous)
+            previous.flush()
+            self.target = target
+        return previous
+    
+    def flush(self) -> None:
+        """Flush the target handler."""
+        self.target.flush()
+    
+    def close(self) -> None:
+        """Drain the queue, stop the writer and close the target."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        
+        if self._writer.is_alive():
+            self._writer.join()
+        
+        self._report_drops(force=True)
+        
+        self.target.close()
+        super().close()
 
 
-def write_pid_file(pid_file: str) -> None:
+# Sidecar files kept next to each log segment and rotated with it
+LINE_INDEX_SUFFIX = '.idx'
+TOKEN_INDEX_SUFFIX = '.tok'
+FRAME_INDEX_SUFFIX = '.fidx'
+SIDECAR_SUFFIXES = (LINE_INDEX_SUFFIX, TOKEN_INDEX_SUFFIX, FRAME_INDEX_SUFFIX)
+
+# Compressed segments: codec name to file suffix, in frame index id order
+COMPRESSION_CODECS = ('gzip', 'zstd')
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+SEGMENT_DATA_SUFFIXES = ('', '.gz', '.zst')
+
+# Frame index layout: header followed by (offset, compressed offset) pairs
+FRAME_INDEX_MAGIC = b'LLFRM001'
+FRAME_INDEX_HEADER = struct.Struct('<8sIQQQI')
+FRAME_INDEX_ENTRY = struct.Struct('<QQ')
+
+# Read buffer for compressed segments
+SEGMENT_READ_BUFFER = 64 * 1024
+
+# Line index layout: header followed by uint64 line start offsets
+LINE_INDEX_MAGIC = b'LLIDX001'
+LINE_INDEX_HEADER = struct.Struct('<8sQQQII')
+LINE_INDEX_ENTRY = struct.Struct('<Q')
+
+# Leading bytes checksummed to detect a file truncated in place
+LINE_INDEX_HEAD_BYTES = 64
+
+# Bytes read per step when scanning a log file
+SCAN_CHUNK_SIZE = 1024 * 1024
+
+# Token index layout: header followed by "token<TAB>block,block\n" lines
+TOKEN_INDEX_MAGIC = b'LLTOK001'
+TOKEN_INDEX_HEADER = struct.Struct('<8sQQQIIIQ')
+
+# Searchable tokens: words, IP addresses, host names
+TOKEN_PATTERN = re.compile(rb'\w[\w.:@/-]*\w|\w')
+TOKEN_SEPARATORS = re.compile(rb'[.:@/-]')
+TOKEN_MIN_LENGTH = 2
+TOKEN_MAX_LENGTH = 64
+
+# Below this many bytes binary searches over files switch to a linear scan
+BISECT_LINEAR_BYTES = 16 * 1024
+
+# Width of the timestamp that starts every text log line
+LOG_TIMESTAMP_WIDTH = len('2024-01-15 10:30:45 +0000')
+
+
+def tokenize(text: bytes) -> set:
     """
-    Write the current process ID to the PID file.
+    Split text into lower-case search tokens.
+    
+    Compound tokens such as host names and addresses are kept whole
+    and also split into their parts, so "gw1.example.com" is found by
+    both "gw1.example.com" and "gw1".
     
     Args:
-        pid_file: Path to the PID file
+        text: Raw text
+        
+    Returns:
+        Set of tokens as bytes
     """
-    pid_path = Path(pid_file).expanduser()
-    pid_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    with open(pid_path, 'w') as f:
-        f.write(str(os.getpid()))
-    
-    os.chmod(pid_path, 0o644)
+    tokens = set()
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if len(token) > TOKEN_MAX_LENGTH:
+            continue
+        if len(token) >= TOKEN_MIN_LENGTH:
+            tokens.add(token)
+        if TOKEN_SEPARATORS.search(token):
+            for part in TOKEN_SEPARATORS.split(token):
+                if len(part) >= TOKEN_MIN_LENGTH:
+                    tokens.add(part)
+    return tokens
 
 
-def remove_pid_file(pid_file: str) -> None:
+def count_newlines(f, start: int, end: int) -> int:
     """
-    Remove the PID file on shutdown.
+    Count newline bytes in a range of a binary file.
     
     Args:
-        pid_file: Path to the PID file
+        f: File object opened in binary mode
+        start: First offset to scan
+        end: Offset to stop scanning at
+        
+    Returns:
+        Number of newline bytes in [start, end)
     """
-    pid_path = Path(pid_file).expanduser()
-    if pid_path.exists():
-        pid_path.unlink()
+    count = 0
+    f.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = f.read(min(SCAN_CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        count += chunk.count(b'\n')
+        remaining -= len(chunk)
+    return count
 
 
-def signal_handler(signum: int, frame) -> None:
+SegmentStat = namedtuple('SegmentStat', 'st_ino st_size st_mtime')
+
+
+def compress_frame(codec: str, data: bytes) -> bytes:
     """
-    Handle shutdown signals gracefully.
+    Compress one independently decompressible frame.
     
     Args:
-        signum: Signal number
-        frame: Current stack frame
+        codec: Compression codec ('gzip' or 'zstd')
+        data: Uncompressed bytes
+        
+    Returns:
+        Compressed frame (a gzip member or a zstd frame)
     """
-    global shutdown_requested
-    shutdown_requested = True
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor().compress(data)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
 
 
-def get_service_status(config: configparser.ConfigParser) -> dict:
+def decompress_frame(codec: str, data: bytes) -> bytes:
     """
-    Get the current service status.
+    Decompress one frame written by compress_frame().
     
     Args:
-        config: Configuration object
+        codec: Compression codec ('gzip' or 'zstd')
+        data: Compressed frame
         
     Returns:
-        Dictionary with status information
+        Uncompressed bytes
     """
-    pid_file = Path(config['service']['pid_file']).expanduser()
-    log_dir = Path(config['logging']['log_dir']).expanduser()
-    log_file = config['logging']['log_file']
-    log_path = log_dir / log_file
-    
-    status = {
-        'running': False,
-        'pid': None,
-        'log_file': str(log_path),
-        'log_size_bytes': 0,
-        'log_exists': log_path.exists(),
-        'timestamp': datetime.now().isoformat()
-    }
-    
-    if pid_file.exists():
-        try:
-            with open(pid_file, 'r') as f:
-                pid = int(f.read().strip())
-            # Check if process is actually running
-            os.kill(pid, 0)
-            status['running'] = True
-            status['pid'] = pid
-        except (ValueError, ProcessLookupError, PermissionError):
-            pass
-    
-    if log_path.exists():
-        status['log_size_bytes'] = log_path.stat().st_size
-    
-    return status
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data, 31)
 
 
-class SyslogListener:
+class FrameIndex:
     """
-    Listen for syslog messages on UDP port.
+    Frame table of a compressed log segment.
+    
+    Stored next to the segment, it maps uncompressed offsets to the
+    compressed frame holding them and remembers the inode of the
+    original file, so line and token indexes stay valid after
+    compression.
     """
     
-    def __init__(self, port: int, logger: logging.Logger):
+    def __init__(self, log_path):
         """
-        Initialize the syslog listener.
+        Initialize the frame index.
         
         Args:
-            port: UDP port to listen on
-            logger: Logger instance for recording messages
+            log_path: Logical path of the segment (without codec suffix)
         """
-        self.port = port
-        self.logger = logger
-        self.socket = None
-    
-    def start(self) -> None:
-        """Start listening for syslog messages."""
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.socket.setblocking(False)
-        
-        try:
-            self.socket.bind(('127.0.0.1', self.port))
-        except PermissionError:
-            raise ConfigError(
-                f"Cannot bind to port {self.port}. "
-                "Try using a port > 1024 or run with appropriate permissions."
-            )
-        except OSError as e:
-            raise ConfigError(f"Cannot bind to port {self.port}: {e}")
+        self.log_path = Path(log_path)
+        self.path = self.log_path.with_name(self.log_path.name + FRAME_INDEX_SUFFIX)
+        self.codec = None
+        self.source_inode = 0
+        self.size = 0
+        self.compressed_size = 0
+        self.offsets = []
+        self.compressed_offsets = []
     
-    def stop(self) -> None:
-        """Stop the listener and close the socket."""
-        if self.socket:
-            self.socket.close()
-            self.socket = None
-    
-    def process_messages(self, timeout: float = 1.0) -> int:
+    def load(self) -> bool:
         """
-        Process incoming syslog messages.
+        Load the frame table from its sidecar file.
         
-        Args:
-            timeout: Select timeout in seconds
-            
         Returns:
-            Number of messages processed
+            True if a well-formed frame table was loaded
         """
-        if not self.socket:
-            return 0
+        try:
+            with open(self.path, 'rb') as f:
+                header = f.read(FRAME_INDEX_HEADER.size)
+                if len(header) < FRAME_INDEX_HEADER.size:
+                    return False
+                magic, codec_id, self.source_inode, self.size, \
+                    self.compressed_size, frames = FRAME_INDEX_HEADER.unpack(header)
+                data = f.read(frames * FRAME_INDEX_ENTRY.size)
+        except OSError:
+            return False
         
-        count = 0
-        ready, _, _ = select.select([self.socket], [], [], timeout)
+        if magic != FRAME_INDEX_MAGIC or len(data) < frames * FRAME_INDEX_ENTRY.size:
+            return False
+        if codec_id >= len(COMPRESSION_CODECS):
+            return False
         
-        if ready:
-            while True:
-                try:
-                    data, addr = self.socket.recvfrom(8192)
-                    message = data.decode('utf-8', errors='replace').strip()
-                    
-                    # Parse syslog priority if present
-                    source = addr[0]
-                    if message.startswith('<'):
-                        try:
-                            end = message.index('>')
-                            message = message[end + 1:]
-                        except ValueError:
-                            pass
-                    
-                    # Log the message
-                    self.logger.info(
-                        message,
-                        extra={'source': source}
-                    )
-                    count += 1
-                    
-                except BlockingIOError:
-                    break
-                except Exception as e:
-                    self.logger.error(
-                        f"Error processing message: {e}",
-                        extra={'source': 'leuitlog'}
-                    )
+        self.codec = COMPRESSION_CODECS[codec_id]
+        self.offsets = []
+        self.compressed_offsets = []
+        for offset, compressed_offset in FRAME_INDEX_ENTRY.iter_unpack(data):
+            self.offsets.append(offset)
+            self.compressed_offsets.append(compressed_offset)
+        return True
+    
+    def write(self, path: Path) -> None:
+        """
+        Write the frame table.
         
-        return count
+        Args:
+            path: File to write (a temporary name before publishing)
+        """
+        with open(path, 'wb') as f:
+            f.write(FRAME_INDEX_HEADER.pack(
+                FRAME_INDEX_MAGIC, COMPRESSION_CODECS.index(self.codec),
+                self.source_inode, self.size, self.compressed_size,
+                len(self.offsets)
+            ))
+            f.write(b''.join(
+                FRAME_INDEX_ENTRY.pack(offset, compressed_offset)
+                for offset, compressed_offset in zip(self.offsets, self.compressed_offsets)
+            ))
+        os.chmod(path, 0o640)
 
 
-class JournalReader:
+class FramedRawReader(io.RawIOBase):
     """
-    Read and forward journald logs.
+    Seekable raw reader over a framed compressed segment.
+    
+    Presents the uncompressed contents; a read decompresses only the
+    frame that holds the requested offset. Wrap in io.BufferedReader
+    for readline() and small reads.
     """
     
-    def __init__(self, logger: logging.Logger):
+    def __init__(self, path: Path, frames: FrameIndex):
         """
-        Initialize the journal reader.
+        Initialize the reader.
         
         Args:
-            logger: Logger instance for recording messages
+            path: Compressed segment file
+            frames: Loaded frame table of the segment
         """
-        self.logger = logger
-        self.journal = None
-        self._available = False
+        super().__init__()
+        self.frames = frames
+        self._file = open(path, 'rb')
+        self._position = 0
+        self._frame = -1
+        self._data = b''
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.frames.size
+        self._position = max(0, offset)
+        return self._position
+    
+    def _load(self, frame: int) -> bytes:
+        """Decompress a frame, keeping the last one cached."""
+        if frame != self._frame:
+            start = self.frames.compressed_offsets[frame]
+            if frame + 1 < len(self.frames.compressed_offsets):
+                end = self.frames.compressed_offsets[frame + 1]
+            else:
+                end = self.frames.compressed_size
+            self._file.seek(start)
+            self._data = decompress_frame(self.frames.codec, self._file.read(end - start))
+            self._frame = frame
+        return self._data
+    
+    def readinto(self, buffer) -> int:
+        if self._position >= self.frames.size:
+            return 0
         
-        try:
-            from systemd import journal
-            self.journal = journal.Reader()
-            self.journal.this_boot()
-            self.journal.seek_tail()
-            self.journal.get_previous()
+        frame = bisect.bisect_right(self.frames.offsets, self._position) - 1
+        data = self._load(frame)
+        start = self._position - self.frames.offsets[frame]
+        count = min(len(buffer), len(data) - start)
+        buffer[:count] = data[start:start + count]
+        self._position += count
+        return count
+    
+    def close(self) -> None:
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def resolve_segment(log_path: Path) -> Optional[Path]:
+    """
+    Find the data file of a log segment.
+    
+    Args:
+        log_path: Logical path of the segment (e.g. leuitlog.log.2)
+        
+    Returns:
+        The plain or compressed file holding the segment, or None
+    """
+    log_path = Path(log_path)
+    for suffix in SEGMENT_DATA_SUFFIXES:
+        candidate = log_path.with_name(log_path.name + suffix)
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def open_segment(log_path: Path):
+    """
+    Open a log segment for reading, compressed or not.
+    
+    Args:
+        log_path: Logical path of the segment
+        
+    Returns:
+        Binary file object with the uncompressed contents
+        
+    Raises:
+        FileNotFoundError: If the segment does not exist
+    """
+    log_path = Path(log_path)
+    data_path = resolve_segment(log_path)
+    
+    if data_path is None:
+        raise FileNotFoundError(f"Log segment not found: {log_path}")
+    if data_path == log_path:
+        return open(log_path, 'rb')
+    
+    frames = FrameIndex(log_path)
+    if not frames.load():
+        raise FileNotFoundError(f"Frame index missing for {data_path}")
+    return io.BufferedReader(FramedRawReader(data_path, frames), SEGMENT_READ_BUFFER)
+
+
+def segment_stat(f) -> SegmentStat:
+    """
+    Identify an open log segment.
+    
+    Compressed segments report the inode of the file they were
+    compressed from and their uncompressed size.
+    
+    Args:
+        f: File object returned by open_segment()
+        
+    Returns:
+        SegmentStat with inode, size and modification time
+    """
+    raw = getattr(f, 'raw', None)
+    if isinstance(raw, FramedRawReader):
+        st = os.fstat(raw._file.fileno())
+        return SegmentStat(raw.frames.source_inode, raw.frames.size, st.st_mtime)
+    st = os.fstat(f.fileno())
+    return SegmentStat(st.st_ino, st.st_size, st.st_mtime)
+
+
+class LineIndex:
+    """
+    Sampled line-offset index stored next to a log file.
+    
+    The sidecar records the start offset of every Nth line, so any line
+    can be reached with one seek and at most N-1 skipped lines. Only
+    complete lines are indexed; the index covers the file up to
+    `indexed_size` and is extended incrementally as the file grows.
+    The index is bound to the file's inode and a checksum of its first
+    bytes, and is rebuilt when either changes.
+    """
+    
+    def __init__(self, log_path, interval: int = 256):
+        """
+        Initialize the index.
+        
+        Args:
+            log_path: Path to the indexed log file
+            interval: Lines between two sampled offsets (new indexes only)
+        """
+        self.log_path = Path(log_path)
+        self.path = self.log_path.with_name(self.log_path.name + LINE_INDEX_SUFFIX)
+        self.interval = max(1, interval)
+        self.inode = None
+        self.indexed_size = 0
+        self.line_count = 0
+        self.head_crc = 0
+        self.offsets = []
+        # Segment size seen by the last update()
+        self.file_size = 0
+    
+    def load(self) -> bool:
+        """
+        Load the index from its sidecar file.
+        
+        Returns:
+            True if a well-formed index was loaded
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                header = f.read(LINE_INDEX_HEADER.size)
+                if len(header) < LINE_INDEX_HEADER.size:
+                    return False
+                magic, inode, indexed_size, line_count, interval, head_crc = \
+                    LINE_INDEX_HEADER.unpack(header)
+                if magic != LINE_INDEX_MAGIC or interval < 1:
+                    return False
+                
+                entries = line_count // interval + 1
+                data = f.read(entries * LINE_INDEX_ENTRY.size)
+        except OSError:
+            return False
+        
+        if len(data) < entries * LINE_INDEX_ENTRY.size:
+            # Header written ahead of its offsets; treat as stale
+            return False
+        
+        self.inode = inode
+        self.indexed_size = indexed_size
+        self.line_count = line_count
+        self.interval = interval
+        self.head_crc = head_crc
+        self.offsets = [
+            entry[0] for entry in LINE_INDEX_ENTRY.iter_unpack(data)
+        ]
+        return True
+    
+    def matches(self, st: SegmentStat, f) -> bool:
+        """
+        Check if the index describes the given file.
+        
+        Args:
+            st: segment_stat() of the log file
+            f: The log file from open_segment()
+            
+        Returns:
+            True if the index is valid for the file
+        """
+        if self.inode != st.st_ino or self.indexed_size > st.st_size:
+            return False
+        return self.head_crc == self._head_crc(f, self.indexed_size)
+    
+    @staticmethod
+    def _head_crc(f, indexed_size: int) -> int:
+        """Checksum the leading bytes of the indexed part of a file."""
+        f.seek(0)
+        return zlib.crc32(f.read(min(LINE_INDEX_HEAD_BYTES, indexed_size)))
+    
+    def locate(self, line: int) -> Tuple[int, int]:
+        """
+        Find where to start reading to reach a line.
+        
+        Args:
+            line: 0-based line number, below line_count
+            
+        Returns:
+            Tuple of (byte offset, lines to skip from there)
+        """
+        return self.offsets[line // self.interval], line % self.interval
+    
+    def total_lines(self, f, end: int) -> int:
+        """
+        Count all lines of the file, using the index for the covered part.
+        
+        Args:
+            f: The log file opened in binary mode
+            end: Current size of the file
+            
+        Returns:
+            Number of lines, including a trailing partial line
+        """
+        if end <= self.indexed_size:
+            return self.line_count
+        
+        lines = self.line_count + count_newlines(f, self.indexed_size, end)
+        f.seek(end - 1)
+        if f.read(1) != b'\n':
+            lines += 1
+        return lines
+    
+    def _reset(self, inode: int) -> None:
+        """Discard the index contents for a new file."""
+        self.inode = inode
+        self.indexed_size = 0
+        self.line_count = 0
+        self.head_crc = 0
+        self.offsets = [0]
+    
+    def update(self) -> bool:
+        """
+        Extend the index with lines appended since the last update.
+        
+        Returns:
+            True if the index changed
+        """
+        try:
+            f = open_segment(self.log_path)
+        except OSError:
+            return False
+        
+        with f:
+            st = segment_stat(f)
+            self.file_size = st.st_size
+            rebuild = False
+            
+            if not self.matches(st, f):
+                # The sidecar may have been rotated in with its log file
+                if not (self.load() and self.matches(st, f)):
+                    self._reset(st.st_ino)
+                    rebuild = True
+            
+            if st.st_size == self.indexed_size and not rebuild:
+                return False
+            
+            previous_entries = len(self.offsets)
+            previous_size = self.indexed_size
+            self._scan(f, st.st_size)
+            
+            if previous_size < LINE_INDEX_HEAD_BYTES:
+                self.head_crc = self._head_crc(f, self.indexed_size)
+        
+        if rebuild:
+            self._write_all()
+        else:
+            self._append(previous_entries)
+        return True
+    
+    def _scan(self, f, size: int) -> None:
+        """Index complete lines between indexed_size and size."""
+        interval = self.interval
+        offsets = self.offsets
+        line_count = self.line_count
+        position = self.indexed_size
+        carry = b''
+        
+        f.seek(position)
+        remaining = size - position
+        
+        while remaining > 0:
+            data = f.read(min(SCAN_CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            
+            chunk = carry + data if carry else data
+            last = chunk.rfind(b'\n')
+            if last == -1:
+                carry = chunk
+                continue
+            
+            newlines = chunk.count(b'\n', 0, last + 1)
+            need = interval - line_count % interval
+            found = -1
+            
+            while newlines >= need:
+                for _ in range(need):
+                    found = chunk.find(b'\n', found + 1)
+                offsets.append(position + found + 1)
+                line_count += need
+                newlines -= need
+                need = interval
+            
+            line_count += newlines
+            position += last + 1
+            carry = chunk[last + 1:]
+        
+        self.line_count = line_count
+        self.indexed_size = position
+    
+    def _header(self) -> bytes:
+        """Pack the index header."""
+        return LINE_INDEX_HEADER.pack(
+            LINE_INDEX_MAGIC, self.inode, self.indexed_size,
+            self.line_count, self.interval, self.head_crc
+        )
+    
+    def _write_all(self) -> None:
+        """Write the complete index atomically."""
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(self._header())
+            f.write(b''.join(LINE_INDEX_ENTRY.pack(o) for o in self.offsets))
+        os.chmod(tmp_path, 0o640)
+        os.replace(tmp_path, self.path)
+    
+    def _append(self, previous_entries: int) -> None:
+        """Append new offsets, then publish them in the header."""
+        try:
+            f = open(self.path, 'r+b')
+        except FileNotFoundError:
+            self._write_all()
+            return
+        
+        with f:
+            f.seek(LINE_INDEX_HEADER.size + previous_entries * LINE_INDEX_ENTRY.size)
+            f.write(b''.join(
+                LINE_INDEX_ENTRY.pack(o) for o in self.offsets[previous_entries:]
+            ))
+            f.flush()
+            # Readers trust the header, so it goes last
+            f.seek(0)
+            f.write(self._header())
+
+
+class TokenIndex:
+    """
+    Inverted index from message tokens to line-index blocks.
+    
+    Each posting names a block of `interval` lines, numbered like the
+    samples of the segment's LineIndex, so a hit is read back with one
+    seek. Postings are appended as the log grows; once a segment is
+    rotated and complete, the index is compacted into one sorted line
+    per token that lookups binary search without loading the file.
+    Until then lookups go through an in-memory map of the appended
+    postings, which each lookup extends with what was appended since.
+    """
+    
+    def __init__(self, log_path):
+        """
+        Initialize the index.
+        
+        Args:
+            log_path: Path to the indexed log file
+        """
+        self.log_path = Path(log_path)
+        self.path = self.log_path.with_name(self.log_path.name + TOKEN_INDEX_SUFFIX)
+        self.inode = None
+        self.indexed_size = 0
+        self.line_count = 0
+        self.interval = 0
+        self.head_crc = 0
+        self.compacted = False
+        self.body_size = 0
+        # Appended postings read so far: token -> blocks, and the
+        # (inode, head_crc, interval) and body bytes they were read from
+        self._postings = {}
+        self._postings_key = None
+        self._postings_size = 0
+    
+    def load(self) -> bool:
+        """
+        Load the index header from its sidecar file.
+        
+        Returns:
+            True if a well-formed header was loaded
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                header = f.read(TOKEN_INDEX_HEADER.size)
+        except OSError:
+            return False
+        
+        if len(header) < TOKEN_INDEX_HEADER.size:
+            return False
+        
+        (magic, self.inode, self.indexed_size, self.line_count,
+         self.interval, self.head_crc, compacted, self.body_size) = \
+            TOKEN_INDEX_HEADER.unpack(header)
+        self.compacted = bool(compacted)
+        return magic == TOKEN_INDEX_MAGIC
+    
+    def matches(self, line_index: LineIndex) -> bool:
+        """
+        Check if the index numbers lines like the given line index.
+        
+        Args:
+            line_index: Valid line index of the same segment
+            
+        Returns:
+            True if postings can be resolved through line_index
+        """
+        return (
+            self.inode == line_index.inode
+            and self.head_crc == line_index.head_crc
+            and self.interval == line_index.interval
+            and self.indexed_size <= line_index.indexed_size
+        )
+    
+    def _header(self) -> bytes:
+        """Pack the index header."""
+        return TOKEN_INDEX_HEADER.pack(
+            TOKEN_INDEX_MAGIC, self.inode, self.indexed_size,
+            self.line_count, self.interval, self.head_crc,
+            int(self.compacted), self.body_size
+        )
+    
+    def update(self, line_index: LineIndex) -> bool:
+        """
+        Add postings for lines covered by the line index but not yet here.
+        
+        Args:
+            line_index: Up-to-date line index of the same segment
+            
+        Returns:
+            True if the index changed
+        """
+        if not (self.matches(line_index) or (self.load() and self.matches(line_index))):
+            self.inode = line_index.inode
+            self.head_crc = line_index.head_crc
+            self.interval = line_index.interval
+            self.indexed_size = 0
+            self.line_count = 0
+            self.compacted = False
+            self.body_size = 0
+            with open(self.path, 'wb') as f:
+                f.write(self._header())
+            os.chmod(self.path, 0o640)
+        
+        if self.compacted or self.indexed_size >= line_index.indexed_size:
+            return False
+        
+        postings = {}
+        interval = self.interval
+        line_number = self.line_count
+        
+        with open_segment(self.log_path) as f:
+            f.seek(self.indexed_size)
+            remaining = line_index.indexed_size - self.indexed_size
+            carry = b''
+            
+            while remaining > 0:
+                data = f.read(min(SCAN_CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                
+                lines = (carry + data).split(b'\n')
+                carry = lines.pop()
+                
+                for line in lines:
+                    block = line_number // interval
+                    for token in tokenize(line[LOG_TIMESTAMP_WIDTH:]):
+                        blocks = postings.get(token)
+                        if blocks is None:
+                            postings[token] = [block]
+                        elif blocks[-1] != block:
+                            blocks.append(block)
+                    line_number += 1
+        
+        body = b''.join(
+            token + b'\t' + b','.join(b'%d' % block for block in blocks) + b'\n'
+            for token, blocks in postings.items()
+        )
+        
+        with open(self.path, 'r+b') as f:
+            f.seek(TOKEN_INDEX_HEADER.size + self.body_size)
+            f.write(body)
+            f.flush()
+            self.body_size += len(body)
+            self.indexed_size = line_index.indexed_size
+            self.line_count = line_number
+            # Readers trust the header, so it goes last
+            f.seek(0)
+            f.write(self._header())
+        
+        return True
+    
+    def compact(self) -> None:
+        """Merge postings into one sorted line per token."""
+        postings = self._tail_postings()
+        
+        body = b''.join(
+            token + b'\t' + b','.join(b'%d' % block for block in sorted(postings[token])) + b'\n'
+            for token in sorted(postings)
+        )
+        
+        self.compacted = True
+        self.body_size = len(body)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(self._header())
+            f.write(body)
+        os.chmod(tmp_path, 0o640)
+        os.replace(tmp_path, self.path)
+        self._postings = {}
+        self._postings_key = None
+    
+    def _tail_postings(self) -> dict:
+        """Get the appended postings, reading only the body added since the last call."""
+        key = (self.inode, self.head_crc, self.interval)
+        if key != self._postings_key or self.body_size < self._postings_size:
+            # Rebuilt for another file since the map was read
+            self._postings = {}
+            self._postings_key = key
+            self._postings_size = 0
+        
+        if self.body_size > self._postings_size:
+            postings = self._postings
+            with open(self.path, 'rb') as f:
+                f.seek(TOKEN_INDEX_HEADER.size + self._postings_size)
+                data = f.read(self.body_size - self._postings_size)
+            # The header is written last, so the body up to body_size is complete
+            for line in data.split(b'\n'):
+                if line:
+                    name, _, blocks = line.partition(b'\t')
+                    found = postings.get(name)
+                    if found is None:
+                        found = postings[name] = set()
+                    found.update(int(block) for block in blocks.split(b','))
+            self._postings_size += len(data)
+        
+        return self._postings
+    
+    def lookup(self, token: bytes) -> set:
+        """
+        Get the blocks whose lines may contain a token.
+        
+        Args:
+            token: Token as returned by tokenize()
+            
+        Returns:
+            Set of block numbers
+        """
+        if not self.compacted:
+            return set(self._tail_postings().get(token, ()))
+        self._postings = {}
+        self._postings_key = None
+        
+        # Binary search the sorted body for the token's line
+        key = token + b'\t'
+        with open(self.path, 'rb') as f:
+            low = TOKEN_INDEX_HEADER.size
+            high = low + self.body_size
+            
+            while high - low > BISECT_LINEAR_BYTES:
+                middle = (low + high) // 2
+                f.seek(middle - 1)
+                position = middle - 1 + len(f.readline())
+                line = f.readline()
+                if line and line < key:
+                    low = position + len(line)
+                else:
+                    high = middle
+            
+            f.seek(low)
+            while f.tell() < TOKEN_INDEX_HEADER.size + self.body_size:
+                line = f.readline()
+                if line.startswith(key):
+                    return {int(b) for b in line[len(key):].split(b',')}
+                if line > key:
+                    break
+        
+        return set()
+
+
+# Per log file: the lock serializing renames of its segments, and the
+# number of handlers writing it. Shared by the file handlers, their
+# compressors and the retention manager.
+_segment_locks = {}
+_open_log_files = {}
+_segment_registry_lock = threading.Lock()
+
+# Set after every rotation; wakes the retention manager
+segment_rotated = threading.Event()
+
+
+def segment_lock(log_path) -> threading.Lock:
+    """
+    Get the lock that serializes renames of a log file's segments.
+    
+    Rotation holds it while shifting backups; anything else that
+    replaces or removes segments holds it and checks inodes first.
+    
+    Args:
+        log_path: Path to the current log file
+    
+    Returns:
+        The same lock for every caller naming the same file
+    """
+    key = os.path.abspath(log_path)
+    with _segment_registry_lock:
+        lock = _segment_locks.get(key)
+        if lock is None:
+            lock = _segment_locks[key] = threading.Lock()
+        return lock
+
+
+def log_file_open(log_path) -> bool:
+    """
+    Check whether a handler is writing a log file.
+    
+    Call with segment_lock() held; handlers register under it before
+    they open the file.
+    
+    Args:
+        log_path: Path to the current log file
+    
+    Returns:
+        True if at least one handler has the file open
+    """
+    return _open_log_files.get(os.path.abspath(log_path), 0) > 0
+
+
+class WriteProgress:
+    """
+    Track how far numbered records have been written to the log files.
+    
+    Each numbered record is referenced by whatever still holds it: the
+    caller while it logs the record, the write queue and every file
+    handler buffering it. A record with no reference left was written,
+    or dropped on purpose by a filter. The written position is the
+    number below the oldest record still referenced.
+    """
+    
+    def __init__(self):
+        """Initialize an empty tracker."""
+        self._lock = threading.Lock()
+        self._issued = 0
+        # write_seq -> number of references
+        self._refs = {}
+    
+    def issue(self) -> int:
+        """
+        Number a record, referenced by the caller until it releases it.
+        
+        Returns:
+            The record's write_seq
+        """
+        with self._lock:
+            self._issued += 1
+            self._refs[self._issued] = 1
+            return self._issued
+    
+    def hold(self, seq: int) -> None:
+        """
+        Reference a numbered record, e.g. when it is queued or buffered.
+        
+        Args:
+            seq: The record's write_seq
+        """
+        with self._lock:
+            self._refs[seq] = self._refs.get(seq, 0) + 1
+    
+    def release(self, seq: int) -> None:
+        """
+        Drop a reference taken with issue() or hold().
+        
+        Args:
+            seq: The record's write_seq
+        """
+        with self._lock:
+            count = self._refs.get(seq, 0) - 1
+            if count > 0:
+                self._refs[seq] = count
+            else:
+                self._refs.pop(seq, None)
+    
+    def position(self) -> int:
+        """
+        Get the number up to which all records were written.
+        
+        Returns:
+            Highest write_seq with it and every lower one written
+        """
+        with self._lock:
+            if not self._refs:
+                return self._issued
+            return min(self._refs) - 1
+
+
+write_progress = WriteProgress()
+
+
+class LeuitFileHandler(RotatingFileHandler):
+    """
+    Rotating file handler that rotates sidecar files with each segment.
+    
+    Index files follow the log file they describe through every rename,
+    so rotated backups keep valid indexes without being rescanned.
+    With a compressor attached, rollover only renames files and hands
+    the new backup to the compressor's background thread.
+    
+    With a write buffer, formatted records are collected in memory and
+    written with one write() when the buffer is full, when the oldest
+    buffered record reaches `flush_interval`, at rollover and at close.
+    A failed write keeps the buffer for the next attempt, up to
+    FAILED_WRITE_LIMIT bytes. The fsync policy decides when written
+    data is forced to disk: never, every `fsync_interval` seconds, or
+    after every write.
+    """
+    
+    FSYNC_POLICIES = ('never', 'interval', 'batch')
+    
+    # Buffered bytes kept for a retry while writes fail
+    FAILED_WRITE_LIMIT = 16 * 1024 * 1024
+    
+    def __init__(self, filename, *args, compressor: Optional['SegmentCompressor'] = None,
+                 buffer_size: int = 0, flush_interval: float = 0.05,
+                 fsync: str = 'never', fsync_interval: float = 1.0,
+                 flush_thread: bool = True, **kwargs):
+        """
+        Initialize the handler.
+        
+        Args:
+            filename: Path to the log file
+            compressor: Optional compressor for rotated segments
+            buffer_size: Bytes buffered before a write (0 = write each record)
+            flush_interval: Longest time a record stays buffered, in seconds
+            fsync: One of FSYNC_POLICIES
+            fsync_interval: Seconds between two fsyncs with the 'interval' policy
+            flush_thread: Enforce the time bounds in an own thread; without
+                it the owner must call poll()
+            *args, **kwargs: Passed to RotatingFileHandler
+        """
+        if fsync not in self.FSYNC_POLICIES:
+            raise ConfigError(f"Unknown fsync policy: {fsync}")
+        
+        # Registered before the file is opened, so retention never
+        # removes a file a handler is about to write
+        self._registry_key = os.path.abspath(filename)
+        self.segment_lock = segment_lock(filename)
+        self._registered = False
+        self._register(1)
+        try:
+            super().__init__(filename, *args, **kwargs)
+        except Exception:
+            self._register(-1)
+            raise
+        self.compressor = compressor
+        self.buffer_size = max(0, buffer_size)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        
+        self._pending = []
+        self._pending_size = 0
+        self._pending_since = 0.0
+        # write_seq of buffered records, see WriteProgress
+        self._pending_seqs = []
+        # Bytes in the current file including the buffer, None until known
+        self._size = None
+        self._dirty = False
+        self._flush_failing = False
+        self._last_fsync = time.monotonic()
+        
+        # Enforces the buffering and fsync time bounds when idle
+        periods = []
+        if self.buffer_size:
+            periods.append(self.flush_interval)
+        if self.fsync == 'interval':
+            periods.append(self.fsync_interval)
+        self._poll_period = min(periods) if periods else None
+        self._stop = threading.Event()
+        self._flusher = None
+        if self._poll_period and flush_thread:
+            self._flusher = threading.Thread(
+                target=self._flush_loop,
+                name='leuitlog-flush',
+                daemon=True
+            )
+            self._flusher.start()
+    
+    def _register(self, delta: int) -> None:
+        """Count this handler as writing its file, or no longer."""
+        if self._registered == (delta > 0):
+            return
+        with self.segment_lock:
+            count = _open_log_files.get(self._registry_key, 0) + delta
+            if count > 0:
+                _open_log_files[self._registry_key] = count
+            else:
+                _open_log_files.pop(self._registry_key, None)
+        self._registered = delta > 0
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        """Add a record to the write buffer, writing it when full."""
+        try:
+            msg = self.format(record) + self.terminator
+            size = len(msg) if msg.isascii() else len(msg.encode(self.encoding, 'replace'))
+            
+            if self.stream is None:
+                self.stream = self._open()
+            if self._size is None:
+                self._size = os.fstat(self.stream.fileno()).st_size
+            
+            # Track the size instead of seeking the file for every record
+            if self.maxBytes > 0 and self._size > 0 and self._size + size >= self.maxBytes:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+                self._size = os.fstat(self.stream.fileno()).st_size
+            
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.append(msg)
+            self._pending_size += size
+            self._size += size
+            seq = getattr(record, 'write_seq', None)
+            if seq is not None:
+                write_progress.hold(seq)
+                self._pending_seqs.append(seq)
+            
+            if self._pending_size >= self.buffer_size:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+    
+    def flush(self) -> None:
+        """Write buffered records and apply the fsync policy."""
+        self.acquire()
+        try:
+            if self.stream:
+                if self._pending:
+                    # Kept until written, so a failed write is retried
+                    try:
+                        self.stream.write(''.join(self._pending))
+                    except OSError:
+                        self._discard_failed()
+                        raise
+                    self._pending = []
+                    self._pending_size = 0
+                    self._dirty = True
+                    metrics.add('file_writes_total')
+                self.stream.flush()
+                self._release_pending()
+                if self.fsync == 'batch' and self._dirty:
+                    self._sync()
+        finally:
+            self.release()
+    
+    def _discard_failed(self) -> None:
+        """Drop the buffer after a failed write once it outgrows FAILED_WRITE_LIMIT."""
+        if self._pending_size <= self.FAILED_WRITE_LIMIT:
+            return
+        metrics.add('records_lost_total', len(self._pending))
+        self._pending = []
+        self._pending_size = 0
+        # Never released, so the journal cursor stays before the lost records
+        self._pending_seqs = []
+    
+    def _release_pending(self) -> None:
+        """Release the numbered records written out of the buffer."""
+        seqs = self._pending_seqs
+        self._pending_seqs = []
+        for seq in seqs:
+            write_progress.release(seq)
+    
+    def _sync(self) -> None:
+        """Force written data of the current file to disk."""
+        if not self.stream:
+            return
+        started = time.monotonic()
+        os.fsync(self.stream.fileno())
+        self._dirty = False
+        self._last_fsync = time.monotonic()
+        metrics.observe('fsync_seconds', self._last_fsync - started)
+    
+    def poll(self) -> Optional[float]:
+        """
+        Flush an expired buffer and run a due interval fsync.
+        
+        Returns:
+            Seconds until the next check is due, or None without time bounds
+        """
+        if not self._poll_period:
+            return None
+        
+        timeout = self._poll_period
+        error = None
+        self.acquire()
+        try:
+            now = time.monotonic()
+            if self._pending:
+                if now - self._pending_since >= self.flush_interval:
+                    self.flush()
+                else:
+                    timeout = min(timeout, self._pending_since + self.flush_interval - now)
+            if (self.fsync == 'interval' and self._dirty
+                    and now - self._last_fsync >= self.fsync_interval):
+                self._sync()
+        except OSError as e:
+            error = e
+        finally:
+            self.release()
+        
+        # Logged outside the lock, once until a flush succeeds again
+        if error is None:
+            self._flush_failing = False
+        elif not self._flush_failing:
+            self._flush_failing = True
+            logging.getLogger('leuitlog').error(
+                f"Cannot flush {self.baseFilename}: {error}",
+                extra={'source': 'leuitlog'}
+            )
+        return timeout
+    
+    def _flush_loop(self) -> None:
+        """Flush expired buffers and run interval fsyncs until closed."""
+        timeout = self._poll_period
+        while not self._stop.wait(timeout):
+            timeout = self.poll()
+    
+    def _move_segment(self, source: str, dest: str) -> None:
+        """Rename a log segment and its sidecars, replacing dest."""
+        for suffix in SEGMENT_DATA_SUFFIXES + SIDECAR_SUFFIXES:
+            if os.path.exists(dest + suffix):
+                os.remove(dest + suffix)
+        
+        if source == self.baseFilename:
+            self.rotate(source, dest)
+        else:
+            for suffix in SEGMENT_DATA_SUFFIXES:
+                if os.path.exists(source + suffix):
+                    os.rename(source + suffix, dest + suffix)
+        
+        for suffix in SIDECAR_SUFFIXES:
+            if os.path.exists(source + suffix):
+                os.rename(source + suffix, dest + suffix)
+    
+    def doRollover(self) -> None:
+        """Roll over the log file, shifting backups and their sidecars."""
+        started = time.monotonic()
+        
+        if self.stream:
+            # Buffered records belong to the file being rotated
+            self.flush()
+            if self._dirty and self.fsync != 'never':
+                self._sync()
+            self.stream.close()
+            self.stream = None
+            self._dirty = False
+        self._size = None
+        
+        if self.backupCount > 0:
+            with self.segment_lock:
+                for i in range(self.backupCount - 1, 0, -1):
+                    source = self.rotation_filename(f"{self.baseFilename}.{i}")
+                    dest = self.rotation_filename(f"{self.baseFilename}.{i + 1}")
+                    if resolve_segment(Path(source)):
+                        self._move_segment(source, dest)
+                
+                dest = self.rotation_filename(self.baseFilename + ".1")
+                self._move_segment(self.baseFilename, dest)
+            
+            if self.compressor:
+                self.compressor.submit(Path(dest))
+        
+        if not self.delay:
+            self.stream = self._open()
+            os.chmod(self.baseFilename, 0o640)
+        
+        metrics.observe('rotation_seconds', time.monotonic() - started)
+        segment_rotated.set()
+    
+    def close(self) -> None:
+        """Write buffered records, close the file and stop the compressor."""
+        if self._flusher:
+            self._stop.set()
+            self._flusher.join()
+            self._flusher = None
+        
+        self.acquire()
+        try:
+            if self.stream:
+                self.flush()
+                if self._dirty and self.fsync != 'never':
+                    self._sync()
+        finally:
+            self.release()
+        
+        super().close()
+        self._release_pending()
+        self._register(-1)
+        if self.compressor:
+            self.compressor.stop()
+            self.compressor = None
+
+
+def segment_paths(log_path: Path, backup_count: int) -> List[Path]:
+    """
+    List a log file and its rotated backups, newest first.
+    
+    Args:
+        log_path: Path to the current log file
+        backup_count: Number of rotated backups kept
+        
+    Returns:
+        Paths of the current file and backups .1 to .N
+    """
+    return [log_path] + [
+        log_path.with_name(f"{log_path.name}.{i}")
+        for i in range(1, backup_count + 1)
+    ]
+
+
+class SegmentCompressor:
+    """
+    Compress rotated log segments in a background thread.
+    
+    Rotation only renames files; the new backup is queued here and
+    rewritten as independently decompressible frames of about
+    `frame_size` bytes, each ending at a line boundary, plus a frame
+    index. Readers go through open_segment() and decompress one frame
+    per seek.
+    """
+    
+    def __init__(self, log_path: Path, backup_count: int, codec: str = 'gzip',
+                 frame_size: int = 1024 * 1024):
+        """
+        Initialize the compressor.
+        
+        Args:
+            log_path: Path to the current log file
+            backup_count: Number of rotated backups kept
+            codec: Compression codec ('gzip' or 'zstd')
+            frame_size: Uncompressed bytes per frame
+        """
+        self.log_path = Path(log_path)
+        self.backup_count = backup_count
+        self.codec = codec
+        self.frame_size = max(4096, frame_size)
+        # Held by rotation so segments don't move while a job publishes
+        self.lock = segment_lock(log_path)
+        self._queue = queue.Queue()
+        self._stopping = threading.Event()
+        self._thread = None
+    
+    @property
+    def suffix(self) -> str:
+        """File suffix of compressed segments."""
+        return COMPRESSION_SUFFIXES[self.codec]
+    
+    def start(self) -> None:
+        """Start the worker; backups left uncompressed are picked up first."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='leuitlog-compressor',
+            daemon=True
+        )
+        self._thread.start()
+        self.submit()
+    
+    def submit(self, path: Optional[Path] = None) -> None:
+        """
+        Wake the worker after a rollover.
+        
+        Args:
+            path: The new backup (informational; every plain backup is swept)
+        """
+        self._queue.put(path)
+    
+    def stop(self) -> None:
+        """Finish the current segment and stop; the rest resume on next start."""
+        if self._thread:
+            self._stopping.set()
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self) -> None:
+        """Compress uncompressed backups each time the worker is woken."""
+        while not self._stopping.is_set():
+            self._queue.get()
+            
+            # Segments shift while we work, so sweep until none is left
+            while not self._stopping.is_set():
+                pending = [
+                    path for path in segment_paths(self.log_path, self.backup_count)[1:]
+                    if path.exists()
+                ]
+                if not pending:
+                    break
+                try:
+                    self._compress(pending[-1])
+                except OSError:
+                    # Segment aged out or disk trouble; the next wakeup retries
+                    break
+                except Exception:
+                    # Keep the thread alive for later rotations
+                    logging.getLogger('leuitlog').exception(
+                        f"Cannot compress log segment {pending[-1]}",
+                        extra={'source': 'leuitlog'}
+                    )
+                    break
+    
+    def _compress(self, path: Path) -> None:
+        """Compress one segment and publish it in place of the original."""
+        frames = FrameIndex(path)
+        frames.codec = self.codec
+        tmp_data = path.with_name(path.name + self.suffix + '.tmp')
+        tmp_frames = path.with_name(path.name + FRAME_INDEX_SUFFIX + '.tmp')
+        
+        try:
+            with open(path, 'rb') as source, open(tmp_data, 'wb') as dest:
+                source_stat = os.fstat(source.fileno())
+                frames.source_inode = source_stat.st_ino
+                offset = 0
+                
+                while True:
+                    data = source.read(self.frame_size)
+                    if not data:
+                        break
+                    if not data.endswith(b'\n'):
+                        # End frames on a line boundary
+                        data += source.readline()
+                    
+                    frames.offsets.append(offset)
+                    frames.compressed_offsets.append(dest.tell())
+                    dest.write(compress_frame(self.codec, data))
+                    offset += len(data)
+                
+                frames.size = offset
+                frames.compressed_size = dest.tell()
+                os.fsync(dest.fileno())
+            
+            os.chmod(tmp_data, 0o640)
+            # Keep the time of the last record for age-based retention
+            os.utime(tmp_data, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+            frames.write(tmp_frames)
+            
+            with self.lock:
+                # The segment may have been shifted by a rollover meanwhile
+                target = None
+                for candidate in segment_paths(self.log_path, self.backup_count)[1:]:
+                    try:
+                        if os.stat(candidate).st_ino == frames.source_inode:
+                            target = candidate
+                            break
+                    except OSError:
+                        continue
+                
+                if target is None:
+                    return
+                
+                os.replace(tmp_frames, target.with_name(target.name + FRAME_INDEX_SUFFIX))
+                os.replace(tmp_data, target.with_name(target.name + self.suffix))
+                os.remove(target)
+        finally:
+            for tmp in (tmp_data, tmp_frames):
+                if tmp.exists():
+                    tmp.unlink()
+
+
+class LogIndexer:
+    """
+    Keep line and token indexes of a log file and its backups up to date.
+    
+    Runs in a background thread off the ingest and write paths.
+    """
+    
+    def __init__(self, log_path: Path, backup_count: int,
+                 interval: int = 256, period: float = 1.0,
+                 tokens: bool = False):
+        """
+        Initialize the indexer.
+        
+        Args:
+            log_path: Path to the current log file
+            backup_count: Number of rotated backups kept
+            interval: Lines between two sampled offsets
+            period: Seconds between two index updates
+            tokens: Also maintain the full-text token index
+        """
+        self.log_path = Path(log_path)
+        self.backup_count = backup_count
+        self.interval = interval
+        self.period = period
+        self.tokens = tokens
+        self._indexes = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def update_all(self) -> None:
+        """Bring the indexes of every existing segment up to date."""
+        for path in segment_paths(self.log_path, self.backup_count):
+            if resolve_segment(path) is None:
+                continue
+            indexes = self._indexes.get(path)
+            if indexes is None:
+                indexes = self._indexes[path] = (
+                    LineIndex(path, self.interval),
+                    TokenIndex(path) if self.tokens else None
+                )
+            line_index, token_index = indexes
+            try:
+                line_index.update()
+                if token_index:
+                    token_index.update(line_index)
+                    # Backups no longer grow; compact once fully indexed
+                    if (path != self.log_path and not token_index.compacted
+                            and token_index.indexed_size == line_index.file_size):
+                        token_index.compact()
+            except OSError:
+                # Segment rotated away mid-scan; next pass catches up
+                self._indexes.pop(path, None)
+    
+    def _run(self) -> None:
+        """Update indexes periodically until stopped."""
+        while not self._stop_event.wait(self.period):
+            self.update_all()
+    
+    def start(self) -> None:
+        """Start the background indexing thread."""
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='leuitlog-indexer',
+            daemon=True
+        )
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the thread and index what was written last."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self.update_all()
+
+
+# Name of any file belonging to a log segment: the log file's name,
+# then optionally the backup number, compression and sidecar suffixes
+SEGMENT_FILE_NAME = re.compile(
+    r'^(?P<base>.+?)(?:\.(?P<number>\d+))?'
+    r'(?P<codec>' + '|'.join(re.escape(s) for s in COMPRESSION_SUFFIXES.values()) + r')?'
+    r'(?P<sidecar>' + '|'.join(re.escape(s) for s in SIDECAR_SUFFIXES) + r')?$'
+)
+
+# Segments being removed are renamed to this suffix first
+RETENTION_TRASH_SUFFIX = '.expired'
+
+# Shortest time between two retention passes while rotations keep coming
+RETENTION_MIN_PERIOD = 1.0
+
+# One log segment as seen by the retention manager; `inode` is None
+# for sidecars whose segment no longer exists
+RetainedSegment = namedtuple('RetainedSegment', 'log_path path number inode mtime size')
+
+
+class RetentionManager:
+    """
+    Keep the log files within a total size and a maximum age.
+    
+    Covers the text and structured logs and the routed streams: every
+    segment, compressed or not, is counted with its index sidecars.
+    A background thread, woken by each rotation and at least every
+    `interval` seconds, removes expired segments and, while the total
+    is over budget, the oldest ones, one segment at a time. Files a
+    handler has open are never removed. Rotation waits at most for the
+    renames that take a segment out of place; the data is unlinked
+    after the lock is released.
+    """
+    
+    def __init__(self, log_paths: List[Path], stream_dir: Optional[Path],
+                 logger: logging.Logger, max_bytes: int = 0,
+                 max_age: float = 0.0, interval: float = 60.0):
+        """
+        Initialize the manager.
+        
+        Args:
+            log_paths: Log files in one directory whose segments are managed
+            stream_dir: Directory of routed stream files, or None
+            logger: Logger for removal reports
+            max_bytes: Budget for all managed files (0 = unlimited)
+            max_age: Seconds after its last write a segment is kept (0 = unlimited)
+            interval: Longest time between two passes, in seconds
+        """
+        self.log_paths = [Path(path) for path in log_paths]
+        self.stream_dir = Path(stream_dir) if stream_dir else None
+        self.logger = logger
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.interval = interval
+        self._over_budget = False
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def _is_managed(self, directory: Path, base: str) -> bool:
+        """Check whether a file name base is one of the managed logs."""
+        if directory == self.stream_dir:
+            return (base.endswith(STREAM_SUFFIX)
+                    and STREAM_NAME.match(base[:-len(STREAM_SUFFIX)]) is not None)
+        return any(path.parent == directory and path.name == base for path in self.log_paths)
+    
+    def scan(self) -> Tuple[List[RetainedSegment], int]:
+        """
+        List the managed segments, oldest first.
+        
+        A backup is never ordered after a newer backup of the same
+        log, so numbering stays contiguous as the oldest are removed.
+        
+        Returns:
+            Segments and the total size of all managed files in bytes
+        """
+        directories = {path.parent for path in self.log_paths}
+        if self.stream_dir:
+            directories.add(self.stream_dir)
+        
+        # Logical segment path -> [log path, number, data files, size]
+        found = {}
+        total = 0
+        for directory in directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            
+            for entry in entries:
+                if entry.name.endswith(RETENTION_TRASH_SUFFIX):
+                    # Left over from an interrupted removal
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
+                    continue
+                
+                match = SEGMENT_FILE_NAME.match(entry.name)
+                if (match is None or not self._is_managed(directory, match['base'])
+                        or (match['codec'] and not match['number'])):
+                    continue
+                try:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                
+                number = int(match['number'] or 0)
+                name = f"{match['base']}.{number}" if number else match['base']
+                segment = found.setdefault(
+                    directory / name,
+                    [directory / match['base'], number, {}, 0]
+                )
+                segment[3] += st.st_size
+                total += st.st_size
+                if not match['sidecar']:
+                    segment[2][match['codec'] or ''] = st
+        
+        # Order each log's segments newest first, then merge by age
+        families = {}
+        for path, (log_path, number, data, size) in found.items():
+            families.setdefault(log_path, []).append((number, path, data, size))
+        
+        segments = []
+        for log_path, members in families.items():
+            members.sort(key=lambda member: member[0])
+            newest = None
+            for number, path, data, size in members:
+                # resolve_segment() prefers the plain file
+                st = next((data[suffix] for suffix in SEGMENT_DATA_SUFFIXES if suffix in data), None)
+                if st is None:
+                    segments.append(RetainedSegment(log_path, path, number, None, 0.0, size))
+                    continue
+                newest = st.st_mtime if newest is None else min(newest, st.st_mtime)
+                segments.append(RetainedSegment(log_path, path, number, st.st_ino, newest, size))
+        
+        segments.sort(key=lambda segment: (segment.mtime, -segment.number))
+        return segments, total
+    
+    def _remove(self, segment: RetainedSegment) -> Optional[int]:
+        """
+        Remove one segment and its sidecars if it is still in place.
+        
+        Args:
+            segment: Segment from scan()
+            
+        Returns:
+            Bytes freed, or None if the segment was skipped
+        """
+        moved = []
+        with segment_lock(segment.log_path):
+            if segment.number == 0 and log_file_open(segment.log_path):
+                return None
+            # Rotation may have shifted the segment since the scan
+            data = resolve_segment(segment.path)
+            if segment.inode is None:
+                if data is not None:
+                    return None
+            else:
+                try:
+                    if data is None or os.stat(data).st_ino != segment.inode:
+                        return None
+                except OSError:
+                    return None
+            
+            for suffix in SEGMENT_DATA_SUFFIXES + SIDECAR_SUFFIXES:
+                path = f"{segment.path}{suffix}"
+                try:
+                    os.rename(path, path + RETENTION_TRASH_SUFFIX)
+                except FileNotFoundError:
+                    continue
+                moved.append(path + RETENTION_TRASH_SUFFIX)
+        
+        freed = 0
+        for path in moved:
+            try:
+                freed += os.stat(path).st_size
+                os.unlink(path)
+            except OSError:
+                pass
+        return freed
+    
+    def enforce(self) -> None:
+        """Remove expired segments, then the oldest while over budget."""
+        segments, total = self.scan()
+        cutoff = time.time() - self.max_age if self.max_age else None
+        removed = freed = 0
+        
+        for segment in segments:
+            if self._stop_event.is_set():
+                break
+            if segment.inode is None:
+                reason = 'orphan'
+            elif cutoff is not None and segment.mtime < cutoff:
+                reason = 'age'
+            elif self.max_bytes and total > self.max_bytes:
+                reason = 'size'
+            else:
+                continue
+            
+            try:
+                size = self._remove(segment)
+            except OSError as e:
+                self.logger.error(
+                    f"Cannot remove log segment {segment.path}: {e}",
+                    extra={'source': 'leuitlog'}
+                )
+                break
+            if size is None:
+                continue
+            
+            total -= size
+            freed += size
+            removed += 1
+            metrics.add('retention_segments_removed_total', reason=reason)
+            metrics.add('retention_bytes_removed_total', size, reason=reason)
+        
+        metrics.set('log_files_bytes', total)
+        if removed:
+            self.logger.info(
+                f"Retention removed {removed} log segment(s), "
+                f"{freed / (1024 * 1024):.1f} MB freed",
+                extra={'source': 'leuitlog'}
+            )
+        
+        # Report once when only files being written are left
+        over_budget = bool(self.max_bytes) and total > self.max_bytes
+        if over_budget and not self._over_budget:
+            self.logger.warning(
+                f"Log files use {total / (1024 * 1024):.1f} MB, more than the "
+                f"retention budget of {self.max_bytes / (1024 * 1024):.1f} MB, "
+                f"but only open files are left",
+                extra={'source': 'leuitlog'}
+            )
+        self._over_budget = over_budget
+    
+    def _run(self) -> None:
+        """Enforce the limits after rotations and periodically until stopped."""
+        while not self._stop_event.is_set():
+            segment_rotated.wait(self.interval)
+            if self._stop_event.is_set():
+                break
+            segment_rotated.clear()
+            try:
+                self.enforce()
+            except Exception as e:
+                self.logger.error(
+                    f"Retention pass failed: {e}",
+                    extra={'source': 'leuitlog'}
+                )
+            # A log storm rotates continuously; don't rescan for each file
+            self._stop_event.wait(RETENTION_MIN_PERIOD)
+    
+    def start(self) -> None:
+        """Start the background retention thread."""
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='leuitlog-retention',
+            daemon=True
+        )
+        self._thread.start()
+        # Apply the limits at startup without waiting for a rotation
+        segment_rotated.set()
+    
+    def stop(self) -> None:
+        """Stop the thread after the segment being removed."""
+        self._stop_event.set()
+        segment_rotated.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+
+class DuplicateFilter(logging.Filter):
+    """
+    Fold repeated identical messages from one source into a summary.
+    
+    A message equal (same level and text) to the previous one from
+    the same source, within `window` seconds of its first occurrence,
+    is dropped before it reaches any handler and only counted. When
+    the source sends something else, the window expires or the count
+    reaches `max_repeats`, a single "message repeated N times, last at
+    <time>: [...]" record is logged. It is stamped when it is logged,
+    not with the time of the last repeat, so the log stays in time
+    order for readers that bisect it.
+    """
+    
+    # Seconds between two sweeps for expired windows
+    SWEEP_INTERVAL = 1.0
+    
+    def __init__(self, logger: logging.Logger, window: float = 30.0,
+                 max_repeats: int = 1000):
+        """
+        Initialize the filter.
+        
+        Args:
+            logger: Logger that summaries are written to
+            window: Seconds after the first occurrence to keep folding
+            max_repeats: Repeats folded into one summary at most
+        """
+        super().__init__()
+        self.logger = logger
+        self.window = window
+        self.max_repeats = max(1, max_repeats)
+        self.suppressed = 0
+        # source -> [level, text, first seen, last seen, repeats, record,
+        #            write_seq of the last repeat]
+        self._last = {}
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Drop a repeat, or let the record through after any summary."""
+        if hasattr(record, 'repeat_count'):
+            return True
+        
+        source = getattr(record, 'source', '')
+        text = record.getMessage()
+        created = record.created
+        summary = None
+        
+        with self._lock:
+            entry = self._last.get(source)
+            if entry is not None:
+                if (entry[0] == record.levelno and entry[1] == text
+                        and created - entry[2] <= self.window
+                        and entry[4] < self.max_repeats):
+                    entry[3] = created
+                    entry[4] += 1
+                    # The summary stands for the repeat; the repeat itself
+                    # counts as written once its logger call returns
+                    entry[6] = getattr(record, 'write_seq', None)
+                    self.suppressed += 1
+                    return False
+                # Logged just ahead of the record that ends the run
+                summary = self._summary(entry, created)
+            self._last[source] = [record.levelno, text, created, created, 0, record, None]
+        
+        if summary:
+            self.logger.handle(summary)
+        return True
+    
+    def flush_expired(self, now: Optional[float] = None) -> None:
+        """
+        Log summaries for windows that have expired.
+        
+        Cheap to call often: it sweeps at most once per SWEEP_INTERVAL.
+        
+        Args:
+            now: Current time (defaults to time.time())
+        """
+        now = time.time() if now is None else now
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.SWEEP_INTERVAL
+        
+        summaries = []
+        with self._lock:
+            for source, entry in list(self._last.items()):
+                if now - entry[2] > self.window:
+                    del self._last[source]
+                    summary = self._summary(entry, now)
+                    if summary:
+                        summaries.append(summary)
+        
+        for summary in summaries:
+            self.logger.handle(summary)
+    
+    def flush(self) -> None:
+        """Log summaries for all pending repeats."""
+        now = time.time()
+        with self._lock:
+            summaries = [self._summary(entry, now) for entry in self._last.values()]
+            self._last.clear()
+        
+        for summary in summaries:
+            if summary:
+                self.logger.handle(summary)
+    
+    def _summary(self, entry: list, now: float) -> Optional[logging.LogRecord]:
+        """Build the summary record for an entry, if it had repeats, stamped `now`."""
+        level, text, _, last_seen, repeats, record, last_seq = entry
+        if not repeats:
+            return None
+        
+        last_at = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_seen))
+        summary = logging.makeLogRecord(record.__dict__)
+        summary.write_seq = last_seq
+        summary.msg = f"message repeated {repeats} times, last at {last_at}: [{text}]"
+        summary.args = None
+        summary.created = now
+        summary.msecs = (now - int(now)) * 1000
+        summary.repeat_count = repeats
+        summary.last_repeat = last_seen
+        return summary
+
+
+def get_duplicate_filter(logger: logging.Logger) -> Optional[DuplicateFilter]:
+    """
+    Get the duplicate filter of a logger.
+    
+    Args:
+        logger: Logger instance
+        
+    Returns:
+        The filter, or None if duplicate suppression is disabled
+    """
+    for log_filter in logger.filters:
+        if isinstance(log_filter, DuplicateFilter):
+            return log_filter
+    return None
+
+
+class HostnameSource(logging.Filter):
+    """
+    Use the host name from the syslog header as a record's source.
+    
+    The name is whatever the sender wrote into its header and can be
+    forged; the sender's address stays on the record as 'address'.
+    Reading it decodes the header on the ingest path.
+    """
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Replace the source of syslog records that name a host."""
+        parsed = getattr(record, 'syslog', None)
+        if parsed is not None and parsed.hostname:
+            record.source = parsed.hostname
+        return True
+
+
+# Level columns of a statistics bucket, by levelno // 10 - 1
+STATS_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+# Stats file format version
+STATS_VERSION = 1
+
+
+class LogStats(logging.Filter):
+    """
+    Count logged records per time bucket, source and level.
+    
+    Runs as a logger filter ahead of duplicate suppression, so folded
+    repeats are counted too. Each bucket maps a source to one counter
+    per STATS_LEVELS entry; a bucket tracks at most `max_sources`
+    sources and adds the rest up under OTHER_SOURCE. Buckets older
+    than `retention` seconds are dropped. The daemon writes snapshots
+    to a stats file that the Web UI serves at /api/stats and that is
+    loaded again on startup.
+    """
+    
+    OTHER_SOURCE = '(other)'
+    
+    def __init__(self, retention: float = 86400, bucket_seconds: int = 60,
+                 max_sources: int = 50):
+        """
+        Initialize empty statistics.
+        
+        Args:
+            retention: Seconds of buckets kept
+            bucket_seconds: Width of one bucket
+            max_sources: Sources counted separately per bucket
+        """
+        super().__init__()
+        self.retention = retention
+        self.bucket_seconds = max(1, bucket_seconds)
+        self.max_sources = max(1, max_sources)
+        # bucket start -> {source: [count per level]}
+        self._buckets = {}
+        self._bucket_start = None
+        self._bucket = None
+        self._lock = threading.Lock()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Count a record; never drops it."""
+        # Summaries of folded repeats were counted as they arrived
+        if hasattr(record, 'repeat_count'):
+            return True
+        
+        start = int(record.created) // self.bucket_seconds * self.bucket_seconds
+        column = min(4, max(0, record.levelno // 10 - 1))
+        source = getattr(record, 'source', '')
+        
+        with self._lock:
+            if start != self._bucket_start:
+                self._select_bucket(start)
+            
+            counts = self._bucket.get(source)
+            if counts is None:
+                if len(self._bucket) >= self.max_sources:
+                    source = self.OTHER_SOURCE
+                    counts = self._bucket.get(source)
+                if counts is None:
+                    counts = self._bucket[source] = [0] * len(STATS_LEVELS)
+            counts[column] += 1
+        
+        return True
+    
+    def _select_bucket(self, start: int) -> None:
+        """Make `start` the current bucket and drop expired ones."""
+        bucket = self._buckets.get(start)
+        if bucket is None:
+            bucket = self._buckets[start] = {}
+        self._bucket_start = start
+        self._bucket = bucket
+        
+        oldest = start - self.retention
+        for expired in [t for t in self._buckets if t < oldest]:
+            del self._buckets[expired]
+    
+    def snapshot(self) -> dict:
+        """
+        Get all buckets in stats file form.
+        
+        Returns:
+            Dictionary with the bucket width, level names and a list of
+            [bucket start, {source: [count per level]}] oldest first
+        """
+        with self._lock:
+            buckets = [
+                [start, {source: list(counts) for source, counts in bucket.items()}]
+                for start, bucket in sorted(self._buckets.items())
+            ]
+        return {
+            'version': STATS_VERSION,
+            'bucket_seconds': self.bucket_seconds,
+            'levels': list(STATS_LEVELS),
+            'time': time.time(),
+            'buckets': buckets,
+        }
+    
+    def write(self, path: Path) -> None:
+        """
+        Atomically write a snapshot to a stats file.
+        
+        Args:
+            path: Stats file path
+        """
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f, separators=(',', ':'))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    
+    def load(self, path: Path) -> int:
+        """
+        Add the buckets of a stats file written by an earlier run.
+        
+        Files with another format or bucket width are ignored.
+        
+        Args:
+            path: Stats file path
+            
+        Returns:
+            Number of buckets loaded
+        """
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        
+        if (not isinstance(data, dict) or data.get('version') != STATS_VERSION
+                or data.get('bucket_seconds') != self.bucket_seconds):
+            return 0
+        
+        oldest = time.time() - self.retention
+        loaded = 0
+        with self._lock:
+            for start, sources in data.get('buckets', []):
+                if start < oldest:
+                    continue
+                bucket = self._buckets.setdefault(start, {})
+                for source, counts in sources.items():
+                    total = bucket.setdefault(source, [0] * len(STATS_LEVELS))
+                    for column, count in enumerate(counts[:len(STATS_LEVELS)]):
+                        total[column] += count
+                loaded += 1
+        return loaded
+
+
+def get_log_stats(logger: logging.Logger) -> Optional[LogStats]:
+    """
+    Get the statistics filter of a logger.
+    
+    Args:
+        logger: Logger instance
+        
+    Returns:
+        The filter, or None if statistics are disabled
+    """
+    for log_filter in logger.filters:
+        if isinstance(log_filter, LogStats):
+            return log_filter
+    return None
+
+
+def stats_file_path(config: configparser.ConfigParser) -> Optional[Path]:
+    """
+    Get the path of the daemon's statistics file.
+    
+    Args:
+        config: Parsed configuration object
+        
+    Returns:
+        Configured path, stats.json in the log directory by default,
+        or None if statistics are disabled
+    """
+    if config.getfloat('service', 'stats_interval', fallback=10) <= 0:
+        return None
+    
+    stats_file = config.get('service', 'stats_file', fallback='')
+    if stats_file:
+        return Path(stats_file).expanduser()
+    return Path(config['logging']['log_dir']).expanduser() / 'stats.json'
+
+
+class JsonLineFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line.
+    
+    The timestamp comes first as "ts" (Unix epoch seconds), so readers
+    can find it at a fixed offset without decoding the whole line.
+    Parsed syslog fields are included when the record has them.
+    """
+    
+    def format(self, record: logging.LogRecord) -> str:
+        """Serialize a record to a single JSON line."""
+        entry = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'source': getattr(record, 'source', ''),
+            'message': record.getMessage(),
+        }
+        
+        parsed = getattr(record, 'syslog', None)
+        repeats = getattr(record, 'repeat_count', None)
+        if parsed is not None:
+            entry['address'] = getattr(record, 'address', '')
+            for field, value in zip(SyslogMessage.FIELDS, parsed.fields()):
+                if value is not None and field != 'message':
+                    entry[field] = value
+            # The header is in the fields; a repeat summary keeps its text
+            if not repeats:
+                entry['message'] = parsed.message
+        
+        if repeats:
+            entry['repeated'] = repeats
+            entry['last_repeat'] = round(getattr(record, 'last_repeat', record.created), 6)
+        
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        
+        return json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+
+
+class TeeHandler(logging.Handler):
+    """
+    Pass each record to several handlers.
+    
+    Lets a single asynchronous writer feed the text log and the
+    structured log from one queue.
+    """
+    
+    def __init__(self, handlers: List[logging.Handler]):
+        """
+        Initialize the handler.
+        
+        Args:
+            handlers: Handlers that receive every record
+        """
+        super().__init__()
+        self.handlers = handlers
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        for handler in self.handlers:
+            handler.handle(record)
+    
+    def flush(self) -> None:
+        for handler in self.handlers:
+            handler.flush()
+    
+    def close(self) -> None:
+        for handler in self.handlers:
+            handler.close()
+        super().close()
+
+
+# Routed streams are written to this directory under log_dir
+STREAM_DIR = 'streams'
+STREAM_SUFFIX = '.log'
+
+# Characters allowed in stream file names; others become '_'
+STREAM_NAME_CHARS = re.compile(r'[^A-Za-z0-9._-]')
+STREAM_NAME = re.compile(r'^[A-Za-z0-9_-][A-Za-z0-9._-]{0,127}$')
+
+# Placeholder in a stream name replaced by the record's source
+STREAM_SOURCE_FIELD = '{source}'
+
+ROUTE_KINDS = ('address', 'host', 'app', 'regex', 'any')
+
+# Resolved address rules remembered per sender address
+ROUTE_ADDRESS_CACHE_SIZE = 4096
+
+RouteRule = namedtuple('RouteRule', 'stream kind pattern')
+
+
+def parse_routes(config: configparser.ConfigParser) -> List[RouteRule]:
+    """
+    Parse the [routes] section into routing rules.
+    
+    Each key is a stream name, each value a match kind and its pattern:
+    
+        routers = address 10.0.0.0/24
+        firewall = app filterlog
+        web-{source} = host web*
+        auth = regex (?i)authentication failure
+    
+    Args:
+        config: Parsed configuration object
+        
+    Returns:
+        Rules in file order
+        
+    Raises:
+        ConfigError: If a stream name or rule is invalid
+    """
+    if not config.has_section('routes'):
+        return []
+    
+    rules = []
+    for stream in config.options('routes'):
+        if config.has_option(config.default_section, stream):
+            continue
+        value = config.get('routes', stream, raw=True).strip()
+        kind, pattern = (value.split(None, 1) + ['', ''])[:2]
+        
+        if not STREAM_NAME.match(stream.replace(STREAM_SOURCE_FIELD, 'x')):
+            raise ConfigError(f"Invalid stream name in [routes]: {stream}")
+        if kind not in ROUTE_KINDS:
+            raise ConfigError(
+                f"Invalid route for {stream}: {value} "
+                f"(expected one of: {', '.join(ROUTE_KINDS)})"
+            )
+        if kind != 'any' and not pattern:
+            raise ConfigError(f"Route for {stream} needs a pattern: {value}")
+        
+        try:
+            if kind == 'address':
+                pattern = ipaddress.ip_network(pattern, strict=False)
+            elif kind == 'host':
+                pattern = re.compile(fnmatch.translate(pattern), re.IGNORECASE)
+            elif kind == 'regex':
+                pattern = re.compile(pattern)
+        except (ValueError, re.error) as e:
+            raise ConfigError(f"Invalid route for {stream}: {value} ({e})")
+        
+        rules.append(RouteRule(stream, kind, pattern))
+    
+    return rules
+
+
+def stream_name(stream: str, record: logging.LogRecord) -> str:
+    """
+    Get the stream a rule sends a record to.
+    
+    Args:
+        stream: Stream name of the rule, possibly with {source}
+        record: The routed record
+        
+    Returns:
+        File-safe stream name
+    """
+    if STREAM_SOURCE_FIELD not in stream:
+        return stream
+    source = STREAM_NAME_CHARS.sub('_', str(getattr(record, 'source', '') or '_'))
+    return stream.replace(STREAM_SOURCE_FIELD, source.lstrip('.') or '_')[:128]
+
+
+def stream_log_dir(config: configparser.ConfigParser) -> Path:
+    """
+    Get the directory routed streams are written to.
+    
+    Args:
+        config: Parsed configuration object
+        
+    Returns:
+        The streams directory under log_dir
+    """
+    return Path(config['logging']['log_dir']).expanduser() / STREAM_DIR
+
+
+class RoutingHandler(logging.Handler):
+    """
+    Write records matching routing rules to separate stream files.
+    
+    The first matching rule picks the stream; records matching none go
+    to the main log only. Stream files rotate like the main log but
+    are kept smaller and are neither compressed nor indexed. At most
+    `max_open` stream files are open at once: the least recently
+    written one is flushed and closed to make room, so thousands of
+    senders don't exhaust file descriptors. One thread enforces the
+    write buffer and fsync time bounds of all open streams.
+    """
+    
+    def __init__(self, target: logging.Handler, rules: List[RouteRule], stream_dir: Path,
+                 open_stream, max_open: int = 64, keep_in_main: bool = True):
+        """
+        Initialize the handler.
+        
+        Args:
+            target: Handler writing the main log
+            rules: Rules from parse_routes()
+            stream_dir: Directory for the stream files
+            open_stream: Callable creating a LeuitFileHandler for a path
+            max_open: Most stream files kept open
+            keep_in_main: Also write routed records to the main log
+        """
+        super().__init__()
+        self.target = target
+        self.rules = rules
+        self.stream_dir = Path(stream_dir)
+        self.open_stream = open_stream
+        self.max_open = max(1, max_open)
+        self.keep_in_main = keep_in_main
+        
+        self._streams = OrderedDict()
+        self._address_routes = {}
+        self._stop = threading.Event()
+        # Set when a stream is opened, so its time bounds apply at once
+        self._wake = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_loop,
+            name='leuitlog-route-flush',
+            daemon=True
+        )
+        self._flusher.start()
+    
+    def route(self, record: logging.LogRecord) -> Optional[str]:
+        """
+        Find the stream of a record.
+        
+        Args:
+            record: Record to route
+            
+        Returns:
+            Stream name, or None if no rule matches
+        """
+        source = getattr(record, 'source', None)
+        addresses = None
+        message = None
+        
+        for index, rule in enumerate(self.rules):
+            kind = rule.kind
+            if kind == 'address':
+                if addresses is None:
+                    addresses = self._address_rules(getattr(record, 'address', None))
+                matched = index in addresses
+            elif kind == 'host':
+                # The name claimed in the syslog header, not a verified one
+                parsed = getattr(record, 'syslog', None)
+                host = parsed.hostname if parsed is not None else source
+                matched = host is not None and rule.pattern.match(host) is not None
+            elif kind == 'app':
+                parsed = getattr(record, 'syslog', None)
+                # Journal records carry their identifier as source
+                matched = (parsed.app_name if parsed is not None else source) == rule.pattern
+            elif kind == 'regex':
+                if message is None:
+                    message = record.getMessage()
+                matched = rule.pattern.search(message) is not None
+            else:
+                matched = True
+            
+            if matched:
+                return stream_name(rule.stream, record)
+        return None
+    
+    def _address_rules(self, address: Optional[str]) -> frozenset:
+        """Get the indexes of the address rules matching a sender, cached."""
+        if not address:
+            return frozenset()
+        matched = self._address_routes.get(address)
+        if matched is None:
+            try:
+                ip = ipaddress.ip_address(address)
+            except ValueError:
+                ip = None
+            matched = frozenset(
+                index for index, rule in enumerate(self.rules)
+                if rule.kind == 'address' and ip is not None and ip in rule.pattern
+            )
+            if len(self._address_routes) >= ROUTE_ADDRESS_CACHE_SIZE:
+                self._address_routes.clear()
+            self._address_routes[address] = matched
+        return matched
+    
+    def _stream_handler(self, stream: str) -> logging.Handler:
+        """Get the open handler of a stream, opening it if needed."""
+        handler = self._streams.get(stream)
+        if handler is not None:
+            self._streams.move_to_end(stream)
+            return handler
+        
+        while len(self._streams) >= self.max_open:
+            _, oldest = self._streams.popitem(last=False)
+            oldest.close()
+            metrics.add('route_streams_closed_total')
+        
+        self.stream_dir.mkdir(mode=0o750, exist_ok=True)
+        handler = self.open_stream(self.stream_dir / (stream + STREAM_SUFFIX))
+        self._streams[stream] = handler
+        self._wake.set()
+        metrics.set('route_streams_open', len(self._streams))
+        return handler
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        """Write a record to its stream and, if configured, the main log."""
+        stream = None
+        try:
+            stream = self.route(record)
+            if stream is not None:
+                self._stream_handler(stream).handle(record)
+                metrics.add('records_routed_total')
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+        
+        if stream is None or self.keep_in_main:
+            self.target.handle(record)
+    
+    def _flush_loop(self) -> None:
+        """Flush expired stream buffers until closed."""
+        timeout = 1.0
+        while True:
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            
+            timeout = 1.0
+            self.acquire()
+            try:
+                for handler in self._streams.values():
+                    due = handler.poll()
+                    if due is not None:
+                        timeout = min(timeout, due)
+            finally:
+                self.release()
+    
+    def flush(self) -> None:
+        """Flush the main log and all open streams."""
+        self.acquire()
+        try:
+            for handler in self._streams.values():
+                handler.flush()
+        finally:
+            self.release()
+        self.target.flush()
+    
+    def close(self) -> None:
+        """Close all streams and the main log handler."""
+        self._stop.set()
+        self._wake.set()
+        if self._flusher.is_alive():
+            self._flusher.join()
+        
+        self.acquire()
+        try:
+            while self._streams:
+                _, handler = self._streams.popitem(last=False)
+                handler.close()
+            metrics.set('route_streams_open', 0)
+        finally:
+            self.release()
+        
+        self.target.close()
+        super().close()
+
+
+def structured_log_path(config: configparser.ConfigParser) -> Optional[Path]:
+    """
+    Get the path of the structured (JSONL) log, if enabled.
+    
+    Args:
+        config: Parsed configuration object
+        
+    Returns:
+        Path next to the text log with a .jsonl suffix, or None
+    """
+    if config.get('logging', 'structured_log', fallback='none') != 'jsonl':
+        return None
+    
+    log_path = Path(config['logging']['log_dir']).expanduser() / config['logging']['log_file']
+    return log_path.with_suffix('.jsonl')
+
+
+def create_segment_handler(config: configparser.ConfigParser, log_path: Path,
+                           formatter: logging.Formatter,
+                           compressors: Optional[dict] = None) -> LeuitFileHandler:
+    """
+    Create a rotating handler, with its compressor, for one log file.
+    
+    Args:
+        config: Parsed configuration object
+        log_path: File to write
+        formatter: Formatter for the records
+        compressors: Running compressors by log path, from find_compressors();
+            the one for this file is reused, and removed from the
+            dictionary, if its settings are unchanged
+        
+    Returns:
+        Configured file handler; a new compressor is not started yet
+    """
+    max_size_mb = int(config['logging']['max_size_mb'])
+    backup_count = int(config['logging']['backup_count'])
+    
+    # Compress rotated backups off the write path
+    compressors = compressors if compressors is not None else {}
+    compressor = compressors.get(str(log_path))
+    codec = config.get('logging', 'compress', fallback='none')
+    frame_size = config.getint('logging', 'compress_frame_kb', fallback=1024) * 1024
+    if compressor and (codec != compressor.codec or backup_count != compressor.backup_count
+                       or max(4096, frame_size) != compressor.frame_size or backup_count <= 0):
+        # Left in the dictionary for create_log_handler() to stop
+        compressor = None
+    elif compressor:
+        del compressors[str(log_path)]
+    if codec != 'none' and backup_count > 0 and compressor is None:
+        compressor = SegmentCompressor(
+            log_path,
+            backup_count,
+            codec=codec,
+            frame_size=frame_size
+        )
+    
+    handler = LeuitFileHandler(
+        log_path,
+        maxBytes=max_size_mb * 1024 * 1024,
+        backupCount=backup_count,
+        encoding='utf-8',
+        compressor=compressor,
+        buffer_size=config.getint('logging', 'write_buffer_kb', fallback=256) * 1024,
+        flush_interval=config.getint('logging', 'flush_interval_ms', fallback=50) / 1000.0,
+        fsync=config.get('logging', 'fsync', fallback='never'),
+        fsync_interval=config.getfloat('logging', 'fsync_interval', fallback=1.0)
+    )
+    handler.setFormatter(formatter)
+    
+    # Set secure permissions on log file
+    if log_path.exists():
+        os.chmod(log_path, 0o640)
+    
+    return handler
+
+
+def create_stream_handler(config: configparser.ConfigParser,
+                          log_path: Path) -> LeuitFileHandler:
+    """
+    Create the handler of one routed stream file.
+    
+    Streams rotate at their own, smaller size and are not compressed.
+    Their buffers are flushed by the RoutingHandler, not by a thread
+    per stream.
+    
+    Args:
+        config: Parsed configuration object
+        log_path: Stream file to write
+        
+    Returns:
+        Configured file handler
+    """
+    handler = LeuitFileHandler(
+        log_path,
+        maxBytes=config.getint('routing', 'stream_max_size_mb', fallback=10) * 1024 * 1024,
+        backupCount=config.getint('routing', 'stream_backup_count', fallback=2),
+        encoding='utf-8',
+        buffer_size=config.getint('logging', 'write_buffer_kb', fallback=256) * 1024,
+        flush_interval=config.getint('logging', 'flush_interval_ms', fallback=50) / 1000.0,
+        fsync=config.get('logging', 'fsync', fallback='never'),
+        fsync_interval=config.getfloat('logging', 'fsync_interval', fallback=1.0),
+        flush_thread=False
+    )
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+    os.chmod(log_path, 0o640)
+    return handler
+
+
+def iter_file_handlers(handler: logging.Handler):
+    """
+    Iterate over the segment file handlers of a handler chain.
+    
+    Routed stream handlers are not included; they have no compressor.
+    
+    Args:
+        handler: Handler chain from create_log_handler()
+        
+    Yields:
+        LeuitFileHandler instances
+    """
+    if isinstance(handler, RoutingHandler):
+        yield from iter_file_handlers(handler.target)
+    elif isinstance(handler, TeeHandler):
+        for child in handler.handlers:
+            yield from iter_file_handlers(child)
+    elif isinstance(handler, LeuitFileHandler):
+        yield handler
+
+
+def find_compressors(handler: logging.Handler) -> dict:
+    """
+    Get the compressors of the file handlers of a handler chain.
+    
+    Args:
+        handler: Handler chain from create_log_handler()
+        
+    Returns:
+        Running compressors by log path, for create_log_handler()
+    """
+    return {
+        str(file_handler.compressor.log_path): file_handler.compressor
+        for file_handler in iter_file_handlers(handler)
+        if file_handler.compressor
+    }
+
+
+def take_compressors(handler: logging.Handler) -> None:
+    """
+    Detach the compressors from the file handlers of a handler chain.
+    
+    Called once a new chain has taken them over, so closing the old
+    chain does not stop them.
+    
+    Args:
+        handler: Handler chain from create_log_handler()
+    """
+    for file_handler in iter_file_handlers(handler):
+        file_handler.compressor = None
+
+
+def create_log_handler(config: configparser.ConfigParser,
+                       compressors: Optional[dict] = None) -> logging.Handler:
+    """
+    Create the handlers that format and write records to the log files.
+    
+    Args:
+        config: Parsed configuration object
+        compressors: Running compressors to reuse, from find_compressors();
+            once the chain is built, those left unused are stopped. If
+            building fails they are left running as they were.
+        
+    Returns:
+        Handler for the text log, the structured log and routed streams
+        
+    Raises:
+        OSError: If a log file or the log directory cannot be set up
+    """
+    log_dir = Path(config['logging']['log_dir']).expanduser()
+    log_file = config['logging']['log_file']
+    
+    # Create log directory if it doesn't exist
+    log_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Set secure permissions on log directory
+    os.chmod(log_dir, 0o750)
+    
+    log_path = log_dir / log_file
+    compressors = dict(compressors or {})
+    handler = None
+    
+    try:
+        # Create rotating file handler with consistent timestamp format
+        handler = create_segment_handler(
+            config,
+            log_path,
+            logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT),
+            compressors
+        )
+        
+        # Structured records for the Web UI, written alongside the text log
+        structured_path = structured_log_path(config)
+        if structured_path:
+            handler = TeeHandler([
+                handler,
+                create_segment_handler(config, structured_path, JsonLineFormatter(), compressors)
+            ])
+        
+        # Send matching records to their own stream files
+        routes = parse_routes(config)
+        if routes:
+            handler = RoutingHandler(
+                handler,
+                routes,
+                stream_log_dir(config),
+                lambda path: create_stream_handler(config, path),
+                max_open=config.getint('routing', 'max_open_files', fallback=64),
+                keep_in_main=config.getboolean('routing', 'keep_in_main_log', fallback=True)
+            )
+    except BaseException:
+        # Close what was opened; the compressors still belong to the caller
+        if handler is not None:
+            take_compressors(handler)
+            handler.close()
+        raise
+    
+    # Unused compressors stop before new ones start, so two compressors
+    # never work on the same segments
+    for compressor in compressors.values():
+        compressor.stop()
+    for compressor in find_compressors(handler).values():
+        compressor.start()
+    
+    return handler
+
+
+def configure_log_filters(logger: logging.Logger, config: configparser.ConfigParser) -> None:
+    """
+    Add, update or remove the source, statistics and duplicate filters.
+    
+    Filters that stay enabled keep their state, so statistics and
+    pending repeats survive a reload.
+    
+    Args:
+        logger: Logger instance
+        config: Parsed configuration object
+    """
+    # Count records per minute, source and level, including repeats
+    log_stats = get_log_stats(logger)
+    stats_path = stats_file_path(config)
+    retention = config.getfloat('service', 'stats_retention_hours', fallback=24) * 3600
+    if log_stats and stats_path:
+        log_stats.retention = retention
+    elif log_stats:
+        logger.removeFilter(log_stats)
+    elif stats_path:
+        log_stats = LogStats(retention=retention)
+        log_stats.load(stats_path)
+        # Statistics see records before duplicates are folded
+        logger.filters.insert(0, log_stats)
+    
+    # Fold floods of identical messages before they are queued
+    duplicate_filter = get_duplicate_filter(logger)
+    dedup_window = config.getfloat('logging', 'dedup_window', fallback=0)
+    max_repeats = config.getint('logging', 'dedup_max_repeats', fallback=1000)
+    if duplicate_filter and dedup_window > 0:
+        duplicate_filter.window = dedup_window
+        duplicate_filter.max_repeats = max(1, max_repeats)
+    elif duplicate_filter:
+        logger.removeFilter(duplicate_filter)
+        duplicate_filter.flush()
+    elif dedup_window > 0:
+        logger.addFilter(DuplicateFilter(
+            logger,
+            window=dedup_window,
+            max_repeats=max_repeats
+        ))
+    
+    # Name syslog records after their header's host, ahead of the
+    # filters that count and fold records by source
+    hostname_source = next(
+        (log_filter for log_filter in logger.filters if isinstance(log_filter, HostnameSource)),
+        None
+    )
+    if hostname_source:
+        logger.removeFilter(hostname_source)
+    if config.get('service', 'syslog_source', fallback='address') == 'hostname':
+        logger.filters.insert(0, hostname_source or HostnameSource())
+
+
+def setup_logging(config: configparser.ConfigParser) -> logging.Logger:
+    """
+    Set up the logging system with rotation.
+    
+    Args:
+        config: Parsed configuration object
+        
+    Returns:
+        Configured logger instance
+    """
+    # Create logger
+    logger = logging.getLogger('leuitlog')
+    # Syslog severity 7 is logged at DEBUG
+    logger.setLevel(logging.DEBUG)
+    
+    # Remove any existing handlers
+    close_logging(logger)
+    
+    handler = create_log_handler(config)
+    
+    # Decouple disk writes from ingest
+    if config.getboolean('logging', 'async_write', fallback=True):
+        handler = AsyncLogHandler(
+            handler,
+            max_queue=config.getint('logging', 'queue_size', fallback=10000),
+            overflow_policy=config.get('logging', 'overflow_policy', fallback='block')
+        )
+    
+    logger.addHandler(handler)
+    configure_log_filters(logger, config)
+    
+    return logger
+
+
+def reload_logging(logger: logging.Logger, config: configparser.ConfigParser) -> None:
+    """
+    Apply the logging settings of a re-read configuration in place.
+    
+    A new handler chain is built, which opens every log file again by
+    name, so files moved away by an external logrotate are replaced.
+    It is swapped in below the write queue, which keeps its records;
+    async_write, queue_size and overflow_policy only change on restart.
+    
+    Args:
+        logger: Logger from setup_logging()
+        config: Parsed configuration object
+    """
+    def build(previous: logging.Handler) -> logging.Handler:
+        handler = create_log_handler(config, find_compressors(previous))
+        # Only now do the compressors belong to the new chain
+        take_compressors(previous)
+        return handler
+    
+    queue_handler = next(
+        (handler for handler in logger.handlers if isinstance(handler, AsyncLogHandler)),
+        None
+    )
+    if queue_handler:
+        previous = [queue_handler.replace_target(build)]
+    else:
+        previous = list(logger.handlers)
+        for handler in previous:
+            handler.acquire()
+        try:
+            handler = create_log_handler(config, {
+                path: compressor
+                for old in previous
+                for path, compressor in find_compressors(old).items()
+            })
+            for old in previous:
+                take_compressors(old)
+            logger.addHandler(handler)
+            for old in previous:
+                logger.removeHandler(old)
+        finally:
+            for old in previous:
+                old.release()
+    
+    for handler in previous:
+        handler.close()
+    
+    configure_log_filters(logger, config)
+
+
+def close_logging(logger: logging.Logger) -> None:
+    """
+    Flush and close all handlers of a logger.
+    
+    Pending duplicate summaries and queued records are written
+    before the handlers are closed.
+    
+    Args:
+        logger: Logger instance to close
+    """
+    for log_filter in list(logger.filters):
+        if isinstance(log_filter, DuplicateFilter):
+            log_filter.flush()
+        logger.removeFilter(log_filter)
+    
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def get_write_stats(logger: logging.Logger) -> dict:
+    """
+    Get write pipeline counters for a logger.
+    
+    Args:
+        logger: Logger instance
+        
+    Returns:
+        Counters of the asynchronous writer, empty if writes are synchronous
+    """
+    for handler in logger.handlers:
+        if isinstance(handler, AsyncLogHandler):
+            return handler.stats()
+    return {}
+
+
+def write_pid_file(pid_file: str) -> None:
+    """
+    Write the current process ID to the PID file.
+    
+    Args:
+        pid_file: Path to the PID file
+    """
+    pid_path = Path(pid_file).expanduser()
+    pid_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    with open(pid_path, 'w') as f:
+        f.write(str(os.getpid()))
+    
+    os.chmod(pid_path, 0o644)
+
+
+def remove_pid_file(pid_file: str) -> None:
+    """
+    Remove the PID file on shutdown.
+    
+    Args:
+        pid_file: Path to the PID file
+    """
+    pid_path = Path(pid_file).expanduser()
+    if pid_path.exists():
+        pid_path.unlink()
+
+
+def signal_handler(signum: int, frame) -> None:
+    """
+    Handle shutdown signals gracefully.
+    
+    Args:
+        signum: Signal number
+        frame: Current stack frame
+    """
+    global shutdown_requested
+    shutdown_requested = True
+
+
+def reload_handler(signum: int, frame) -> None:
+    """
+    Handle SIGHUP by requesting a configuration reload.
+    
+    Args:
+        signum: Signal number
+        frame: Current stack frame
+    """
+    global reload_requested
+    reload_requested = True
+
+
+# Settings bound to sockets, processes or the write queue, which only
+# change when the daemon is restarted
+RESTART_ONLY_KEYS = (
+    ('service', 'pid_file'),
+    ('service', 'listen_port'),
+    ('service', 'bind_address'),
+    ('service', 'receive_buffer_kb'),
+    ('service', 'listen_sockets'),
+    ('service', 'receive_batch'),
+    ('service', 'ingest_processes'),
+    ('service', 'ingest_ring_kb'),
+    ('service', 'tcp_port'),
+    ('service', 'tcp_max_connections'),
+    ('service', 'tcp_max_message_kb'),
+    ('logging', 'async_write'),
+    ('logging', 'queue_size'),
+    ('logging', 'overflow_policy'),
+)
+
+
+def reload_config(config_path: Optional[str], config: configparser.ConfigParser,
+                  logger: logging.Logger) -> configparser.ConfigParser:
+    """
+    Re-read the configuration and apply the logging settings in place.
+    
+    The log files are reopened in any case, so this also serves an
+    external logrotate. Listening sockets, queued records and the
+    journal position are kept; changed RESTART_ONLY_KEYS are reported.
+    
+    Args:
+        config_path: Configuration file to re-read, or None to reopen only
+        config: Configuration in use
+        logger: Logger from setup_logging()
+        
+    Returns:
+        The new configuration, or the current one if the file is invalid
+    """
+    new_config = config
+    if config_path:
+        try:
+            new_config = load_config(config_path)
+        except ConfigError as e:
+            logger.error(
+                f"Configuration reload failed, keeping current settings: {e}",
+                extra={'source': 'leuitlog'}
+            )
+    
+    try:
+        reload_logging(logger, new_config)
+    except OSError as e:
+        logger.error(
+            f"Cannot reopen log files: {e}",
+            extra={'source': 'leuitlog'}
+        )
+        return config
+    
+    if new_config is config:
+        logger.info("Log files reopened", extra={'source': 'leuitlog'})
+        return config
+    
+    logger.info(
+        f"Configuration reloaded from {config_path}",
+        extra={'source': 'leuitlog'}
+    )
+    changed = [
+        f"{section}.{key}" for section, key in RESTART_ONLY_KEYS
+        if config.get(section, key, fallback=None) != new_config.get(section, key, fallback=None)
+    ]
+    if changed:
+        logger.warning(
+            f"Restart to apply: {', '.join(changed)}",
+            extra={'source': 'leuitlog'}
+        )
+    
+    return new_config
+
+
+def get_service_status(config: configparser.ConfigParser) -> dict:
+    """
+    Get the current service status.
+    
+    Args:
+        config: Configuration object
+        
+    Returns:
+        Dictionary with status information
+    """
+    pid_file = Path(config['service']['pid_file']).expanduser()
+    log_dir = Path(config['logging']['log_dir']).expanduser()
+    log_file = config['logging']['log_file']
+    log_path = log_dir / log_file
+    
+    status = {
+        'running': False,
+        'pid': None,
+        'log_file': str(log_path),
+        'log_size_bytes': 0,
+        'log_exists': log_path.exists(),
+        'timestamp': datetime.now().isoformat()
+    }
+    
+    if pid_file.exists():
+        try:
+            with open(pid_file, 'r') as f:
+                pid = int(f.read().strip())
+            # Check if process is actually running
+            os.kill(pid, 0)
+            status['running'] = True
+            status['pid'] = pid
+        except (ValueError, ProcessLookupError, PermissionError):
+            pass
+    
+    if log_path.exists():
+        status['log_size_bytes'] = log_path.stat().st_size
+    
+    return status
+
+
+def bind_listener_socket(sock: socket.socket, bind_address: str, port: int) -> None:
+    """
+    Bind a listener socket, turning failures into configuration errors.
+    
+    Args:
+        sock: Socket to bind; closed if binding fails
+        bind_address: Local address to bind to
+        port: Port to bind to
+    """
+    try:
+        sock.bind((bind_address, port))
+    except PermissionError:
+        sock.close()
+        raise ConfigError(
+            f"Cannot bind to port {port}. "
+            "Try using a port > 1024 or run with appropriate permissions."
+        )
+    except OSError as e:
+        sock.close()
+        raise ConfigError(
+            f"Cannot bind to {bind_address}:{port}: {e}"
+        )
+
+
+# Record level for each syslog severity (RFC 5424 section 6.2.1)
+SYSLOG_SEVERITY_LEVELS = (
+    logging.CRITICAL,   # 0 Emergency
+    logging.CRITICAL,   # 1 Alert
+    logging.CRITICAL,   # 2 Critical
+    logging.ERROR,      # 3 Error
+    logging.WARNING,    # 4 Warning
+    logging.INFO,       # 5 Notice
+    logging.INFO,       # 6 Informational
+    logging.DEBUG,      # 7 Debug
+)
+
+# PRI digits -> (facility, severity) for the 192 valid values, so PRI
+# is decoded with one dictionary lookup
+SYSLOG_PRIORITIES = {str(pri): (pri >> 3, pri & 7) for pri in range(192)}
+
+# RFC 3164 header after PRI: TIMESTAMP SP [HOSTNAME SP] [TAG[PID]:]
+# HOSTNAME is optional in practice; a token followed by ':' or '[' is
+# taken as the TAG
+SYSLOG_RFC3164_HEADER = re.compile(
+    r'((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) [ \d]\d \d\d:\d\d:\d\d) '
+    r'(?:([^\s:\[\]]+) (?=\S))?'
+    r'(?:([^\s:\[\]]{1,48})(?:\[([^\]\s]*)\])?:)?'
+)
+
+
+class SyslogMessage:
+    """
+    A received syslog message whose header is decoded on first use.
+    
+    PRI is decoded up front because the record level depends on it;
+    `text` is the message after PRI, which is what the text log shows.
+    The header is split into its fields only when one of them is first
+    read (by the structured log, a host or app route, or
+    syslog_source = hostname), so records that need none of them cost
+    no more than stripping PRI. Absent or NILVALUE fields are None.
+    """
+    
+    __slots__ = ('facility', 'severity', 'text', 'timestamp', 'hostname',
+                 'app_name', 'procid', 'msgid', 'message', '_decoded')
+    
+    # Decoded fields, in the order fields() returns them
+    FIELDS = ('facility', 'severity', 'timestamp', 'hostname', 'app_name',
+              'procid', 'msgid', 'message')
+    
+    def __init__(self, facility: Optional[int], severity: Optional[int], text: str):
+        """
+        Initialize the message.
+        
+        Args:
+            facility: Facility from PRI, or None
+            severity: Severity from PRI, or None
+            text: The message after PRI
+        """
+        self.facility = facility
+        self.severity = severity
+        self.text = text
+        self._decoded = False
+    
+    @classmethod
+    def from_fields(cls, text: str, fields: tuple) -> 'SyslogMessage':
+        """
+        Rebuild a message decoded elsewhere, e.g. in an ingest worker.
+        
+        Args:
+            text: The message after PRI
+            fields: Values from fields(), in FIELDS order
+            
+        Returns:
+            Decoded message
+        """
+        message = cls.__new__(cls)
+        message.text = text
+        message._decoded = True
+        for name, value in zip(cls.FIELDS, fields):
+            setattr(message, name, value)
+        return message
+    
+    def __getattr__(self, name: str):
+        """Decode the header when a field is first read."""
+        if name not in self.FIELDS or self._decoded:
+            raise AttributeError(name)
+        self._decode()
+        return getattr(self, name)
+    
+    def _decode(self) -> None:
+        """
+        Split the header after PRI into its fields.
+        
+        `message` keeps the "app[pid]: " prefix and any RFC 5424
+        STRUCTURED-DATA; text that doesn't look like either format is
+        kept whole.
+        """
+        text = self.text
+        timestamp = hostname = app_name = procid = msgid = None
+        
+        if text[:2] == '1 ':
+            # VERSION TIMESTAMP HOSTNAME APP-NAME PROCID MSGID SD-AND-MSG
+            parts = text.split(' ', 6)
+            if len(parts) == 7:
+                _, timestamp, hostname, app_name, procid, msgid, text = parts
+                if text[:2] == '- ' or text == '-':
+                    text = text[2:]
+                if '\ufeff' in text:
+                    text = text.replace('\ufeff', '', 1)
+                
+                if timestamp == '-':
+                    timestamp = None
+                if hostname == '-':
+                    hostname = None
+                if procid == '-':
+                    procid = None
+                if msgid == '-':
+                    msgid = None
+                if app_name == '-':
+                    app_name = None
+                elif procid:
+                    text = f"{app_name}[{procid}]: {text}"
+                else:
+                    text = f"{app_name}: {text}"
+        else:
+            match = SYSLOG_RFC3164_HEADER.match(text)
+            if match:
+                timestamp, hostname, app_name, procid = match.groups()
+                text = text[match.end(2) + 1:] if hostname else text[16:]
+        
+        self.timestamp = timestamp
+        self.hostname = hostname
+        self.app_name = app_name
+        self.procid = procid
+        self.msgid = msgid
+        self.message = text
+        self._decoded = True
+    
+    def fields(self) -> tuple:
+        """Get the decoded fields in FIELDS order."""
+        if not self._decoded:
+            self._decode()
+        return (self.facility, self.severity, self.timestamp, self.hostname,
+                self.app_name, self.procid, self.msgid, self.message)
+    
+    def __repr__(self) -> str:
+        return 'SyslogMessage(' + ', '.join(
+            f"{name}={value!r}" for name, value in zip(self.FIELDS, self.fields())
+        ) + ')'
+
+
+def parse_syslog(text: str) -> SyslogMessage:
+    """
+    Parse an RFC 5424 or RFC 3164 syslog message.
+    
+    Only PRI is decoded here, with the same find and slice the daemon
+    always used to strip it; the header fields are decoded on first
+    access.
+    
+    Args:
+        text: Decoded message with surrounding whitespace removed
+        
+    Returns:
+        Message with facility and severity set (None without PRI)
+    """
+    if text[:1] == '<':
+        end = text.find('>', 1, 5)
+        if end > 1:
+            pri = SYSLOG_PRIORITIES.get(text[1:end])
+            if pri is not None:
+                return SyslogMessage(pri[0], pri[1], text[end + 1:])
+    return SyslogMessage(None, None, text)
+
+
+def log_syslog_messages(logger: logging.Logger, batch: list,
+                        transport: str = 'udp') -> int:
+    """
+    Parse and log a batch of received syslog messages.
+    
+    Each record is logged at the level matching the syslog severity,
+    with the message after PRI as text and the sender's address as
+    source. The parsed message is attached to the record as 'syslog'
+    and the sender's address as 'address'.
+    
+    Args:
+        logger: Logger instance for recording messages
+        batch: List of (data, address) tuples
+        transport: Transport label for the ingest metrics
+        
+    Returns:
+        Number of messages logged
+    """
+    count = 0
+    size = 0
+    unparsed = 0
+    log = logger.log
+    levels = SYSLOG_SEVERITY_LEVELS
+    
+    for data, addr in batch:
+        size += len(data)
+        try:
+            parsed = parse_syslog(data.decode('utf-8', errors='replace').strip())
+            severity = parsed.severity
+            if severity is None:
+                unparsed += 1
+            
+            log(
+                logging.INFO if severity is None else levels[severity],
+                parsed.text,
+                extra={
+                    'source': addr[0],
+                    'address': addr[0],
+                    'syslog': parsed,
+                }
+            )
+            count += 1
+            
+        except Exception as e:
+            logger.error(
+                f"Error processing message: {e}",
+                extra={'source': 'leuitlog'}
+            )
+    
+    metrics.add('messages_received_total', len(batch), transport=transport)
+    metrics.add('bytes_received_total', size, transport=transport)
+    if unparsed:
+        metrics.add('parse_errors_total', unparsed, transport=transport)
+    
+    return count
+
+
+# Socket option reporting the kernel's per-socket drop counter
+# (Linux only; not exported by the socket module)
+SO_RXQ_OVFL = getattr(socket, 'SO_RXQ_OVFL', 40 if sys.platform.startswith('linux') else None)
+
+
+class SyslogListener:
+    """
+    Listen for syslog messages on UDP port.
+    
+    In the default mode a single non-blocking socket is drained from the
+    main loop. When more than one socket is configured, each socket is
+    bound with SO_REUSEPORT so the kernel spreads datagrams across them,
+    and every socket is drained by its own worker thread.
+    """
+    
+    # Largest datagram read from the socket; longer messages are truncated
+    MAX_DATAGRAM_SIZE = 8192
+    
+    def __init__(self, port: int, logger: logging.Logger,
+                 bind_address: str = '127.0.0.1',
+                 receive_buffer: int = 0,
+                 num_sockets: int = 1,
+                 batch_size: int = 64,
+                 reuse_port: bool = False):
+        """
+        Initialize the syslog listener.
+        
+        Args:
+            port: UDP port to listen on
+            logger: Logger instance for recording messages
+            bind_address: Local address to bind to
+            receive_buffer: SO_RCVBUF size in bytes (0 = kernel default)
+            num_sockets: Number of SO_REUSEPORT sockets (1 = no workers)
+            batch_size: Maximum datagrams received per batch
+            reuse_port: Set SO_REUSEPORT even on a single socket
+        """
+        self.port = port
+        self.logger = logger
+        self.bind_address = bind_address
+        self.receive_buffer = receive_buffer
+        self.num_sockets = max(1, num_sockets)
+        self.batch_size = max(1, batch_size)
+        self.reuse_port = reuse_port or self.num_sockets > 1
+        self.sockets = []
+        self._workers = []
+        self._stop_event = threading.Event()
+        # Kernel drop counters per socket fd, when SO_RXQ_OVFL works
+        self._kernel_drops = {}
+    
+    @property
+    def threaded(self) -> bool:
+        """Check if sockets are drained by worker threads."""
+        return self.num_sockets > 1
+    
+    def _create_socket(self) -> socket.socket:
+        """Create, tune and bind one UDP socket."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        
+        if self.reuse_port:
+            if not hasattr(socket, 'SO_REUSEPORT'):
+                sock.close()
+                raise ConfigError(
+                    "listen_sockets > 1 and ingest_processes require SO_REUSEPORT support"
+                )
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        
+        if self.receive_buffer > 0:
+            # The kernel caps this at net.core.rmem_max unless privileged
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF,
+                            self.receive_buffer)
+        
+        if SO_RXQ_OVFL is not None:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+                self._kernel_drops[sock.fileno()] = 0
+            except OSError:
+                pass
+        
+        sock.setblocking(False)
+        bind_listener_socket(sock, self.bind_address, self.port)
+        
+        return sock
+    
+    def open_sockets(self) -> None:
+        """Create and bind all sockets without draining them."""
+        try:
+            for _ in range(self.num_sockets):
+                self.sockets.append(self._create_socket())
+        except ConfigError:
+            self.stop()
+            raise
+    
+    def adopt_socket(self, sock: socket.socket) -> None:
+        """
+        Drain a socket bound by another process.
+        
+        Args:
+            sock: Bound, non-blocking UDP socket
+        """
+        self.sockets.append(sock)
+        if SO_RXQ_OVFL is not None:
+            try:
+                if sock.getsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL):
+                    self._kernel_drops[sock.fileno()] = 0
+            except OSError:
+                pass
+    
+    def start(self) -> None:
+        """Start listening for syslog messages."""
+        self._stop_event.clear()
+        self.open_sockets()
+        
+        if self.threaded:
+            for index, sock in enumerate(self.sockets):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    args=(sock,),
+                    name=f'leuitlog-udp-{index}',
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+    
+    def stop(self) -> None:
+        """Stop the listener, its workers and close the sockets."""
+        self._stop_event.set()
+        
+        for worker in self._workers:
+            worker.join(timeout=2.0)
+        self._workers = []
+        
+        for sock in self.sockets:
+            sock.close()
+        self.sockets = []
+        self._kernel_drops = {}
+    
+    def _worker_loop(self, sock: socket.socket) -> None:
+        """Drain one socket until the listener is stopped."""
+        while not self._stop_event.is_set():
+            try:
+                ready, _, _ = select.select([sock], [], [], 0.5)
+            except (OSError, ValueError):
+                # Socket closed underneath us during shutdown
+                break
+            if ready:
+                self.drain(sock)
+    
+    @property
+    def selectable_sockets(self) -> list:
+        """Sockets the main loop must drain (empty in threaded mode)."""
+        return [] if self.threaded else list(self.sockets)
+    
+    def process_messages(self, timeout: float = 1.0) -> int:
+        """
+        Process incoming syslog messages.
+        
+        Only sockets owned by the main loop are serviced here; in
+        threaded mode the workers drain their own sockets.
+        
+        Args:
+            timeout: Select timeout in seconds
+            
+        Returns:
+            Number of messages processed
+        """
+        if not self.sockets or self.threaded:
+            return 0
+        
+        count = 0
+        ready, _, _ = select.select(self.sockets, [], [], timeout)
+        
+        for sock in ready:
+            count += self.drain(sock)
+        
+        return count
+    
+    def drain(self, sock: socket.socket) -> int:
+        """
+        Read datagrams in batches until the socket would block.
+        
+        Args:
+            sock: Ready, non-blocking socket
+            
+        Returns:
+            Number of messages processed
+        """
+        count = 0
+        batch = []
+        recvfrom = sock.recvfrom
+        recvmsg = sock.recvmsg
+        size = self.MAX_DATAGRAM_SIZE
+        limit = self.batch_size
+        drained = False
+        
+        # SO_RXQ_OVFL reports the socket's cumulative drop counter, so
+        # sampling it on the first datagram of each pass is enough and
+        # the rest use the cheaper recvfrom()
+        sample_drops = sock.fileno() in self._kernel_drops
+        
+        while not drained:
+            try:
+                if sample_drops:
+                    sample_drops = False
+                    data, ancillary, _, addr = recvmsg(size, socket.CMSG_SPACE(4))
+                    if ancillary:
+                        self._update_kernel_drops(sock, ancillary)
+                    batch.append((data, addr))
+                while len(batch) < limit:
+                    batch.append(recvfrom(size))
+            except BlockingIOError:
+                drained = True
+            except OSError as e:
+                self.logger.error(
+                    f"Error receiving message: {e}",
+                    extra={'source': 'leuitlog'}
+                )
+                drained = True
+            
+            count += self._handle_batch(batch)
+            batch.clear()
+        
+        return count
+    
+    def _update_kernel_drops(self, sock: socket.socket, ancillary: list) -> None:
+        """Record the SO_RXQ_OVFL counter from a datagram's ancillary data."""
+        for level, kind, data in ancillary:
+            if level == socket.SOL_SOCKET and kind == SO_RXQ_OVFL and len(data) >= 4:
+                self._kernel_drops[sock.fileno()] = struct.unpack('I', data[:4])[0]
+        metrics.set('kernel_drops_total', sum(self._kernel_drops.values()), transport='udp')
+    
+    def _handle_batch(self, batch: list) -> int:
+        """
+        Decode and log a batch of received datagrams.
+        
+        Args:
+            batch: List of (data, address) tuples
+            
+        Returns:
+            Number of messages logged
+        """
+        return log_syslog_messages(self.logger, batch)
+
+
+# Kinds of entries ingest workers publish to their ring
+INGEST_RECORD = 0
+INGEST_METRICS = 1
+
+# Seconds between two counter updates from each ingest worker
+INGEST_METRICS_INTERVAL = 1.0
+
+
+class RecordRing:
+    """
+    Single-producer, single-consumer queue of byte records in shared memory.
+    
+    The segment starts with the producer's head, the consumer's tail
+    (both running byte counts) and the capacity, followed by the data
+    area. A record is a 32-bit length and its payload; a record that
+    would cross the end of the data area starts over at offset 0
+    after a WRAP marker. Head and tail are exchanged under a shared
+    lock, which also orders the payload writes before the head update;
+    payloads themselves are copied without holding it. A process killed
+    while holding the lock never releases it, so waiting for it times
+    out with TimeoutError instead of blocking forever.
+    """
+    
+    # Seconds to wait for the shared lock before giving up
+    LOCK_TIMEOUT = 0.5
+    
+    POSITION = struct.Struct('<Q')
+    HEAD_OFFSET = 0
+    TAIL_OFFSET = 8
+    CAPACITY_OFFSET = 16
+    HEADER_SIZE = 64
+    
+    LENGTH = struct.Struct('<I')
+    WRAP = 0xFFFFFFFF
+    
+    def __init__(self, capacity: int = 4 * 1024 * 1024, name: Optional[str] = None,
+                 lock=None):
+        """
+        Create a ring, or attach to an existing one by name.
+        
+        Args:
+            capacity: Data bytes of a new ring
+            name: Shared memory name of an existing ring
+            lock: Lock shared by producer and consumer (created if None)
+        """
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.HEADER_SIZE + capacity)
+            buf = self.shm.buf
+            self.POSITION.pack_into(buf, self.HEAD_OFFSET, 0)
+            self.POSITION.pack_into(buf, self.TAIL_OFFSET, 0)
+            self.POSITION.pack_into(buf, self.CAPACITY_OFFSET, capacity)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        
+        self.name = self.shm.name
+        self.lock = lock if lock is not None else multiprocessing.Lock()
+        self.capacity = self.POSITION.unpack_from(self.shm.buf, self.CAPACITY_OFFSET)[0]
+        self._data = self.shm.buf[self.HEADER_SIZE:self.HEADER_SIZE + self.capacity]
+        self._tail = self.POSITION.unpack_from(self.shm.buf, self.TAIL_OFFSET)[0]
+    
+    @contextmanager
+    def _locked(self):
+        """
+        Hold the shared lock.
+        
+        Raises:
+            TimeoutError: If the lock is not released within LOCK_TIMEOUT
+        """
+        if not self.lock.acquire(timeout=self.LOCK_TIMEOUT):
+            raise TimeoutError(f"Lock of ring {self.name} not released")
+        try:
+            yield
+        finally:
+            self.lock.release()
+    
+    def put(self, records: list) -> Tuple[int, bool]:
+        """
+        Append records as far as they fit.
+        
+        Args:
+            records: Payloads (bytes), each well under the capacity
+            
+        Returns:
+            Number of records written, and whether the consumer had
+            caught up before them (and may need a wakeup)
+            
+        Raises:
+            TimeoutError: If the shared lock is held by a dead process
+        """
+        buf = self.shm.buf
+        with self._locked():
+            head = self.POSITION.unpack_from(buf, self.HEAD_OFFSET)[0]
+            tail = self.POSITION.unpack_from(buf, self.TAIL_OFFSET)[0]
+        
+        data = self._data
+        capacity = self.capacity
+        free = capacity - (head - tail)
+        new_head = head
+        written = 0
+        
+        for payload in records:
+            pos = new_head % capacity
+            need = 4 + len(payload)
+            room = capacity - pos
+            skip = room if room < need else 0
+            if skip + need > free:
+                break
+            if skip:
+                if room >= 4:
+                    self.LENGTH.pack_into(data, pos, self.WRAP)
+                new_head += skip
+                free -= skip
+                pos = 0
+            self.LENGTH.pack_into(data, pos, len(payload))
+            data[pos + 4:pos + need] = payload
+            new_head += need
+            free -= need
+            written += 1
+        
+        if not written:
+            return 0, False
+        
+        with self._locked():
+            tail = self.POSITION.unpack_from(buf, self.TAIL_OFFSET)[0]
+            self.POSITION.pack_into(buf, self.HEAD_OFFSET, new_head)
+        return written, tail == head
+    
+    def get(self, max_records: int) -> Tuple[list, bool]:
+        """
+        Remove up to `max_records` records.
+        
+        Args:
+            max_records: Maximum number of records returned
+            
+        Returns:
+            List of payloads, and whether more records are waiting
+            
+        Raises:
+            TimeoutError: If the shared lock is held by a dead process
+        """
+        buf = self.shm.buf
+        with self._locked():
+            head = self.POSITION.unpack_from(buf, self.HEAD_OFFSET)[0]
+        
+        data = self._data
+        capacity = self.capacity
+        tail = self._tail
+        records = []
+        
+        while tail < head and len(records) < max_records:
+            pos = tail % capacity
+            room = capacity - pos
+            if room < 4:
+                tail += room
+                continue
+            length = self.LENGTH.unpack_from(data, pos)[0]
+            if length == self.WRAP:
+                tail += room
+                continue
+            records.append(bytes(data[pos + 4:pos + 4 + length]))
+            tail += 4 + length
+        
+        # Publishing the tail and reading the head together means a
+        # producer either sees the caught-up tail or we see its records
+        with self._locked():
+            self.POSITION.pack_into(buf, self.TAIL_OFFSET, tail)
+            head = self.POSITION.unpack_from(buf, self.HEAD_OFFSET)[0]
+        self._tail = tail
+        
+        return records, head != tail
+    
+    def close(self) -> None:
+        """Detach from the ring, and remove it if this process created it."""
+        self._data.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class RingHandler(logging.Handler):
+    """
+    Encode records compactly and publish them to a RecordRing in batches.
+    
+    Used by ingest worker processes: each record becomes a marshalled
+    tuple of its time, level, message, source, sender address and
+    parsed syslog fields. When the ring is full, publishing waits for
+    the writer, so back pressure ends up in the socket's receive buffer.
+    """
+    
+    # Records encoded before they are published
+    BATCH_SIZE = 64
+    
+    def __init__(self, ring: RecordRing, wakeup_fd: int):
+        """
+        Initialize the handler.
+        
+        Args:
+            ring: Ring to publish to
+            wakeup_fd: Non-blocking pipe written when the writer may be idle
+        """
+        super().__init__()
+        self.ring = ring
+        self.wakeup_fd = wakeup_fd
+        self.dropped = 0
+        self._pending = []
+        # Records longer than this could never fit next to a wrap
+        self._max_size = ring.capacity // 2
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        """Encode a record for the writer process."""
+        parsed = getattr(record, 'syslog', None)
+        payload = marshal.dumps((
+            INGEST_RECORD,
+            record.created,
+            record.levelno,
+            record.getMessage(),
+            getattr(record, 'source', ''),
+            getattr(record, 'address', None),
+            parsed.fields() if parsed is not None else None
+        ))
+        if len(payload) > self._max_size:
+            self.dropped += 1
+            return
+        
+        self._pending.append(payload)
+        if len(self._pending) >= self.BATCH_SIZE:
+            self.flush()
+    
+    def publish_metrics(self) -> None:
+        """Queue this process's cumulative counters for the writer."""
+        values = [
+            (value['name'], tuple(sorted(value['labels'].items())), value['value'])
+            for value in metrics.snapshot()['values']
+        ]
+        self._pending.append(marshal.dumps((INGEST_METRICS, values)))
+    
+    def flush(self) -> None:
+        """Publish encoded records, waiting while the ring is full."""
+        pending = self._pending
+        while pending:
+            written, wake = self.ring.put(pending)
+            if wake:
+                try:
+                    os.write(self.wakeup_fd, b'\0')
+                except (BlockingIOError, BrokenPipeError):
+                    pass
+            del pending[:written]
+            if pending:
+                time.sleep(0.001)
+
+
+def run_ingest_worker(index: int, sock: socket.socket, ring_name: str, ring_lock,
+                      wakeup, stop_event, batch_size: int, parent_pid: int) -> None:
+    """
+    Receive and parse syslog datagrams in an ingest worker process.
+    
+    Runs the normal UDP drain and parse path with a logger whose only
+    handler publishes to the worker's ring; the daemon process logs
+    the records. Exits when the supervisor sets `stop_event`, on
+    SIGTERM, or when the daemon process is gone.
+    
+    Args:
+        index: Worker number, for the process title in logs
+        sock: Bound UDP socket owned by this worker
+        ring_name: Shared memory name of the worker's ring
+        ring_lock: Lock shared with the daemon for the ring
+        wakeup: Write end of the pipe that wakes the daemon
+        stop_event: Event set by the supervisor to stop all workers
+        batch_size: Maximum datagrams received per batch
+        parent_pid: PID of the supervising daemon process
+    """
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    
+    ring = RecordRing(name=ring_name, lock=ring_lock)
+    wakeup_fd = wakeup.fileno()
+    os.set_blocking(wakeup_fd, False)
+    handler = RingHandler(ring, wakeup_fd)
+    
+    logger = logging.getLogger(f'leuitlog.ingest{index}')
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    
+    listener = SyslogListener(0, logger, batch_size=batch_size)
+    listener.adopt_socket(sock)
+    next_metrics = 0.0
+    
+    try:
+        while not stop_event.is_set() and not stopping.is_set():
+            if os.getppid() != parent_pid:
+                break
+            
+            try:
+                ready, _, _ = select.select([sock], [], [], 0.5)
+            except InterruptedError:
+                continue
+            if ready:
+                listener.drain(sock)
+            
+            now = time.monotonic()
+            if now >= next_metrics:
+                next_metrics = now + INGEST_METRICS_INTERVAL
+                handler.publish_metrics()
+            handler.flush()
+    finally:
+        handler.publish_metrics()
+        handler.flush()
+        ring.close()
+
+
+class IngestWorkers:
+    """
+    Supervise ingest worker processes and log what they receive.
+    
+    The daemon process binds one SO_REUSEPORT socket per worker and
+    hands it to a spawned process, which receives and parses datagrams
+    and publishes compact records to its own shared-memory ring. The
+    daemon process stays the single writer: it drains the rings into
+    its logger, so filters, statistics and the file handlers work as
+    in single-process mode. Workers that exit are restarted with the
+    same socket and a new ring and lock, since a killed worker may have
+    died holding the old lock.
+    """
+    
+    # Ring entries logged per worker per main loop pass
+    MAX_RECORDS_PER_PASS = 4096
+    
+    # Seconds between two liveness checks of the workers
+    CHECK_INTERVAL = 1.0
+    
+    # Seconds the workers get to exit before they are terminated
+    STOP_TIMEOUT = 5.0
+    
+    def __init__(self, count: int, port: int, logger: logging.Logger,
+                 bind_address: str = '127.0.0.1', receive_buffer: int = 0,
+                 batch_size: int = 64, ring_size: int = 4 * 1024 * 1024):
+        """
+        Initialize the worker group.
+        
+        Args:
+            count: Number of worker processes
+            port: UDP port to listen on
+            logger: Logger the received records are written to
+            bind_address: Local address to bind to
+            receive_buffer: SO_RCVBUF size in bytes (0 = kernel default)
+            batch_size: Maximum datagrams received per batch
+            ring_size: Bytes of each worker's ring
+        """
+        self.count = max(1, count)
+        self.port = port
+        self.logger = logger
+        self.bind_address = bind_address
+        self.batch_size = batch_size
+        self.ring_size = ring_size
+        # Binds and tunes the sockets; never drained in this process
+        self.listener = SyslogListener(
+            port, logger,
+            bind_address=bind_address,
+            receive_buffer=receive_buffer,
+            num_sockets=self.count,
+            reuse_port=True
+        )
+        
+        self._context = multiprocessing.get_context('spawn')
+        self._stop_event = self._context.Event()
+        self.rings = []
+        self.processes = []
+        self._wakeup_readers = []
+        self._wakeup_writers = []
+        self._worker_metrics = []
+        self._next_check = 0.0
+    
+    @property
+    def selectable(self) -> list:
+        """Pipes that become readable when a worker published records."""
+        return list(self._wakeup_readers)
+    
+    def start(self) -> None:
+        """Bind the sockets and start the workers."""
+        self.listener.open_sockets()
+        
+        for index in range(self.count):
+            self.rings.append(RecordRing(self.ring_size, lock=self._context.Lock()))
+            reader, writer = self._context.Pipe(duplex=False)
+            os.set_blocking(reader.fileno(), False)
+            self._wakeup_readers.append(reader)
+            self._wakeup_writers.append(writer)
+            self._worker_metrics.append({})
+            self.processes.append(None)
+            self._start_worker(index)
+        
+        self._next_check = time.monotonic() + self.CHECK_INTERVAL
+    
+    def _start_worker(self, index: int) -> None:
+        """Spawn the process for one worker slot."""
+        ring = self.rings[index]
+        process = self._context.Process(
+            target=run_ingest_worker,
+            args=(
+                index, self.listener.sockets[index], ring.name, ring.lock,
+                self._wakeup_writers[index], self._stop_event,
+                self.batch_size, os.getpid()
+            ),
+            name=f'leuitlog-ingest-{index}',
+            daemon=True
+        )
+        process.start()
+        self.processes[index] = process
+    
+    def check(self) -> None:
+        """Restart workers that exited. Cheap to call on every pass."""
+        now = time.monotonic()
+        if now < self._next_check or self._stop_event.is_set():
+            return
+        self._next_check = now + self.CHECK_INTERVAL
+        
+        for index, process in enumerate(self.processes):
+            if process is not None and not process.is_alive():
+                self._restart_worker(index)
+    
+    def _restart_worker(self, index: int) -> None:
+        """
+        Replace a worker that exited, with a new ring and lock.
+        
+        Records the worker published before it died are logged first;
+        with the producer gone the old ring is read under a fresh lock.
+        """
+        process = self.processes[index]
+        self.logger.error(
+            f"Ingest worker {index} exited with code {process.exitcode}, restarting",
+            extra={'source': 'leuitlog'}
+        )
+        process.close()
+        self.processes[index] = None
+        
+        ring = self.rings[index]
+        ring.lock = self._context.Lock()
+        while True:
+            records, more = ring.get(self.MAX_RECORDS_PER_PASS)
+            if records:
+                self._log_records(index, records)
+            if not more:
+                break
+        ring.close()
+        
+        self.rings[index] = RecordRing(self.ring_size, lock=self._context.Lock())
+        self._start_worker(index)
+    
+    def drain(self, ready: Optional[list] = None) -> bool:
+        """
+        Log the records waiting in all rings.
+        
+        Args:
+            ready: Wakeup pipes reported readable by the main loop
+            
+        Returns:
+            True if records remain after the per-pass limit
+        """
+        for reader in ready or ():
+            try:
+                os.read(reader.fileno(), 4096)
+            except BlockingIOError:
+                pass
+        
+        pending = False
+        for index, ring in enumerate(self.rings):
+            try:
+                records, more = ring.get(self.MAX_RECORDS_PER_PASS)
+            except TimeoutError:
+                # The worker died holding the lock, or is stuck with it
+                process = self.processes[index]
+                if (process is not None and not process.is_alive()
+                        and not self._stop_event.is_set()):
+                    self._restart_worker(index)
+                continue
+            if records:
+                self._log_records(index, records)
+            pending = pending or more
+        return pending
+    
+    def _log_records(self, index: int, records: list) -> None:
+        """Turn one worker's ring entries back into log records."""
+        name = self.logger.name
+        handle = self.logger.handle
+        level_names = logging.getLevelName
+        
+        for payload in records:
+            entry = marshal.loads(payload)
+            if entry[0] == INGEST_METRICS:
+                self._merge_metrics(index, entry[1])
+                continue
+            
+            _, created, levelno, message, source, address, parsed = entry
+            fields = {
+                'name': name,
+                'levelno': levelno,
+                'levelname': level_names(levelno),
+                'msg': message,
+                'created': created,
+                'msecs': (created - int(created)) * 1000,
+                'source': source,
+            }
+            if parsed is not None:
+                fields['address'] = address
+                fields['syslog'] = SyslogMessage.from_fields(message, parsed)
+            handle(logging.makeLogRecord(fields))
+    
+    def _merge_metrics(self, index: int, values: list) -> None:
+        """Publish the sum of the workers' cumulative counters."""
+        worker_values = self._worker_metrics[index]
+        for name, labels, value in values:
+            worker_values[(name, labels)] = value
+        
+        for name, labels, _ in values:
+            total = sum(
+                worker.get((name, labels), 0)
+                for worker in self._worker_metrics
+            )
+            metrics.set(name, total, **dict(labels))
+    
+    def process_messages(self, timeout: float = 1.0) -> bool:
+        """
+        Wait for records and log them, for callers without a main loop.
+        
+        Args:
+            timeout: Select timeout in seconds
+            
+        Returns:
+            True if records remain after the per-pass limit
+        """
+        ready, _, _ = select.select(self._wakeup_readers, [], [], timeout)
+        self.check()
+        return self.drain(ready)
+    
+    def stop(self) -> None:
+        """Stop the workers, log their remaining records and clean up."""
+        self._stop_event.set()
+        
+        # Keep draining so workers blocked on a full ring can finish
+        deadline = time.monotonic() + self.STOP_TIMEOUT
+        for process in self.processes:
+            while process is not None and process.is_alive() and time.monotonic() < deadline:
+                self.drain()
+                process.join(0.05)
+        
+        for process in self.processes:
+            if process is not None:
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+                process.close()
+        self.processes = []
+        
+        # No producer is left; a lock a killed worker held is replaced
+        for ring in self.rings:
+            ring.lock = self._context.Lock()
+        while self.drain():
+            pass
+        
+        for ring in self.rings:
+            ring.close()
+        self.rings = []
+        for connection in self._wakeup_readers + self._wakeup_writers:
+            connection.close()
+        self._wakeup_readers = []
+        self._wakeup_writers = []
+        self.listener.stop()
+
+
+class TcpSyslogProtocol(asyncio.Protocol):
+    """
+    One TCP syslog connection with RFC 6587 framing.
+    
+    Each frame is either octet-counted ("<length> <message>") or
+    terminated by LF; the first byte of the frame tells them apart,
+    since a syslog message starts with '<' and a length with a digit.
+    Frames longer than the listener's limit are truncated. Complete
+    frames wait in 'pending' until the listener has room for them in the
+    write queue.
+    """
+    
+    # Longest accepted length prefix, in digits
+    MAX_LENGTH_DIGITS = 10
+    
+    def __init__(self, listener: 'TcpSyslogListener'):
+        """
+        Initialize the connection state.
+        
+        Args:
+            listener: Listener that owns the connection
+        """
+        self.listener = listener
+        self.transport = None
+        self.peer = ('unknown', 0)
+        self.buffer = bytearray()
+        # Complete frames not yet logged, as (data, peer) tuples
+        self.pending = deque()
+        # Bytes still to skip of a truncated octet-counted frame
+        self.discard = 0
+        # Skipping the rest of a truncated LF-terminated frame
+        self.skip_line = False
+    
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        """Register the connection, or refuse it above the limit."""
+        self.transport = transport
+        self.peer = transport.get_extra_info('peername') or self.peer
+        
+        if not self.listener.register(self):
+            transport.abort()
+    
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        """Queue a final unterminated frame and unregister."""
+        if self.buffer and not self.discard and not self.skip_line:
+            if not self.buffer[:1].isdigit():
+                self.pending.append((bytes(self.buffer), self.peer))
+        self.buffer.clear()
+        self.listener.unregister(self)
+        if self.pending:
+            self.listener.deliver(self)
+    
+    def data_received(self, data: bytes) -> None:
+        """
+        Split received bytes into frames and hand them to the listener.
+        
+        Frames that do not fit in the write queue stay pending and the
+        listener pauses reading from this connection until the queue
+        drains, so the kernel buffers fill and TCP flow control slows
+        the sender down; the event loop itself never waits.
+        """
+        self.buffer += data
+        
+        try:
+            self._split_frames(self.pending)
+        except ValueError as e:
+            self.listener.logger.warning(
+                f"Closing TCP connection from {self.peer[0]}: {e}",
+                extra={'source': 'leuitlog'}
+            )
+            self.buffer.clear()
+            self.transport.abort()
+        
+        if self.pending:
+            self.listener.deliver(self)
+    
+    def _split_frames(self, frames: list) -> None:
+        """
+        Move all complete frames from the buffer to a queue.
+        
+        Args:
+            frames: Deque or list receiving (data, peer) tuples
+            
+        Raises:
+            ValueError: If an octet-counting prefix is malformed
+        """
+        buf = self.buffer
+        size = len(buf)
+        limit = self.listener.max_message_size
+        peer = self.peer
+        pos = 0
+        
+        while pos < size:
+            if self.discard:
+                step = min(self.discard, size - pos)
+                self.discard -= step
+                pos += step
+                continue
+            
+            if self.skip_line:
+                end = buf.find(b'\n', pos)
+                if end == -1:
+                    pos = size
+                    break
+                self.skip_line = False
+                pos = end + 1
+                continue
+            
+            if 48 <= buf[pos] <= 57:
+                # Octet counting: MSG-LEN SP SYSLOG-MSG
+                space = buf.find(b' ', pos, pos + self.MAX_LENGTH_DIGITS + 1)
+                if space == -1:
+                    if size - pos > self.MAX_LENGTH_DIGITS:
+                        raise ValueError("invalid octet-counting frame length")
+                    break
+                prefix = bytes(buf[pos:space])
+                if not prefix.isdigit():
+                    raise ValueError("invalid octet-counting frame length")
+                
+                length = int(prefix)
+                start = space + 1
+                take = min(length, limit)
+                if size < start + take:
+                    break
+                frames.append((bytes(buf[start:start + take]), peer))
+                self.discard = length - take
+                pos = start + take
+            else:
+                # Non-transparent framing: SYSLOG-MSG LF
+                end = buf.find(b'\n', pos, pos + limit + 1)
+                if end == -1:
+                    if size - pos <= limit:
+                        break
+                    frames.append((bytes(buf[pos:pos + limit]), peer))
+                    self.skip_line = True
+                    pos += limit
+                    continue
+                if end > pos:
+                    frames.append((bytes(buf[pos:end]), peer))
+                pos = end + 1
+        
+        del buf[:pos]
+
+
+class TcpSyslogListener:
+    """
+    Listen for syslog messages on a TCP port.
+    
+    Connections are served by an asyncio event loop running in its
+    own thread, so hundreds of senders cost one thread in total.
+    Messages go to the same logger as the UDP listener. With an
+    asynchronous write queue, a connection whose frames do not fit in
+    the queue stops being read until the queue is half empty again;
+    TCP messages are never dropped by the overflow policy.
+    """
+    
+    # Seconds between two write queue checks while connections are paused
+    RESUME_INTERVAL = 0.01
+    
+    def __init__(self, port: int, logger: logging.Logger,
+                 bind_address: str = '127.0.0.1',
+                 max_connections: int = 512,
+                 max_message_size: int = 65536):
+        """
+        Initialize the TCP syslog listener.
+        
+        Args:
+            port: TCP port to listen on
+            logger: Logger instance for recording messages
+            bind_address: Local address to bind to
+            max_connections: Concurrent connections before new ones are refused
+            max_message_size: Longest message in bytes; longer ones are truncated
+        """
+        self.port = port
+        self.logger = logger
+        self.bind_address = bind_address
+        self.max_connections = max(1, max_connections)
+        self.max_message_size = max(1, max_message_size)
+        self.connections = set()
+        # Connections with pending frames, in the order they stalled
+        self.paused = OrderedDict()
+        self.refused = 0
+        self.received = 0
+        # Write queue that paces the connections (None: synchronous writes)
+        self.queue = next(
+            (handler for handler in logger.handlers if isinstance(handler, AsyncLogHandler)),
+            None
+        )
+        self._resume_timer = None
+        self._limit_warned = False
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._error = None
+        self._ready = threading.Event()
+    
+    def _create_socket(self) -> socket.socket:
+        """Create and bind the listening socket."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setblocking(False)
+        bind_listener_socket(sock, self.bind_address, self.port)
+        
+        return sock
+    
+    def start(self) -> None:
+        """Bind the port and start the event loop thread."""
+        sock = self._create_socket()
+        
+        self._loop = asyncio.new_event_loop()
+        self._ready.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(sock,),
+            name='leuitlog-tcp',
+            daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+        
+        if self._error:
+            self._thread = None
+            raise ConfigError(
+                f"Cannot listen on {self.bind_address}:{self.port}: {self._error}"
+            )
+    
+    def stop(self) -> None:
+        """Close all connections and stop the event loop thread."""
+        if self._thread is None:
+            return
+        
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2.0)
+        self._thread = None
+    
+    def _run(self, sock: socket.socket) -> None:
+        """Serve connections until stop() is called."""
+        loop = self._loop
+        asyncio.set_event_loop(loop)
+        
+        try:
+            self._server = loop.run_until_complete(loop.create_server(
+                lambda: TcpSyslogProtocol(self),
+                sock=sock,
+                backlog=min(self.max_connections, socket.SOMAXCONN)
+            ))
+        except OSError as e:
+            self._error = e
+            sock.close()
+            loop.close()
+            return
+        finally:
+            self._ready.set()
+        
+        if self.queue is not None:
+            self.queue.allow_overfill(threading.get_ident())
+        
+        try:
+            loop.run_forever()
+        finally:
+            self._server.close()
+            for connection in list(self.connections):
+                connection.transport.close()
+            loop.run_until_complete(self._server.wait_closed())
+            # Let connection_lost() callbacks run
+            loop.run_until_complete(asyncio.sleep(0))
+            # Frames still waiting for queue room are logged on the way out
+            for connection in self.paused:
+                self.handle(list(connection.pending))
+                connection.pending.clear()
+            self.paused.clear()
+            if self._resume_timer is not None:
+                self._resume_timer.cancel()
+                self._resume_timer = None
+            if self.queue is not None:
+                self.queue.allow_overfill(threading.get_ident(), False)
+            loop.close()
+    
+    def register(self, connection: TcpSyslogProtocol) -> bool:
+        """
+        Track a new connection.
+        
+        Returns:
+            False if the connection limit is reached
+        """
+        if len(self.connections) >= self.max_connections:
+            self.refused += 1
+            if not self._limit_warned:
+                self._limit_warned = True
+                self.logger.warning(
+                    f"TCP connection limit ({self.max_connections}) reached, "
+                    "refusing new connections",
+                    extra={'source': 'leuitlog'}
+                )
+            return False
+        
+        self.connections.add(connection)
+        return True
+    
+    def unregister(self, connection: TcpSyslogProtocol) -> None:
+        """Forget a closed connection."""
+        self.connections.discard(connection)
+        if len(self.connections) < self.max_connections:
+            self._limit_warned = False
+    
+    def handle(self, frames: list) -> int:
+        """
+        Log a batch of received frames.
+        
+        Args:
+            frames: List of (data, peer address) tuples
+            
+        Returns:
+            Number of messages logged
+        """
+        count = log_syslog_messages(self.logger, frames, transport='tcp')
+        self.received += count
+        return count
+    
+    def deliver(self, connection: TcpSyslogProtocol) -> None:
+        """
+        Log a connection's pending frames as far as the write queue allows.
+        
+        Frames that do not fit stay pending, and the connection stops
+        being read until resume() has logged them all. Connections that
+        stalled earlier go first, so a busy sender cannot starve them.
+        
+        Args:
+            connection: Connection with pending frames
+        """
+        if connection not in self.paused and not self.paused:
+            self._drain(connection)
+            if not connection.pending:
+                return
+        
+        if connection not in self.paused:
+            self.paused[connection] = None
+            connection.transport.pause_reading()
+        if self._resume_timer is None:
+            self._resume_timer = self._loop.call_later(self.RESUME_INTERVAL, self.resume)
+    
+    def resume(self) -> None:
+        """Log pending frames and resume connections once the queue drains."""
+        self._resume_timer = None
+        queue = self.queue
+        if queue is not None and queue.headroom() < queue.max_queue // 2:
+            self._resume_timer = self._loop.call_later(self.RESUME_INTERVAL, self.resume)
+            return
+        
+        for connection in list(self.paused):
+            self._drain(connection)
+            if connection.pending:
+                break
+            del self.paused[connection]
+            connection.transport.resume_reading()
+        
+        if self.paused:
+            self._resume_timer = self._loop.call_later(self.RESUME_INTERVAL, self.resume)
+    
+    def _drain(self, connection: TcpSyslogProtocol) -> None:
+        """Log as many of a connection's pending frames as the queue takes."""
+        pending = connection.pending
+        if self.queue is None:
+            room = len(pending)
+        else:
+            room = min(len(pending), self.queue.headroom())
+        
+        if room == len(pending):
+            frames = list(pending)
+            pending.clear()
+        else:
+            frames = [pending.popleft() for _ in range(room)]
+        if frames:
+            self.handle(frames)
+
+
+# Longest time one main loop pass spends reading the journal, so a
+# journal backlog cannot starve the syslog sockets
+JOURNAL_PASS_SECONDS = 0.02
+
+# Entries read between two checks of the pass deadline
+JOURNAL_CHECK_INTERVAL = 64
+
+# journald field names: uppercase letters, digits and underscores
+JOURNAL_FIELD_NAME = re.compile(r'^[A-Z0-9_]+$')
+
+
+def parse_journal_match(value: str) -> List[List[str]]:
+    """
+    Parse a journal_match setting.
+    
+    Terms are FIELD=value separated by whitespace. As with journalctl,
+    terms on different fields must all match, terms on the same field
+    are alternatives, and a lone '+' separates alternative groups.
+    
+    Args:
+        value: Setting value
+        
+    Returns:
+        List of groups, each a list of FIELD=value terms
+        
+    Raises:
+        ConfigError: If a term is not FIELD=value
+    """
+    groups = [[]]
+    for term in value.split():
+        if term == '+':
+            groups.append([])
+            continue
+        field, separator, _ = term.partition('=')
+        if not separator or not JOURNAL_FIELD_NAME.match(field):
+            raise ConfigError(f"Invalid journal_match term: {term}")
+        groups[-1].append(term)
+    return [group for group in groups if group]
+
+
+def journal_cursor_path(config: configparser.ConfigParser) -> Optional[Path]:
+    """
+    Get the path of the saved journal cursor.
+    
+    Args:
+        config: Parsed configuration object
+        
+    Returns:
+        Configured path, journal.cursor in the log directory by default,
+        or None if the cursor is not persisted
+    """
+    if config.getfloat('service', 'journal_cursor_interval', fallback=5) <= 0:
+        return None
+    
+    cursor_file = config.get('service', 'journal_cursor_file', fallback='')
+    if cursor_file:
+        return Path(cursor_file).expanduser()
+    return Path(config['logging']['log_dir']).expanduser() / 'journal.cursor'
+
+
+class JournalReader:
+    """
+    Read and forward journald logs.
+    
+    Each pass drains the journal until it is caught up or the pass
+    deadline is reached. The cursor of the last entry written to the
+    log files can be saved to a file and is resumed from on the next
+    start, so entries written while the daemon was down, or still
+    queued when it stopped, are not lost.
+    """
+    
+    def __init__(self, logger: logging.Logger,
+                 matches: Optional[List[List[str]]] = None,
+                 cursor_path: Optional[Path] = None):
+        """
+        Initialize the journal reader.
+        
+        Args:
+            logger: Logger instance for recording messages
+            matches: Field match groups from parse_journal_match()
+            cursor_path: File to save and resume the journal cursor, or
+                None to start at the end of the journal
+        """
+        self.logger = logger
+        self.journal = None
+        self.cursor_path = cursor_path
+        self.cursor = None
+        self._saved_cursor = None
+        # Cursor of the last entry known to be written, and the
+        # (write_seq, cursor) of forwarded entries written after it
+        self._written_cursor = None
+        self._unwritten = deque()
+        self._behind = False
+        self._available = False
+        
+        try:
+            from systemd import journal
+            self.journal = journal.Reader()
+            self._add_matches(matches)
             self._available = True
         except ImportError:
             pass
         except Exception:
             pass
+        
+        if self._available:
+            self._seek_start()
+    
+    def _add_matches(self, matches: Optional[List[List[str]]]) -> None:
+        """Install field match groups and the current boot filter."""
+        if matches:
+            for index, group in enumerate(matches):
+                if index:
+                    self.journal.add_disjunction()
+                self.journal.add_match(*group)
+            self.journal.add_conjunction()
+        self.journal.this_boot()
+    
+    def set_matches(self, matches: Optional[List[List[str]]]) -> None:
+        """
+        Replace the field filters, continuing after the last forwarded entry.
+        
+        Args:
+            matches: Field match groups from parse_journal_match()
+        """
+        if not self._available:
+            return
+        
+        self.journal.flush_matches()
+        self._add_matches(matches)
+        if not (self.cursor and self._seek_after(self.cursor)):
+            self.journal.seek_tail()
+            self.journal.get_previous()
+    
+    def _seek_after(self, cursor: str) -> bool:
+        """Position the journal after an entry that was forwarded."""
+        try:
+            self.journal.seek_cursor(cursor)
+            # The entry at the cursor was forwarded before; if it is
+            # gone, step back so the entry after it is not skipped
+            if self.journal.get_next() and not self.journal.test_cursor(cursor):
+                self.journal.get_previous()
+            return True
+        except Exception as e:
+            self.logger.warning(
+                f"Cannot resume journal at saved cursor: {e}",
+                extra={'source': 'leuitlog'}
+            )
+            return False
+    
+    def _seek_start(self) -> None:
+        """Position the journal after the saved cursor, or at its end."""
+        cursor = self._load_cursor()
+        if cursor and self._seek_after(cursor):
+            self.cursor = self._saved_cursor = self._written_cursor = cursor
+            return
+        
+        self.journal.seek_tail()
+        self.journal.get_previous()
+    
+    def _load_cursor(self) -> Optional[str]:
+        """Read the saved cursor, if any."""
+        if not self.cursor_path:
+            return None
+        try:
+            return self.cursor_path.read_text().strip() or None
+        except OSError:
+            return None
+    
+    def _forwarded(self, cursor: str, logged: bool) -> Optional[int]:
+        """
+        Note a forwarded entry, returning the write_seq for its record.
+        
+        The caller releases the write_seq once it has logged the record.
+        An entry that is not logged is written as soon as the entries
+        before it are, so it takes over the cursor of the last of them.
+        """
+        if not logged:
+            if self._unwritten:
+                self._unwritten[-1] = (self._unwritten[-1][0], cursor)
+            else:
+                self._written_cursor = cursor
+            return None
+        
+        seq = write_progress.issue()
+        self._unwritten.append((seq, cursor))
+        return seq
+    
+    def written_cursor(self) -> Optional[str]:
+        """
+        Get the cursor of the last entry written to the log files.
+        
+        Returns:
+            Journal cursor, or None if no entry was written yet
+        """
+        position = write_progress.position()
+        unwritten = self._unwritten
+        while unwritten and unwritten[0][0] <= position:
+            self._written_cursor = unwritten.popleft()[1]
+        return self._written_cursor
+    
+    def save_cursor(self) -> None:
+        """Atomically save the cursor of the last entry written to the log files."""
+        cursor = self.written_cursor()
+        if not self.cursor_path or not cursor or cursor == self._saved_cursor:
+            return
+        
+        tmp_path = self.cursor_path.with_name(self.cursor_path.name + '.tmp')
+        try:
+            tmp_path.write_text(cursor + '\n')
+            os.replace(tmp_path, self.cursor_path)
+        except OSError as e:
+            self.logger.error(
+                f"Cannot save journal cursor to {self.cursor_path}: {e}",
+                extra={'source': 'leuitlog'}
+            )
+            self.cursor_path = None
+            return
+        self._saved_cursor = cursor
     
     @property
     def available(self) -> bool:
         """Check if journal reading is available."""
         return self._available
     
-    def process_entries(self, max_entries: int = 100) -> int:
+    def process_entries(self, time_budget: float = JOURNAL_PASS_SECONDS) -> int:
         """
-        Process new journal entries.
+        Process new journal entries until caught up or out of time.
         
         Args:
-            max_entries: Maximum entries to process per call
+            time_budget: Seconds this call may spend reading
             
         Returns:
             Number of entries processed
@@ -355,33 +5323,49 @@ class JournalReader:
             return 0
         
         count = 0
+        read = 0
+        deadline = time.monotonic() + time_budget
+        get_next = self.journal.get_next
+        log = self.logger.log
+        self._behind = False
         
         try:
-            for entry in self.journal:
-                if count >= max_entries:
+            while True:
+                entry = get_next()
+                if not entry:
                     break
+                self.cursor = entry.get('__CURSOR', self.cursor)
                 
-                message = entry.get('MESSAGE', '')
-                if not message:
-                    continue
-                
-                source = entry.get('SYSLOG_IDENTIFIER', 
-                         entry.get('_SYSTEMD_UNIT', 'unknown'))
-                
-                # Truncate long source names
-                if len(source) > 15:
-                    source = source[:12] + '...'
-                
-                priority = entry.get('PRIORITY', 6)
+                read += 1
+                # Stop after the entry is logged so none is skipped
+                if read % JOURNAL_CHECK_INTERVAL == 0 and time.monotonic() >= deadline:
+                    self._behind = True
                 
-                if priority <= 3:
-                    self.logger.error(message, extra={'source': source})
-                elif priority <= 4:
-                    self.logger.warning(message, extra={'source': source})
-                else:
-                    self.logger.info(message, extra={'source': source})
+                message = entry.get('MESSAGE', '')
+                seq = self._forwarded(self.cursor, bool(message)) if self.cursor else None
+                if message:
+                    source = entry.get('SYSLOG_IDENTIFIER', 
+                             entry.get('_SYSTEMD_UNIT', 'unknown'))
+                    
+                    # Truncate long source names
+                    if len(source) > 15:
+                        source = source[:12] + '...'
+                    
+                    # Journal priorities are syslog severities
+                    try:
+                        level = SYSLOG_SEVERITY_LEVELS[int(entry.get('PRIORITY', 6)) & 7]
+                    except (TypeError, ValueError):
+                        level = logging.INFO
+                    
+                    try:
+                        log(level, message, extra={'source': source, 'write_seq': seq})
+                    finally:
+                        if seq is not None:
+                            write_progress.release(seq)
+                    count += 1
                 
-                count += 1
+                if self._behind:
+                    break
                 
         except Exception as e:
             self.logger.error(
@@ -389,25 +5373,198 @@ class JournalReader:
                 extra={'source': 'leuitlog'}
             )
         
+        if count:
+            metrics.add('messages_received_total', count, transport='journal')
+        
         return count
+    
+    def fileno(self) -> Optional[int]:
+        """
+        Get the journal's pollable file descriptor.
+        
+        Returns:
+            File descriptor, or None if journal reading is unavailable
+        """
+        if not self._available or not self.journal:
+            return None
+        try:
+            return self.journal.fileno()
+        except Exception:
+            return None
+    
+    def poll_timeout(self, default: float) -> float:
+        """
+        Get how long the main loop may wait before servicing the journal.
+        
+        Args:
+            default: Timeout to use when the journal imposes none
+            
+        Returns:
+            Timeout in seconds
+        """
+        if not self._available or not self.journal:
+            return default
+        try:
+            timeout_ms = self.journal.get_timeout_ms()
+        except Exception:
+            return default
+        if timeout_ms < 0:
+            return default
+        return min(default, timeout_ms / 1000.0)
+    
+    def process_ready(self) -> bool:
+        """
+        Acknowledge journal events and process new entries.
+        
+        Returns:
+            True if the pass ran out of time before catching up
+        """
+        if not self._available or not self.journal:
+            return False
+        
+        try:
+            # Resets the wakeup state of the journal fd
+            self.journal.process()
+        except Exception:
+            pass
+        
+        self.process_entries()
+        return self._behind
+
+
+def publish_metrics(path: Path, logger: logging.Logger,
+                    tcp_listener: Optional['TcpSyslogListener'] = None) -> None:
+    """
+    Refresh the sampled metrics and write the stats file.
+    
+    Args:
+        path: Stats file path
+        logger: Daemon logger, for write queue and duplicate counters
+        tcp_listener: TCP listener, if enabled
+    """
+    write_stats = get_write_stats(logger)
+    if write_stats:
+        metrics.set('write_queue_depth', write_stats['queue_depth'])
+        metrics.set('write_queue_capacity', write_stats['queue_capacity'])
+        metrics.set('records_written_total', write_stats['written'])
+        metrics.set('records_dropped_total', write_stats['dropped'])
+    
+    duplicate_filter = get_duplicate_filter(logger)
+    if duplicate_filter:
+        metrics.set('duplicates_suppressed_total', duplicate_filter.suppressed)
+    
+    if tcp_listener:
+        metrics.set('tcp_connections', len(tcp_listener.connections))
+        metrics.set('tcp_connections_refused_total', tcp_listener.refused)
+        metrics.set('tcp_connections_paused', len(tcp_listener.paused))
+    
+    path.parent.mkdir(parents=True, exist_ok=True)
+    metrics.write(path)
+
+
+def drain_wakeup_socket(sock: socket.socket) -> None:
+    """
+    Discard pending signal wakeup bytes.
+    
+    Args:
+        sock: Read end of the signal wakeup socket pair
+    """
+    try:
+        while sock.recv(512):
+            pass
+    except (BlockingIOError, InterruptedError):
+        pass
+
+
+def create_log_indexers(config: configparser.ConfigParser) -> List[LogIndexer]:
+    """
+    Create the background indexers of the text and structured logs.
+    
+    Args:
+        config: Parsed configuration object
+        
+    Returns:
+        Indexers to start, empty if line indexes are disabled
+    """
+    log_indexers = []
+    if config.getboolean('logging', 'line_index', fallback=True):
+        log_indexers.append(LogIndexer(
+            Path(config['logging']['log_dir']).expanduser() / config['logging']['log_file'],
+            int(config['logging']['backup_count']),
+            interval=config.getint('logging', 'index_interval', fallback=256),
+            tokens=config.getboolean('logging', 'search_index', fallback=True)
+        ))
+        
+        structured_path = structured_log_path(config)
+        if structured_path:
+            log_indexers.append(LogIndexer(
+                structured_path,
+                int(config['logging']['backup_count']),
+                interval=config.getint('logging', 'index_interval', fallback=256)
+            ))
+    return log_indexers
 
 
-def run_daemon(config: configparser.ConfigParser) -> int:
+def create_retention_manager(config: configparser.ConfigParser,
+                             logger: logging.Logger) -> Optional[RetentionManager]:
+    """
+    Create the retention manager of the log directory.
+    
+    Args:
+        config: Parsed configuration object
+        logger: Logger for removal reports
+        
+    Returns:
+        Manager to start, or None if neither a size nor an age limit is set
+    """
+    max_bytes = config.getint('logging', 'retention_max_mb', fallback=0) * 1024 * 1024
+    max_age = config.getfloat('logging', 'retention_max_days', fallback=0) * 86400
+    if not max_bytes and not max_age:
+        return None
+    
+    log_paths = [Path(config['logging']['log_dir']).expanduser() / config['logging']['log_file']]
+    structured_path = structured_log_path(config)
+    if structured_path:
+        log_paths.append(structured_path)
+    
+    return RetentionManager(
+        log_paths,
+        stream_log_dir(config),
+        logger,
+        max_bytes=max_bytes,
+        max_age=max_age,
+        interval=config.getfloat('logging', 'retention_interval', fallback=60)
+    )
+
+
+def run_daemon(config: configparser.ConfigParser, config_path: Optional[str] = None) -> int:
     """
     Run the main daemon loop.
     
+    SIGTERM and SIGINT stop the daemon; SIGHUP re-reads `config_path`
+    and reopens the log files without closing any listener.
+    
     Args:
         config: Configuration object
+        config_path: File the configuration was loaded from
         
     Returns:
         Exit code
     """
-    global shutdown_requested
+    global shutdown_requested, reload_requested
     
     # Set up signal handlers
     signal.signal(signal.SIGTERM, signal_handler)
     signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGHUP, signal_handler)
+    signal.signal(signal.SIGHUP, reload_handler)
+    
+    # Signals wake the main loop through this socket pair
+    selector = selectors.DefaultSelector()
+    wakeup_reader, wakeup_writer = socket.socketpair()
+    wakeup_reader.setblocking(False)
+    wakeup_writer.setblocking(False)
+    previous_wakeup_fd = signal.set_wakeup_fd(wakeup_writer.fileno())
+    selector.register(wakeup_reader, selectors.EVENT_READ, None)
     
     # Set up logging
     logger = setup_logging(config)
@@ -423,15 +5580,87 @@ def run_daemon(config: configparser.ConfigParser) -> int:
     
     # Initialize listeners
     listen_port = int(config['service']['listen_port'])
-    syslog_listener = SyslogListener(listen_port, logger)
-    journal_reader = JournalReader(logger)
+    syslog_listener = None
+    ingest_workers = None
+    ingest_processes = config.getint('service', 'ingest_processes', fallback=0)
+    if ingest_processes > 0:
+        # UDP is received and parsed in worker processes
+        ingest_workers = IngestWorkers(
+            ingest_processes,
+            listen_port,
+            logger,
+            bind_address=config.get('service', 'bind_address', fallback='127.0.0.1'),
+            receive_buffer=config.getint('service', 'receive_buffer_kb', fallback=0) * 1024,
+            batch_size=config.getint('service', 'receive_batch', fallback=64),
+            ring_size=config.getint('service', 'ingest_ring_kb', fallback=4096) * 1024
+        )
+    else:
+        syslog_listener = SyslogListener(
+            listen_port,
+            logger,
+            bind_address=config.get('service', 'bind_address', fallback='127.0.0.1'),
+            receive_buffer=config.getint('service', 'receive_buffer_kb', fallback=0) * 1024,
+            num_sockets=config.getint('service', 'listen_sockets', fallback=1),
+            batch_size=config.getint('service', 'receive_batch', fallback=64)
+        )
+    tcp_listener = None
+    tcp_port = config.getint('service', 'tcp_port', fallback=0)
+    if tcp_port:
+        tcp_listener = TcpSyslogListener(
+            tcp_port,
+            logger,
+            bind_address=config.get('service', 'bind_address', fallback='127.0.0.1'),
+            max_connections=config.getint('service', 'tcp_max_connections', fallback=512),
+            max_message_size=config.getint('service', 'tcp_max_message_kb', fallback=64) * 1024
+        )
+    journal_reader = JournalReader(
+        logger,
+        matches=parse_journal_match(config.get('service', 'journal_match', fallback='')),
+        cursor_path=journal_cursor_path(config)
+    )
+    journal_cursor_interval = config.getfloat('service', 'journal_cursor_interval', fallback=5)
+    next_cursor_save = 0.0
+    
+    # Per-minute level and source counts for /api/stats
+    log_stats = get_log_stats(logger)
+    stats_path = stats_file_path(config)
+    stats_interval = config.getfloat('service', 'stats_interval', fallback=10)
+    next_stats = time.monotonic() + stats_interval
+    
+    # Stats file for /api/metrics
+    metrics.reset()
+    metrics_path = metrics_file_path(config)
+    metrics_interval = config.getfloat('service', 'metrics_interval', fallback=10)
+    next_metrics = 0.0
+    
+    # Background line indexing for the Web UI
+    log_indexers = create_log_indexers(config)
+    
+    # Size and age limits for the log directory
+    retention_manager = create_retention_manager(config, logger)
     
     try:
-        syslog_listener.start()
-        logger.info(
-            f"Syslog listener started on port {listen_port}",
-            extra={'source': 'leuitlog'}
-        )
+        if ingest_workers:
+            ingest_workers.start()
+            logger.info(
+                f"Syslog listener started on {ingest_workers.bind_address}:{listen_port} "
+                f"({ingest_workers.count} ingest process(es))",
+                extra={'source': 'leuitlog'}
+            )
+        else:
+            syslog_listener.start()
+            logger.info(
+                f"Syslog listener started on {syslog_listener.bind_address}:{listen_port} "
+                f"({syslog_listener.num_sockets} socket(s))",
+                extra={'source': 'leuitlog'}
+            )
+        
+        if tcp_listener:
+            tcp_listener.start()
+            logger.info(
+                f"TCP syslog listener started on {tcp_listener.bind_address}:{tcp_port}",
+                extra={'source': 'leuitlog'}
+            )
         
         if journal_reader.available:
             logger.info(
@@ -439,17 +5668,138 @@ def run_daemon(config: configparser.ConfigParser) -> int:
                 extra={'source': 'leuitlog'}
             )
         
-        # Main loop
+        for log_indexer in log_indexers:
+            log_indexer.start()
+        
+        if retention_manager:
+            retention_manager.start()
+        
+        # Main loop: wait on every source at once, service only ready ones
+        if ingest_workers:
+            for reader in ingest_workers.selectable:
+                selector.register(reader, selectors.EVENT_READ, ingest_workers)
+        else:
+            for sock in syslog_listener.selectable_sockets:
+                selector.register(sock, selectors.EVENT_READ, syslog_listener)
+        
+        journal_fd = journal_reader.fileno()
+        if journal_fd is not None:
+            selector.register(journal_fd, selectors.EVENT_READ, journal_reader)
+        
+        # Catch up on entries written before the fd was registered
+        journal_pending = journal_reader.process_ready()
+        duplicate_filter = get_duplicate_filter(logger)
+        ingest_pending = False
+        
         while not shutdown_requested:
-            # Process syslog messages
-            syslog_listener.process_messages(timeout=0.5)
+            if journal_pending or ingest_pending:
+                timeout = 0
+            else:
+                timeout = journal_reader.poll_timeout(IDLE_WAKEUP_INTERVAL)
+            
+            events = selector.select(timeout)
+            started = time.monotonic()
+            journal_ready = not events and journal_reader.available
+            ingest_ready = []
+            
+            for key, _ in events:
+                if key.data is None:
+                    drain_wakeup_socket(key.fileobj)
+                elif key.data is syslog_listener:
+                    syslog_listener.drain(key.fileobj)
+                elif key.data is ingest_workers:
+                    ingest_ready.append(key.fileobj)
+                elif key.data is journal_reader:
+                    journal_ready = True
+            
+            if ingest_workers:
+                if ingest_ready or ingest_pending:
+                    ingest_pending = ingest_workers.drain(ingest_ready)
+                # Workers also get SIGTERM when the whole group is stopped
+                if not shutdown_requested:
+                    ingest_workers.check()
+            
+            # Also poll on timeout in case the journal fd is unreliable
+            if journal_ready or journal_pending:
+                journal_pending = journal_reader.process_ready()
+            
+            if reload_requested:
+                reload_requested = False
+                config = reload_config(config_path, config, logger)
+                
+                journal_reader.set_matches(
+                    parse_journal_match(config.get('service', 'journal_match', fallback=''))
+                )
+                journal_reader.cursor_path = journal_cursor_path(config)
+                journal_cursor_interval = config.getfloat('service', 'journal_cursor_interval', fallback=5)
+                
+                log_stats = get_log_stats(logger)
+                stats_path = stats_file_path(config)
+                stats_interval = config.getfloat('service', 'stats_interval', fallback=10)
+                duplicate_filter = get_duplicate_filter(logger)
+                
+                previous_metrics_path = metrics_path
+                metrics_path = metrics_file_path(config)
+                metrics_interval = config.getfloat('service', 'metrics_interval', fallback=10)
+                if previous_metrics_path and previous_metrics_path != metrics_path:
+                    try:
+                        previous_metrics_path.unlink()
+                    except OSError:
+                        pass
+                
+                # Paths and intervals of the indexes may have changed
+                for log_indexer in log_indexers:
+                    log_indexer.stop()
+                log_indexers = create_log_indexers(config)
+                for log_indexer in log_indexers:
+                    log_indexer.start()
+                
+                if retention_manager:
+                    retention_manager.stop()
+                retention_manager = create_retention_manager(config, logger)
+                if retention_manager:
+                    retention_manager.start()
+            
+            if duplicate_filter:
+                duplicate_filter.flush_expired()
             
-            # Process journal entries
-            if journal_reader.available:
-                journal_reader.process_entries()
+            now = time.monotonic()
+            metrics.observe('loop_iteration_seconds', now - started)
+            
+            if journal_reader.cursor_path and now >= next_cursor_save:
+                next_cursor_save = now + journal_cursor_interval
+                journal_reader.save_cursor()
+            
+            if log_stats and now >= next_stats:
+                next_stats = now + stats_interval
+                try:
+                    log_stats.write(stats_path)
+                except OSError as e:
+                    logger.error(
+                        f"Cannot write stats file {stats_path}: {e}",
+                        extra={'source': 'leuitlog'}
+                    )
+                    log_stats = None
             
-            # Small sleep to prevent CPU spinning
-            time.sleep(0.1)
+            if metrics_path and now >= next_metrics:
+                next_metrics = now + metrics_interval
+                try:
+                    publish_metrics(metrics_path, logger, tcp_listener)
+                except OSError as e:
+                    logger.error(
+                        f"Cannot write metrics file {metrics_path}: {e}",
+                        extra={'source': 'leuitlog'}
+                    )
+                    metrics_path = None
+        
+        write_stats = get_write_stats(logger)
+        if write_stats:
+            logger.info(
+                f"Write queue: {write_stats['written']} written, "
+                f"{write_stats['dropped']} dropped, "
+                f"max depth {write_stats['queue_max_depth']}",
+                extra={'source': 'leuitlog'}
+            )
         
         logger.info(
             "LeuitLog shutting down gracefully",
@@ -466,8 +5816,31 @@ def run_daemon(config: configparser.ConfigParser) -> int:
         )
         return 1
     finally:
-        syslog_listener.stop()
+        signal.set_wakeup_fd(previous_wakeup_fd)
+        selector.close()
+        wakeup_reader.close()
+        wakeup_writer.close()
+        if syslog_listener:
+            syslog_listener.stop()
+        if ingest_workers:
+            ingest_workers.stop()
+        if tcp_listener:
+            tcp_listener.stop()
+        if log_stats:
+            try:
+                log_stats.write(stats_path)
+            except OSError:
+                pass
         remove_pid_file(pid_file)
+        if metrics_path and metrics_path.exists():
+            metrics_path.unlink()
+        if retention_manager:
+            retention_manager.stop()
+        close_logging(logger)
+        # Queued entries are written now, so the cursor covers them
+        journal_reader.save_cursor()
+        for log_indexer in log_indexers:
+            log_indexer.stop()
     
     return 0
 
@@ -506,7 +5879,7 @@ def main() -> int:
         print(f"Configuration error: {e}", file=sys.stderr)
         return 1
     
-    return run_daemon(config)
+    return run_daemon(config, config_path)
 
 
 if __name__ == '__main__':
@@ -21,13 +21,25 @@ This module does NOT:
 
 import os
 import sys
+import json
+import mmap
+import time
+import queue
+import threading
+import hashlib
 import configparser
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, time as dt_time
 from typing import List, Tuple, Optional
-from collections import deque
+from collections import OrderedDict, deque
 
-from flask import Flask, render_template, jsonify, url_for
+from flask import Flask, Response, render_template, jsonify, stream_with_context, url_for
+
+# Shared on-disk formats (line indexes) written by the core daemon
+try:
+    from . import leuitlog_core as core
+except ImportError:
+    import leuitlog_core as core
 
 # Configuration
 app = Flask(__name__, 
@@ -86,6 +98,9 @@ def get_service_status() -> dict:
     """
     Get the current service status.
     
+    The status holds no time of its own, so /api/status can serve it
+    from the response cache while nothing changes.
+    
     Returns:
         Dictionary with status information
     """
@@ -109,20 +124,13 @@ def get_service_status() -> dict:
         'log_file': str(log_path),
         'log_size_bytes': 0,
         'log_size_human': '0 B',
-        'log_exists': log_path.exists(),
-        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        'log_exists': log_path.exists()
     }
     
-    if pid_file.exists():
-        try:
-            with open(pid_file, 'r') as f:
-                pid = int(f.read().strip())
-            # Check if process is actually running
-            os.kill(pid, 0)
-            status['running'] = True
-            status['pid'] = pid
-        except (ValueError, ProcessLookupError, PermissionError, FileNotFoundError):
-            pass
+    pid = read_running_pid(pid_file)
+    if pid:
+        status['running'] = True
+        status['pid'] = pid
     
     if log_path.exists():
         size = log_path.stat().st_size
@@ -132,6 +140,26 @@ def get_service_status() -> dict:
     return status
 
 
+def read_running_pid(pid_file: Path) -> Optional[int]:
+    """
+    Get the daemon's PID if its process is running.
+    
+    Args:
+        pid_file: Path to the PID file
+        
+    Returns:
+        PID, or None if the file is missing or the process is gone
+    """
+    try:
+        with open(pid_file, 'r') as f:
+            pid = int(f.read().strip())
+        # Check if process is actually running
+        os.kill(pid, 0)
+        return pid
+    except (ValueError, ProcessLookupError, PermissionError, FileNotFoundError):
+        return None
+
+
 def format_size(size_bytes: int) -> str:
     """
     Format byte size to human readable string.
@@ -149,142 +177,1849 @@ def format_size(size_bytes: int) -> str:
     return f"{size_bytes:.1f} TB"
 
 
-def read_log_tail(num_lines: int = 100, page: int = 1) -> Tuple[List[dict], int, int]:
+def read_daemon_metrics() -> Optional[dict]:
     """
-    Read the last N lines from the log file.
+    Read the daemon's latest metrics snapshot from its stats file.
     
-    This function reads the log file without locking it,
-    ensuring it doesn't interfere with the logging core.
+    Returns:
+        Snapshot as written by core.Metrics.write(), or None
+    """
+    if config is None:
+        return None
+    
+    metrics_path = core.metrics_file_path(config)
+    if metrics_path is None:
+        return None
+    
+    try:
+        with open(metrics_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def summarize_stats(data: Optional[dict], minutes: int, limit: int,
+                    now: Optional[float] = None) -> dict:
+    """
+    Summarize the daemon's statistics for a recent time window.
     
     Args:
-        num_lines: Number of lines per page
-        page: Page number (1-based)
+        data: Stats file content as written by core.LogStats.write(), or None
+        minutes: Window length, ending now
+        limit: Number of top sources returned
+        now: Window end (defaults to time.time())
         
     Returns:
-        Tuple of (log entries, total lines, total pages)
+        Per-bucket level counts (every bucket of the window, oldest
+        first), level totals, and the busiest sources with their counts
     """
-    global config
+    now = time.time() if now is None else now
+    data = data or {}
+    bucket_seconds = data.get('bucket_seconds', 60)
+    levels = data.get('levels', list(core.STATS_LEVELS))
+    
+    last = int(now) // bucket_seconds * bucket_seconds
+    first = last - (minutes * 60 // bucket_seconds - 1) * bucket_seconds
+    
+    per_bucket = {}
+    sources = {}
+    for start, bucket in data.get('buckets', []):
+        if start < first or start > last:
+            continue
+        column_totals = per_bucket.setdefault(start, [0] * len(levels))
+        for source, counts in bucket.items():
+            source_totals = sources.setdefault(source, [0] * len(levels))
+            for column, count in enumerate(counts):
+                column_totals[column] += count
+                source_totals[column] += count
+    
+    buckets = []
+    totals = [0] * len(levels)
+    for start in range(first, last + 1, bucket_seconds):
+        counts = per_bucket.get(start, [0] * len(levels))
+        buckets.append({'time': start, 'counts': dict(zip(levels, counts))})
+        totals = [total + count for total, count in zip(totals, counts)]
+    
+    top_sources = sorted(sources.items(), key=lambda item: sum(item[1]), reverse=True)[:limit]
+    
+    return {
+        'bucket_seconds': bucket_seconds,
+        'levels': levels,
+        'since': first,
+        'until': last + bucket_seconds,
+        'updated': data.get('time'),
+        'buckets': buckets,
+        'totals': dict(zip(levels, totals)),
+        'sources': [
+            {
+                'source': source,
+                'total': sum(counts),
+                'counts': dict(zip(levels, counts))
+            }
+            for source, counts in top_sources
+        ]
+    }
+
+
+def format_metric_labels(labels: dict) -> str:
+    """Format labels as a Prometheus label set."""
+    if not labels:
+        return ''
+
+    pairs = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def render_metrics() -> str:
+    """
+    Render daemon and Web UI metrics in Prometheus text format.
     
+    Returns:
+        Exposition text (format version 0.0.4), empty without a configuration
+    """
     if config is None:
-        return [], 0, 0
+        return ''
     
-    log_dir = Path(config['logging']['log_dir']).expanduser()
-    log_file = config['logging']['log_file']
-    log_path = log_dir / log_file
+    status = get_service_status()
+    snapshot = read_daemon_metrics()
+    lines = []
     
-    if not log_path.exists():
-        return [], 0, 0
+    def header(name: str, kind: str, help_text: str) -> None:
+        lines.append(f"# HELP leuitlog_{name} {help_text}")
+        lines.append(f"# TYPE leuitlog_{name} {kind}")
     
-    entries = []
-    total_lines = 0
+    header('up', 'gauge', 'Whether the daemon is running')
+    lines.append(f"leuitlog_up {1 if status.get('running') else 0}")
     
-    try:
-        # Read all lines to count total (simple approach for small-medium logs)
-        with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
-            all_lines = f.readlines()
+    header('log_size_bytes', 'gauge', 'Size of the current log file')
+    lines.append(f"leuitlog_log_size_bytes {status.get('log_size_bytes', 0)}")
+    
+    if snapshot and status.get('running'):
+        header('metrics_age_seconds', 'gauge', 'Seconds since the daemon wrote its metrics')
+        lines.append(f"leuitlog_metrics_age_seconds {max(0.0, time.time() - snapshot['time']):.3f}")
         
-        total_lines = len(all_lines)
-        total_pages = max(1, (total_lines + num_lines - 1) // num_lines)
+        seen = set()
+        for value in snapshot.get('values', []):
+            name = value['name']
+            if name not in seen:
+                seen.add(name)
+                kind, help_text = core.METRIC_HELP.get(name, ('untyped', name))
+                header(name, kind, help_text)
+            lines.append(f"leuitlog_{name}{format_metric_labels(value['labels'])} {value['value']}")
         
-        # Clamp page number
-        page = max(1, min(page, total_pages))
+        for histogram in snapshot.get('histograms', []):
+            name = histogram['name']
+            kind, help_text = core.METRIC_HELP.get(name, ('histogram', name))
+            header(name, 'histogram', help_text)
+            
+            cumulative = 0
+            for bound, count in zip(histogram['buckets'], histogram['counts']):
+                cumulative += count
+                lines.append(f'leuitlog_{name}_bucket{{le="{bound}"}} {cumulative}')
+            cumulative += histogram['counts'][-1]
+            lines.append(f'leuitlog_{name}_bucket{{le="+Inf"}} {cumulative}')
+            lines.append(f"leuitlog_{name}_sum {histogram['sum']}")
+            lines.append(f"leuitlog_{name}_count {cumulative}")
+    
+    return '\n'.join(lines) + '\n'
+
+
+# Block size used when seeking backwards through a log file
+TAIL_BLOCK_SIZE = 64 * 1024
+
+# Chunk size used when counting lines
+COUNT_CHUNK_SIZE = 1024 * 1024
+
+# Line counts per path: (inode, counted bytes, lines, ends with newline)
+_line_count_cache = {}
+
+# Line counts of rotated backups: path -> ((inode, size, mtime), lines)
+_segment_count_cache = {}
+
+
+def count_lines(log_path: Path) -> int:
+    """
+    Count lines in a log file with constant memory.
+    
+    Counts are cached per file and only bytes appended since the
+    previous call are scanned, so repeated calls on a growing file
+    are cheap. A rotated (new inode) or truncated file is recounted.
+    
+    Args:
+        log_path: Path to the log file
         
-        # Calculate slice for requested page (newest first)
-        # Page 1 = most recent entries
-        start_idx = max(0, total_lines - (page * num_lines))
-        end_idx = total_lines - ((page - 1) * num_lines)
+    Returns:
+        Number of lines, including a trailing partial line
+    """
+    st = log_path.stat()
+    key = str(log_path)
+    inode, counted, lines, ends_newline = _line_count_cache.get(key, (None, 0, 0, True))
+    
+    if inode != st.st_ino or st.st_size < counted:
+        counted, lines, ends_newline = 0, 0, True
+    
+    if st.st_size > counted:
+        with open(log_path, 'rb') as f:
+            f.seek(counted)
+            while True:
+                chunk = f.read(COUNT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                lines += chunk.count(b'\n')
+                counted += len(chunk)
+                ends_newline = chunk.endswith(b'\n')
+    
+    _line_count_cache[key] = (st.st_ino, counted, lines, ends_newline)
+    
+    return lines if ends_newline else lines + 1
+
+
+def iter_lines_reverse(f, end: int, block_size: int = TAIL_BLOCK_SIZE, start: int = 0):
+    """
+    Yield lines of a binary file from the end towards the start.
+    
+    The file is read backwards in fixed-size blocks, so only the
+    blocks covering the consumed lines are ever read.
+    
+    Args:
+        f: File object opened in binary mode
+        end: Offset to start reading backwards from
+        block_size: Bytes read per seek
+        start: Line start offset to stop at
+        
+    Yields:
+        Lines as bytes without the trailing newline, newest first
+    """
+    position = end
+    remainder = b''
+    first = True
+    
+    while position > start:
+        read_size = min(block_size, position - start)
+        position -= read_size
+        f.seek(position)
+        block = f.read(read_size) + remainder
         
-        page_lines = all_lines[start_idx:end_idx]
-        page_lines.reverse()  # Newest first
+        lines = block.split(b'\n')
+        # The first piece may be the tail of a line in an earlier block
+        remainder = lines.pop(0)
         
-        for line in page_lines:
-            line = line.strip()
-            if not line:
+        if first:
+            first = False
+            if lines and lines[-1] == b'':
+                lines.pop()
+        
+        for line in reversed(lines):
+            yield line
+    
+    if remainder or not first:
+        yield remainder
+
+
+def read_lines_at(f, index: 'core.LineIndex', first_line: int, count: int) -> List[bytes]:
+    """
+    Read consecutive lines starting at a line number using a line index.
+    
+    Args:
+        f: Log file opened in binary mode
+        index: Valid line index for the file
+        first_line: 0-based number of the first line to read
+        count: Number of lines to read
+        
+    Returns:
+        Lines as bytes without the trailing newline, oldest first
+    """
+    offset, skip = index.locate(first_line)
+    f.seek(offset)
+    
+    for _ in range(skip):
+        f.readline()
+    
+    lines = []
+    for _ in range(count):
+        line = f.readline()
+        if not line:
+            break
+        lines.append(line.rstrip(b'\n'))
+    return lines
+
+
+# Seconds between two checks for mapped segments that were rotated away
+SEGMENT_MAP_SWEEP_INTERVAL = 10.0
+
+# Shared memory maps of plain segments: path -> (mmap, SegmentStat)
+_segment_maps = {}
+_segment_maps_lock = threading.Lock()
+_segment_map_sweeper = None
+
+
+class MappedSegment:
+    """
+    Read-only view of a memory-mapped plain log segment.
+    
+    Each worker maps a segment once and every request reads it through
+    its own view, which keeps a private position, so concurrent
+    requests share one map. The pages belong to the OS page cache,
+    so all workers together hold one copy of the file. Reads copy only
+    the requested bytes; nothing is decoded here.
+    
+    Only rotated backups are mapped. The current file is still being
+    written, and reading a map of a file truncated in place (by
+    copytruncate or ': > file') raises SIGBUS and kills the worker,
+    so it is read through a regular file object instead.
+    """
+    
+    def __init__(self, data: mmap.mmap, st: 'core.SegmentStat'):
+        """
+        Initialize the view.
+        
+        Args:
+            data: Map of the whole segment
+            st: Identity and size of the mapped file
+        """
+        self.data = data
+        self.st = st
+        self.position = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        # The map itself is shared and released when no view uses it
+        self.data = None
+    
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += self.st.st_size
+        self.position = max(0, offset)
+        return self.position
+    
+    def tell(self) -> int:
+        return self.position
+    
+    def read(self, size: int = -1) -> bytes:
+        start = self.position
+        end = self.st.st_size if size is None or size < 0 else min(self.st.st_size, start + size)
+        if start >= end:
+            return b''
+        self.position = end
+        return self.data[start:end]
+    
+    def readline(self) -> bytes:
+        start = self.position
+        if start >= self.st.st_size:
+            return b''
+        newline = self.data.find(b'\n', start)
+        self.position = self.st.st_size if newline < 0 else newline + 1
+        return self.data[start:self.position]
+    
+    def skip_lines_reverse(self, end: int, count: int, start: int = 0) -> int:
+        """
+        Skip lines backwards from an offset without yielding them.
+        
+        Newlines are counted a block at a time inside the map, so
+        skipping to a deep page does not split every line on the way.
+        
+        Args:
+            end: Offset to start from, as for iter_lines_reverse()
+            count: Newest lines to skip
+            start: Line start offset to stop at
+            
+        Returns:
+            Offset to pass to iter_lines_reverse() for the remaining lines
+        """
+        data = self.data
+        end = min(end, self.st.st_size)
+        if count <= 0 or end <= start:
+            return end
+        
+        # A final newline ends the newest line, it doesn't start one
+        position = end - 1 if data[end - 1] == 0x0A else end
+        
+        while position > start:
+            block_start = max(start, position - TAIL_BLOCK_SIZE)
+            block = data[block_start:position]
+            found = block.count(b'\n')
+            if found < count:
+                count -= found
+                position = block_start
                 continue
             
-            entry = parse_log_line(line)
-            entries.append(entry)
+            newline = len(block)
+            for _ in range(count):
+                newline = block.rfind(b'\n', 0, newline)
+            return block_start + newline + 1
         
-        return entries, total_lines, total_pages
+        return start
+
+
+def sweep_segment_maps() -> None:
+    """
+    Release maps of segments that were deleted or replaced.
+    
+    Runs in a background thread of each worker, so an idle Web UI does
+    not keep rotated-away or compressed files allocated on disk.
+    """
+    while True:
+        time.sleep(SEGMENT_MAP_SWEEP_INTERVAL)
+        with _segment_maps_lock:
+            for key, (_, st) in list(_segment_maps.items()):
+                try:
+                    inode = os.stat(key).st_ino
+                except OSError:
+                    inode = None
+                if inode != st.st_ino:
+                    del _segment_maps[key]
+
+
+def map_segment(path: Path) -> Optional[MappedSegment]:
+    """
+    Get a view of the shared memory map of a rotated plain log segment.
+    
+    The map is made again when the file at the path has changed since
+    it was mapped (a later rotation moved another file there).
+    
+    Args:
+        path: Logical path of the segment
         
-    except (IOError, OSError) as e:
-        return [], 0, 0
+    Returns:
+        MappedSegment, or None for the current file and for compressed,
+        empty or missing segments
+    """
+    global _segment_map_sweeper
+    
+    # Backups end in their rotation number; the current file may still
+    # grow or be truncated under the map
+    if not Path(path).suffix[1:].isdigit():
+        return None
+    
+    key = str(path)
+    try:
+        st = os.stat(key)
+    except OSError:
+        return None
+    if not st.st_size:
+        return None
+    
+    with _segment_maps_lock:
+        current = _segment_maps.get(key)
+        if current is None or current[1] != (st.st_ino, st.st_size, st.st_mtime):
+            try:
+                with open(key, 'rb') as f:
+                    fst = os.fstat(f.fileno())
+                    if not fst.st_size:
+                        return None
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                return None
+            current = (data, core.SegmentStat(fst.st_ino, len(data), fst.st_mtime))
+            _segment_maps[key] = current
+        
+        if _segment_map_sweeper is None or not _segment_map_sweeper.is_alive():
+            _segment_map_sweeper = threading.Thread(
+                target=sweep_segment_maps, name='leuitlog-map-sweeper', daemon=True
+            )
+            _segment_map_sweeper.start()
+    
+    return MappedSegment(*current)
 
 
-def parse_log_line(line: str) -> dict:
+def open_segment(path: Path):
     """
-    Parse a log line into structured data.
+    Open a log segment for reading, through the shared map for plain backups.
     
-    Expected format:
-    2024-01-15 10:30:45 +0000 | INFO     | source          | message
+    Args:
+        path: Logical path of the segment
+        
+    Returns:
+        MappedSegment, or a binary file object from core.open_segment()
+    """
+    mapped = map_segment(path)
+    if mapped is not None:
+        return mapped
+    return core.open_segment(path)
+
+
+def segment_stat(f) -> 'core.SegmentStat':
+    """
+    Identify a segment opened with open_segment().
     
     Args:
-        line: Raw log line
+        f: Segment from open_segment()
         
     Returns:
-        Dictionary with parsed fields
+        SegmentStat of the mapped or open file
     """
-    entry = {
-        'timestamp': '',
-        'level': 'INFO',
-        'source': '',
-        'message': line,
-        'raw': line
-    }
+    if isinstance(f, MappedSegment):
+        return f.st
+    return core.segment_stat(f)
+
+
+def get_query_log_path(stream: Optional[str] = None) -> Path:
+    """
+    Get the log file that /api/logs pages through.
+    
+    Args:
+        stream: Routed stream to read instead of the main log
+        
+    Returns:
+        The stream's file, the structured (JSONL) log if the daemon
+        writes one, else the text log
+    """
+    if stream:
+        return core.stream_log_dir(config) / (stream + core.STREAM_SUFFIX)
+    structured_path = core.structured_log_path(config)
+    if structured_path:
+        return structured_path
+    return Path(config['logging']['log_dir']).expanduser() / config['logging']['log_file']
+
+
+def get_log_segments(stream: Optional[str] = None) -> List[Path]:
+    """
+    List the existing segments of the queried log, newest first.
+    
+    Args:
+        stream: Routed stream to list instead of the main log
+        
+    Returns:
+        Logical paths of the current log file and its backups
+    """
+    log_path = get_query_log_path(stream)
+    if stream:
+        backup_count = config.getint('routing', 'stream_backup_count', fallback=2)
+    else:
+        backup_count = int(config['logging']['backup_count'])
+    
+    return [
+        path for path in core.segment_paths(log_path, backup_count)
+        if core.resolve_segment(path) is not None
+    ]
+
+
+def list_streams() -> List[dict]:
+    """
+    List the routed streams the daemon has written.
     
+    Returns:
+        One dictionary per stream with its name, size and last write,
+        sorted by name
+    """
+    streams = []
     try:
-        parts = line.split(' | ', 3)
-        if len(parts) >= 4:
-            entry['timestamp'] = parts[0].strip()
-            entry['level'] = parts[1].strip()
-            entry['source'] = parts[2].strip()
-            entry['message'] = parts[3].strip()
-        elif len(parts) >= 3:
-            entry['timestamp'] = parts[0].strip()
-            entry['level'] = parts[1].strip()
-            entry['message'] = parts[2].strip()
-    except Exception:
-        pass
+        entries = list(os.scandir(core.stream_log_dir(config)))
+    except OSError:
+        return streams
     
-    return entry
+    for entry in entries:
+        name = entry.name[:-len(core.STREAM_SUFFIX)]
+        if not entry.name.endswith(core.STREAM_SUFFIX) or not core.STREAM_NAME.match(name):
+            continue
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        streams.append({
+            'name': name,
+            'size': st.st_size,
+            'size_human': format_size(st.st_size),
+            'modified': datetime.fromtimestamp(st.st_mtime).astimezone().strftime(
+                core.LOG_DATE_FORMAT
+            ),
+        })
+    
+    streams.sort(key=lambda stream: stream['name'])
+    return streams
 
 
-@app.route('/')
-def index():
-    """Render the main log viewer page."""
-    status = get_service_status()
-    return render_template('index.html', status=status)
+def load_line_index(path: Path, st: 'core.SegmentStat', f) -> Optional['core.LineIndex']:
+    """
+    Load the daemon's line index of a segment if it describes the file.
+    
+    Args:
+        path: Logical path of the segment
+        st: segment_stat() of the open segment
+        f: Segment from open_segment()
+        
+    Returns:
+        Valid line index, or None
+    """
+    index = core.LineIndex(path)
+    if index.load() and index.matches(st, f):
+        return index
+    return None
 
 
-@app.route('/api/status')
-def api_status():
-    """API endpoint for service status."""
-    return jsonify(get_service_status())
+def segment_line_count(path: Path, current: bool) -> int:
+    """
+    Count the lines of one log segment.
+    
+    The current file is counted through its line index or the
+    incremental count_lines() cache. Backups don't change once
+    rotated, so their counts are cached by the (inode, size, mtime)
+    of their data file and recounted only when that changes.
+    
+    Args:
+        path: Logical path of the segment
+        current: True for the file the daemon is writing
+        
+    Returns:
+        Number of lines, including a trailing partial line
+    """
+    if current:
+        with open_segment(path) as f:
+            st = segment_stat(f)
+            index = load_line_index(path, st, f)
+            if index:
+                return index.total_lines(f, st.st_size)
+        return count_lines(path)
+    
+    data_st = core.resolve_segment(path).stat()
+    key = (data_st.st_ino, data_st.st_size, data_st.st_mtime)
+    cached = _segment_count_cache.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    
+    with open_segment(path) as f:
+        st = segment_stat(f)
+        index = load_line_index(path, st, f)
+        if index:
+            lines = index.total_lines(f, st.st_size)
+        elif st.st_size:
+            lines = core.count_newlines(f, 0, st.st_size)
+            f.seek(st.st_size - 1)
+            if f.read(1) != b'\n':
+                lines += 1
+        else:
+            lines = 0
+    
+    _segment_count_cache[path] = (key, lines)
+    return lines
 
 
-@app.route('/api/logs')
-@app.route('/api/logs/<int:page>')
-def api_logs(page: int = 1):
+def read_segment_page(f, path: Path, total_lines: int, skip: int, count: int) -> List[bytes]:
     """
-    API endpoint for log entries.
+    Read lines of one segment counting back from its end.
     
     Args:
-        page: Page number (1 = most recent)
+        f: Segment from open_segment()
+        path: Logical path of the segment
+        total_lines: Line count of the segment
+        skip: Newest lines to skip
+        count: Lines to return
+        
+    Returns:
+        Lines as bytes, newest first
     """
-    from flask import request
+    st = segment_stat(f)
+    index = load_line_index(path, st, f)
+    first_line = max(0, total_lines - skip - count)
     
-    lines_per_page = request.args.get('limit', 100, type=int)
-    lines_per_page = min(500, max(10, lines_per_page))  # Clamp between 10-500
+    if index and first_line < index.line_count:
+        page_lines = read_lines_at(f, index, first_line, total_lines - skip - first_line)
+        page_lines.reverse()
+        return page_lines
     
-    entries, total_lines, total_pages = read_log_tail(lines_per_page, page)
+    end = st.st_size
+    if isinstance(f, MappedSegment):
+        end = f.skip_lines_reverse(end, skip)
+        skip = 0
     
-    return jsonify({
-        'entries': entries,
-        'page': page,
-        'total_pages': total_pages,
-        'total_lines': total_lines,
-        'lines_per_page': lines_per_page
-    })
+    page_lines = []
+    for position, raw in enumerate(iter_lines_reverse(f, end)):
+        if position >= skip + count:
+            break
+        if position >= skip:
+            page_lines.append(raw)
+    return page_lines
+
+
+def read_log_tail(num_lines: int = 100, page: int = 1,
+                  stream: Optional[str] = None) -> Tuple[List[dict], int, int]:
+    """
+    Read the last N lines from the log file and its backups.
+    
+    This function reads the log files without locking them,
+    ensuring it doesn't interfere with the logging core.
+    The current file and its rotated backups are presented as
+    one newest-first stream. Only the segments holding the
+    requested page are opened, and only the blocks of those
+    segments that hold it are read and decoded.
+    
+    Args:
+        num_lines: Number of lines per page
+        page: Page number (1-based)
+        stream: Routed stream to read instead of the main log
+        
+    Returns:
+        Tuple of (log entries, total lines, total pages)
+    """
+    global config
+    
+    if config is None:
+        return [], 0, 0
+    
+    entries = []
+    
+    try:
+        segments = get_log_segments(stream)
+        if not segments:
+            return [], 0, 0
+        
+        log_path = get_query_log_path(stream)
+        counts = [segment_line_count(path, path == log_path) for path in segments]
+        parse = parse_record_line if log_path.suffix == '.jsonl' else parse_log_line
+        
+        total_lines = sum(counts)
+        total_pages = max(1, (total_lines + num_lines - 1) // num_lines)
+        
+        # Clamp page number
+        page = max(1, min(page, total_pages))
+        
+        # Page 1 = most recent entries
+        skip = (page - 1) * num_lines
+        remaining = num_lines
+        page_lines = []
+        
+        for path, count in zip(segments, counts):
+            if skip >= count:
+                skip -= count
+                continue
+            
+            take = min(remaining, count - skip)
+            with open_segment(path) as f:
+                page_lines.extend(read_segment_page(f, path, count, skip, take))
+            
+            remaining -= take
+            skip = 0
+            if remaining <= 0:
+                break
+        
+        for raw in page_lines:
+            line = raw.decode('utf-8', errors='replace').strip()
+            if not line:
+                continue
+            
+            entries.append(parse(line))
+        
+        return entries, total_lines, total_pages
+        
+    except (IOError, OSError) as e:
+        return [], 0, 0
+
+
+class QueryError(Exception):
+    """Raised when log query parameters are invalid."""
+    pass
+
+
+def parse_time_param(value: str) -> float:
+    """
+    Parse a since/until query parameter.
+    
+    Accepts a Unix timestamp, an ISO 8601 date and time
+    ("2024-01-15 02:10", "2024-01-15T02:10:00+07:00") or a time of
+    day ("02:10") meaning today. Values without a UTC offset are
+    in the server's local time.
+    
+    Args:
+        value: Parameter value
+        
+    Returns:
+        Unix timestamp
+        
+    Raises:
+        QueryError: If the value cannot be parsed
+    """
+    value = value.strip()
+    
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    
+    try:
+        if len(value) <= 8 and ':' in value:
+            parsed = datetime.combine(datetime.now().date(), dt_time.fromisoformat(value))
+        else:
+            parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise QueryError(f"Invalid time value: {value}")
+    
+    return parsed.timestamp()
+
+
+def split_filter(value: Optional[str], upper: bool = False) -> Optional[set]:
+    """
+    Split a comma-separated filter parameter into a set of byte strings.
+    
+    Args:
+        value: Parameter value, or None
+        upper: Upper-case the values (for level names)
+        
+    Returns:
+        Set of accepted values, or None if the filter is not set
+    """
+    if not value:
+        return None
+    items = [item.strip() for item in value.split(',') if item.strip()]
+    if upper:
+        items = [item.upper() for item in items]
+    return {item.encode('utf-8') for item in items}
+
+
+def line_timestamp(line: bytes) -> Optional[float]:
+    """
+    Get the Unix timestamp a text log line or structured record starts with.
+    
+    Args:
+        line: Raw log line
+        
+    Returns:
+        Timestamp, or None for lines without one (e.g. continuations)
+    """
+    if line[:6] == b'{"ts":':
+        try:
+            return float(line[6:line.index(b',', 6)])
+        except ValueError:
+            return None
+    
+    try:
+        return datetime.strptime(
+            line[:core.LOG_TIMESTAMP_WIDTH].decode('ascii'),
+            core.LOG_DATE_FORMAT
+        ).timestamp()
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def next_timestamped_line(f, offset: int, end: int) -> Tuple[int, Optional[float]]:
+    """
+    Find the first timestamped line starting at or after an offset.
+    
+    Args:
+        f: Log file opened in binary mode
+        offset: Any byte offset, not necessarily a line start
+        end: Offset to stop searching at
+        
+    Returns:
+        Tuple of (line start offset, timestamp), or (end, None)
+    """
+    if offset > 0:
+        # Step back one byte so a line starting exactly at offset is kept
+        f.seek(offset - 1)
+        position = offset - 1 + len(f.readline())
+    else:
+        f.seek(0)
+        position = 0
+    
+    while position < end:
+        line = f.readline()
+        if not line:
+            break
+        timestamp = line_timestamp(line)
+        if timestamp is not None:
+            return position, timestamp
+        position += len(line)
+    
+    return end, None
+
+
+def find_time_offset(f, start: int, end: int, target: float, after: bool = False) -> int:
+    """
+    Binary search a log file for the first line at or after a time.
+    
+    Relies on lines being written in timestamp order, so only a few
+    lines are read and parsed regardless of the file size.
+    
+    Args:
+        f: Log file opened in binary mode
+        start: Line start offset to search from
+        end: Offset to search up to
+        target: Unix timestamp to look for
+        after: Find the first line strictly after target instead
+        
+    Returns:
+        Offset of the first matching line, or end if there is none
+    """
+    def before_target(timestamp: float) -> bool:
+        return timestamp <= target if after else timestamp < target
+    
+    low, high = start, end
+    
+    while high - low > core.BISECT_LINEAR_BYTES:
+        middle = (low + high) // 2
+        position, timestamp = next_timestamped_line(f, middle, high)
+        if timestamp is not None and before_target(timestamp):
+            # Every line up to this one is too early
+            low = position + 1
+        else:
+            high = middle
+    
+    position = low
+    while position < end:
+        position, timestamp = next_timestamped_line(f, position, end)
+        if timestamp is None or not before_target(timestamp):
+            return position
+        position += 1
+    
+    return end
+
+
+def line_matches(line: bytes, levels: Optional[set], sources: Optional[set]) -> bool:
+    """
+    Check a raw log line against level and source filters.
+    
+    Only the fixed columns are split off; the message is not decoded.
+    
+    Args:
+        line: Raw log line
+        levels: Accepted upper-case level names, or None for any
+        sources: Accepted source names, or None for any
+        
+    Returns:
+        True if the line passes both filters
+    """
+    parts = line.split(b' | ', 3)
+    if len(parts) < 4:
+        return False
+    if levels is not None and parts[1].strip().upper() not in levels:
+        return False
+    if sources is not None and parts[2].strip() not in sources:
+        return False
+    return True
+
+
+def record_matches(line: bytes, levels: Optional[set], sources: Optional[set]) -> bool:
+    """
+    Check a structured (JSONL) record against level and source filters.
+    
+    Args:
+        line: Raw JSON line
+        levels: Accepted upper-case level names, or None for any
+        sources: Accepted source names, or None for any
+        
+    Returns:
+        True if the record passes both filters
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return False
+    if levels is not None and record.get('level', '').encode() not in levels:
+        return False
+    if sources is not None and record.get('source', '').encode() not in sources:
+        return False
+    return True
+
+
+def query_log(num_lines: int = 100, page: int = 1,
+              since: Optional[float] = None, until: Optional[float] = None,
+              levels: Optional[set] = None,
+              sources: Optional[set] = None,
+              stream: Optional[str] = None) -> Tuple[List[dict], int, int]:
+    """
+    Read a page of log lines matching time, level and source filters.
+    
+    The current file and its backups are searched newest first. In
+    each, the time window is located by binary search on the
+    timestamps; segments entirely before `since` are never opened.
+    Lines inside the window are streamed newest first, so memory stays
+    bounded by the page size, and only the returned lines are parsed.
+    
+    Args:
+        num_lines: Number of lines per page
+        page: Page number (1-based, 1 = most recent matches)
+        since: Earliest timestamp to include
+        until: Latest timestamp to include
+        levels: Accepted upper-case level names as bytes
+        sources: Accepted source names as bytes
+        stream: Routed stream to read instead of the main log
+        
+    Returns:
+        Tuple of (log entries, total matching lines, total pages)
+    """
+    global config
+    
+    if config is None:
+        return [], 0, 0
+    
+    page = max(1, page)
+    skip = (page - 1) * num_lines
+    page_lines = []
+    # Oldest matches seen, for a page past the last one
+    last_lines = deque(maxlen=num_lines)
+    matched = 0
+    
+    if get_query_log_path(stream).suffix == '.jsonl':
+        matches, parse = record_matches, parse_record_line
+    else:
+        matches, parse = line_matches, parse_log_line
+    
+    try:
+        for path in get_log_segments(stream):
+            with open_segment(path) as f:
+                end = segment_stat(f).st_size
+                start = 0
+                
+                if since is not None:
+                    start = find_time_offset(f, 0, end, since)
+                if until is not None:
+                    end = find_time_offset(f, start, end, until, after=True)
+                
+                for raw in iter_lines_reverse(f, end, start=start):
+                    if not raw.strip() or not matches(raw, levels, sources):
+                        continue
+                    if skip <= matched < skip + num_lines:
+                        page_lines.append(raw)
+                    last_lines.append(raw)
+                    matched += 1
+            
+            if start > 0:
+                # Older segments end before `since`
+                break
+    except (IOError, OSError):
+        return [], 0, 0
+    
+    total_pages = max(1, (matched + num_lines - 1) // num_lines)
+    
+    # Clamp page number
+    if page > total_pages:
+        last_page = matched - (total_pages - 1) * num_lines
+        page_lines = list(last_lines)[len(last_lines) - last_page:]
+    
+    entries = [
+        parse(raw.decode('utf-8', errors='replace').strip())
+        for raw in page_lines
+    ]
+    
+    return entries, matched, total_pages
+
+
+# Seconds between two checks of the followed log file
+FOLLOW_POLL_INTERVAL = 0.5
+
+# Largest backlog replayed to a reconnecting stream client
+STREAM_RESUME_MAX_BYTES = 1024 * 1024
+
+# Batches buffered per stream client before the oldest are dropped
+STREAM_QUEUE_SIZE = 256
+
+
+class LogFollower:
+    """
+    Follow the log file and fan new lines out to stream subscribers.
+    
+    One follower thread per worker process reads each appended byte
+    once, however many viewers are connected. The file is checked with
+    a cheap stat every FOLLOW_POLL_INTERVAL; after a rollover the old
+    file is drained through the still-open descriptor before the new
+    file is opened, so no line is lost across rotation.
+    """
+    
+    def __init__(self, log_path: Path):
+        """
+        Initialize the follower.
+        
+        Args:
+            log_path: Path to the log file to follow
+        """
+        self.log_path = log_path
+        self.inode = None
+        self.offset = 0
+        self._file = None
+        self._carry = b''
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def subscribe(self) -> Tuple[queue.Queue, Optional[int], int]:
+        """
+        Register a subscriber and start following if needed.
+        
+        Returns:
+            Tuple of (batch queue, inode, offset of the end of the last
+            complete line) at subscription time
+        """
+        subscriber = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+        
+        with self._lock:
+            if self._thread is None:
+                self._open(at_end=True)
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='leuitlog-follower',
+                    daemon=True
+                )
+                self._thread.start()
+            self._subscribers.add(subscriber)
+            return subscriber, self.inode, self.line_offset
+    
+    @property
+    def line_offset(self) -> int:
+        """Offset just past the last complete line read."""
+        # Bytes of a partial line are read but not yet published
+        return self.offset - len(self._carry)
+    
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        """Remove a subscriber; the thread stops with the last one."""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+    
+    def _open(self, at_end: bool) -> None:
+        """Open the current log file and position the read offset."""
+        if self._file:
+            self._file.close()
+            self._file = None
+        
+        self._carry = b''
+        try:
+            self._file = open(self.log_path, 'rb')
+        except OSError:
+            self.inode = None
+            self.offset = 0
+            return
+        
+        st = os.fstat(self._file.fileno())
+        self.inode = st.st_ino
+        self.offset = st.st_size if at_end else 0
+    
+    def _read_new(self) -> List[bytes]:
+        """Read complete lines appended since the last read."""
+        if not self._file:
+            return []
+        
+        self._file.seek(self.offset)
+        data = self._file.read()
+        if not data:
+            return []
+        
+        self.offset += len(data)
+        lines = (self._carry + data).split(b'\n')
+        self._carry = lines.pop()
+        return lines
+    
+    def _poll(self) -> List[bytes]:
+        """Collect new lines, following rotation and truncation."""
+        lines = self._read_new()
+        
+        try:
+            st = os.stat(self.log_path)
+        except OSError:
+            # Between rename and reopen during rotation
+            return lines
+        
+        if st.st_ino != self.inode:
+            # Rotated: the old file was drained above, start the new one
+            if self._carry:
+                lines.append(self._carry)
+            self._open(at_end=False)
+            lines.extend(self._read_new())
+        elif st.st_size < self.offset:
+            # Truncated in place
+            self._open(at_end=False)
+            lines.extend(self._read_new())
+        
+        return lines
+    
+    def _run(self) -> None:
+        """Poll the file and publish batches while anyone is subscribed."""
+        while True:
+            time.sleep(FOLLOW_POLL_INTERVAL)
+            
+            with self._lock:
+                if not self._subscribers:
+                    if self._file:
+                        self._file.close()
+                        self._file = None
+                    self._thread = None
+                    return
+                
+                lines = [line for line in self._poll() if line.strip()]
+                if not lines:
+                    continue
+                
+                batch = (self.inode, self.line_offset, lines)
+                for subscriber in self._subscribers:
+                    try:
+                        subscriber.put_nowait(batch)
+                    except queue.Full:
+                        # Slow client: drop its oldest batch
+                        try:
+                            subscriber.get_nowait()
+                        except queue.Empty:
+                            pass
+                        subscriber.put_nowait(batch)
+
+
+_follower = None
+_follower_lock = threading.Lock()
+
+
+def get_follower() -> Optional[LogFollower]:
+    """
+    Get this worker's shared log follower.
+    
+    Returns:
+        LogFollower for the configured log file, or None without config
+    """
+    global _follower
+    
+    if config is None:
+        return None
+    
+    with _follower_lock:
+        if _follower is None:
+            log_dir = Path(config['logging']['log_dir']).expanduser()
+            _follower = LogFollower(log_dir / config['logging']['log_file'])
+        return _follower
+
+
+def read_resume_lines(log_path: Path, last_event_id: str, inode: Optional[int],
+                      offset: int) -> List[bytes]:
+    """
+    Read lines a reconnecting stream client missed.
+    
+    Args:
+        log_path: Path to the log file
+        last_event_id: Last-Event-ID header ("<inode>:<offset>")
+        inode: Inode the follower is reading
+        offset: Follower offset at subscription time
+        
+    Returns:
+        Complete lines between the client's and the follower's offset
+    """
+    try:
+        client_inode, client_offset = (int(part) for part in last_event_id.split(':'))
+    except ValueError:
+        return []
+    
+    if client_inode != inode or not 0 <= client_offset < offset:
+        return []
+    if offset - client_offset > STREAM_RESUME_MAX_BYTES:
+        return []
+    
+    try:
+        with open(log_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_ino != inode:
+                return []
+            f.seek(client_offset)
+            data = f.read(offset - client_offset)
+    except OSError:
+        return []
+    
+    return [line for line in data.split(b'\n')[:-1] if line.strip()]
+
+
+def line_has_tokens(line: bytes, tokens: set) -> bool:
+    """
+    Check if a raw log line contains all search tokens.
+    
+    Args:
+        line: Raw log line
+        tokens: Tokens from core.tokenize()
+        
+    Returns:
+        True if every token occurs in the line
+    """
+    return tokens <= core.tokenize(line[core.LOG_TIMESTAMP_WIDTH:])
+
+
+# Token indexes by segment path; each keeps the postings of a segment
+# that is not compacted yet in memory and extends them as it grows
+_token_indexes = {}
+_token_indexes_lock = threading.Lock()
+
+
+def lookup_blocks(path: Path, line_index: 'core.LineIndex', tokens: set) -> Optional[Tuple[set, int]]:
+    """
+    Find the line-index blocks that may hold lines with all tokens.
+    
+    Args:
+        path: Logical path of the segment
+        line_index: Valid line index of the segment
+        tokens: Tokens from core.tokenize()
+        
+    Returns:
+        Tuple of (block numbers, bytes covered by the token index), or
+        None if the segment has no usable token index
+    """
+    with _token_indexes_lock:
+        token_index = _token_indexes.get(path)
+        if token_index is None:
+            token_index = _token_indexes[path] = core.TokenIndex(path)
+        if not (token_index.load() and token_index.matches(line_index)):
+            return None
+        
+        blocks = None
+        for token in tokens:
+            found = token_index.lookup(token)
+            blocks = found if blocks is None else blocks & found
+            if not blocks:
+                break
+        return blocks or set(), token_index.indexed_size
+
+
+def search_segment(f, path: Path, tokens: set, limit: int) -> List[bytes]:
+    """
+    Find lines containing all tokens in one log segment, newest first.
+    
+    Uses the segment's token index when it is valid; lines appended
+    after the last index update and segments without an index are
+    scanned directly.
+    
+    Args:
+        f: Segment from open_segment()
+        path: Logical path of the segment
+        tokens: Tokens from core.tokenize()
+        limit: Stop after this many matches
+        
+    Returns:
+        Matching raw lines, newest first
+    """
+    st = segment_stat(f)
+    matches = []
+    
+    line_index = core.LineIndex(path)
+    found = None
+    if line_index.load() and line_index.matches(st, f):
+        found = lookup_blocks(path, line_index, tokens)
+    if found is None:
+        # No usable index: scan the whole segment
+        for raw in iter_lines_reverse(f, st.st_size):
+            if line_has_tokens(raw, tokens):
+                matches.append(raw)
+                if len(matches) >= limit:
+                    break
+        return matches
+    
+    # Candidate blocks contain every token somewhere
+    blocks, indexed_size = found
+    
+    # Lines written since the last index update
+    for raw in iter_lines_reverse(f, st.st_size, start=indexed_size):
+        if line_has_tokens(raw, tokens):
+            matches.append(raw)
+            if len(matches) >= limit:
+                return matches
+    
+    offsets = line_index.offsets
+    for block in sorted(blocks, reverse=True):
+        start = offsets[block]
+        end = offsets[block + 1] if block + 1 < len(offsets) else indexed_size
+        end = min(end, indexed_size)
+        if start >= end:
+            continue
+        
+        f.seek(start)
+        for raw in reversed(f.read(end - start).split(b'\n')[:-1]):
+            if line_has_tokens(raw, tokens):
+                matches.append(raw)
+                if len(matches) >= limit:
+                    return matches
+    
+    return matches
+
+
+def search_logs(query: str, num_lines: int = 100, page: int = 1) -> Tuple[List[dict], bool]:
+    """
+    Search the current log file and its backups for lines with all query tokens.
+    
+    Args:
+        query: Search text; every token in it must occur in a line
+        num_lines: Number of lines per page
+        page: Page number (1-based, 1 = most recent matches)
+        
+    Returns:
+        Tuple of (log entries, whether more matches exist)
+    """
+    global config
+    
+    if config is None:
+        return [], False
+    
+    tokens = core.tokenize(query.encode('utf-8'))
+    if not tokens:
+        return [], False
+    
+    log_dir = Path(config['logging']['log_dir']).expanduser()
+    log_path = log_dir / config['logging']['log_file']
+    backup_count = int(config['logging']['backup_count'])
+    
+    page = max(1, page)
+    # One extra match tells whether another page exists
+    wanted = page * num_lines + 1
+    matches = []
+    
+    for path in core.segment_paths(log_path, backup_count):
+        try:
+            with open_segment(path) as f:
+                matches.extend(search_segment(f, path, tokens, wanted - len(matches)))
+        except (IOError, OSError):
+            continue
+        if len(matches) >= wanted:
+            break
+    
+    entries = [
+        parse_log_line(raw.decode('utf-8', errors='replace').strip())
+        for raw in matches[(page - 1) * num_lines:page * num_lines]
+        if raw.strip()
+    ]
+    
+    return entries, len(matches) > page * num_lines
+
+
+def parse_log_line(line: str) -> dict:
+    """
+    Parse a log line into structured data.
+    
+    Expected format:
+    2024-01-15 10:30:45 +0000 | INFO     | source          | message
+    
+    Args:
+        line: Raw log line
+        
+    Returns:
+        Dictionary with parsed fields
+    """
+    entry = {
+        'timestamp': '',
+        'level': 'INFO',
+        'source': '',
+        'message': line,
+        'raw': line
+    }
+    
+    try:
+        parts = line.split(' | ', 3)
+        if len(parts) >= 4:
+            entry['timestamp'] = parts[0].strip()
+            entry['level'] = parts[1].strip()
+            entry['source'] = parts[2].strip()
+            entry['message'] = parts[3].strip()
+        elif len(parts) >= 3:
+            entry['timestamp'] = parts[0].strip()
+            entry['level'] = parts[1].strip()
+            entry['message'] = parts[2].strip()
+    except Exception:
+        pass
+    
+    return entry
+
+
+def parse_record_line(line: str) -> dict:
+    """
+    Convert a structured (JSONL) record into a log entry.
+    
+    Fields are read as written by the daemon, so messages containing
+    ' | ' or other separators come back intact.
+    
+    Args:
+        line: Raw JSON line
+        
+    Returns:
+        Dictionary with the same fields as parse_log_line()
+    """
+    try:
+        record = json.loads(line)
+        return {
+            'timestamp': datetime.fromtimestamp(record['ts']).astimezone().strftime(
+                core.LOG_DATE_FORMAT
+            ),
+            'level': record.get('level', 'INFO'),
+            'source': record.get('source', ''),
+            'message': record.get('message', ''),
+            'raw': line
+        }
+    except (ValueError, KeyError, TypeError):
+        return parse_log_line(line)
+
+
+# Rendered API responses kept per worker process
+RESPONSE_CACHE_SIZE = 64
+
+
+class ResponseCache:
+    """
+    LRU of rendered JSON responses keyed on the state of the log files.
+    
+    Keys include the (inode, size, mtime) of the files a response was
+    read from, so any write or rotation yields a new key and stale
+    entries simply age out. Concurrent requests for a key that is
+    being rendered wait for that render instead of repeating it.
+    """
+    
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            max_entries: Maximum number of responses kept
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._rendering = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: tuple, render) -> bytes:
+        """
+        Get a cached response body, rendering it once on a miss.
+        
+        Args:
+            key: Hashable cache key
+            render: Callable returning the response body
+            
+        Returns:
+            Response body
+        """
+        while True:
+            with self._lock:
+                body = self._entries.get(key)
+                if body is not None:
+                    self._entries.move_to_end(key)
+                    return body
+                
+                done = self._rendering.get(key)
+                if done is None:
+                    done = self._rendering[key] = threading.Event()
+                    break
+            
+            # Another request renders this key; use its result
+            done.wait()
+        
+        try:
+            body = render()
+            with self._lock:
+                self._entries[key] = body
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return body
+        finally:
+            with self._lock:
+                del self._rendering[key]
+            done.set()
+    
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        with self._lock:
+            self._entries.clear()
+
+
+_response_cache = ResponseCache()
+
+
+def file_state(path: Path) -> Tuple[int, int, int]:
+    """
+    Get the (inode, size, mtime) of a file for cache keys and ETags.
+    
+    Args:
+        path: File path
+        
+    Returns:
+        State tuple, all zero if the file does not exist
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (0, 0, 0)
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def cached_json(key: tuple, render) -> Response:
+    """
+    Build a conditional JSON response from the response cache.
+    
+    The ETag is derived from the cache key; a request whose
+    If-None-Match carries it gets a 304 without reading any log.
+    
+    Args:
+        key: Cache key including the file states the data depends on
+        render: Callable returning the data to serialize on a miss
+        
+    Returns:
+        JSON or 304 response
+    """
+    from flask import request
+    
+    etag = hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest()
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(
+            _response_cache.get(key, lambda: jsonify(render()).get_data()),
+            mimetype='application/json'
+        )
+    
+    response.set_etag(etag)
+    # Revalidate on every request instead of reusing a stale copy
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@app.route('/')
+def index():
+    """Render the main log viewer page."""
+    status = get_service_status()
+    status['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return render_template('index.html', status=status)
+
+
+@app.route('/api/status')
+def api_status():
+    """API endpoint for service status."""
+    if config is None:
+        return jsonify(get_service_status())
+    
+    pid_file = Path(config['service']['pid_file']).expanduser()
+    log_path = Path(config['logging']['log_dir']).expanduser() / config['logging']['log_file']
+    key = ('status', file_state(log_path), file_state(pid_file), read_running_pid(pid_file))
+    
+    return cached_json(key, get_service_status)
+
+
+@app.route('/api/metrics')
+def api_metrics():
+    """API endpoint for daemon metrics in Prometheus text format."""
+    return Response(
+        render_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+@app.route('/api/stats')
+def api_stats():
+    """
+    API endpoint for per-minute level and source counts.
+    
+    Served from the daemon's stats file without reading any log.
+    
+    Query parameters:
+        minutes: Window length ending now (default 60)
+        limit: Number of top sources (default 10)
+    """
+    from flask import request
+    
+    if config is None:
+        return jsonify({'error': 'Configuration not loaded'}), 503
+    
+    stats_path = core.stats_file_path(config)
+    if stats_path is None:
+        return jsonify({'error': 'Statistics are disabled (stats_interval = 0)'}), 404
+    
+    retention_hours = config.getfloat('service', 'stats_retention_hours', fallback=24)
+    minutes = request.args.get('minutes', 60, type=int)
+    minutes = min(int(retention_hours * 60), max(1, minutes))
+    limit = min(100, max(1, request.args.get('limit', 10, type=int)))
+    now = time.time()
+    
+    def render() -> dict:
+        try:
+            with open(stats_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+        return summarize_stats(data, minutes, limit, now)
+    
+    # The window moves with the clock, one key per minute
+    key = ('stats', file_state(stats_path), minutes, limit, int(now) // 60)
+    return cached_json(key, render)
+
+
+@app.route('/api/logs')
+@app.route('/api/logs/<int:page>')
+def api_logs(page: int = 1):
+    """
+    API endpoint for log entries.
+    
+    Args:
+        page: Page number (1 = most recent)
+    """
+    from flask import request
+    
+    lines_per_page = request.args.get('limit', 100, type=int)
+    lines_per_page = min(500, max(10, lines_per_page))  # Clamp between 10-500
+    
+    if config is None:
+        return jsonify({
+            'entries': [],
+            'page': page,
+            'total_pages': 0,
+            'total_lines': 0,
+            'lines_per_page': lines_per_page
+        })
+    
+    # Routed stream to page through instead of the main log
+    stream = request.args.get('stream') or None
+    if stream and not (core.STREAM_NAME.match(stream)
+                       and core.resolve_segment(get_query_log_path(stream)) is not None):
+        return jsonify({'error': f'Unknown stream: {stream}'}), 404
+    
+    filters = {
+        key: request.args[key]
+        for key in ('since', 'until', 'level', 'source')
+        if request.args.get(key)
+    }
+    
+    since = until = levels = sources = None
+    if filters:
+        try:
+            since = parse_time_param(filters['since']) if 'since' in filters else None
+            until = parse_time_param(filters['until']) if 'until' in filters else None
+        except QueryError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        levels = split_filter(filters.get('level'), upper=True)
+        sources = split_filter(filters.get('source'))
+    
+    def render() -> dict:
+        if filters:
+            entries, total_lines, total_pages = query_log(
+                lines_per_page, page, since, until, levels, sources, stream
+            )
+        else:
+            entries, total_lines, total_pages = read_log_tail(lines_per_page, page, stream)
+        
+        response = {
+            'entries': entries,
+            'page': page,
+            'total_pages': total_pages,
+            'total_lines': total_lines,
+            'lines_per_page': lines_per_page
+        }
+        if filters:
+            response['filters'] = filters
+        if stream:
+            response['stream'] = stream
+        return response
+    
+    # Rotation replaces the current file, so its state covers the
+    # backups; retention removes the oldest backups without touching
+    # it, but every removal changes the directory's mtime
+    log_path = get_query_log_path(stream)
+    key = (
+        'logs', stream, file_state(log_path), file_state(log_path.parent)[2],
+        page, lines_per_page,
+        since, until, tuple(sorted(levels or ())), tuple(sorted(sources or ())),
+        tuple(sorted(filters.items()))
+    )
+    return cached_json(key, render)
+
+
+@app.route('/api/streams')
+def api_streams():
+    """API endpoint listing the routed streams."""
+    if config is None:
+        return jsonify({'streams': []})
+    return jsonify({'streams': list_streams()})
+
+
+@app.route('/api/search')
+def api_search():
+    """
+    API endpoint for full-text search across current and rotated logs.
+    
+    Query parameters:
+        q: Search text
+        page: Page number (1 = most recent matches)
+        limit: Entries per page
+    """
+    from flask import request
+    
+    query = request.args.get('q', '').strip()
+    page = max(1, request.args.get('page', 1, type=int))
+    lines_per_page = request.args.get('limit', 100, type=int)
+    lines_per_page = min(500, max(10, lines_per_page))  # Clamp between 10-500
+    
+    if not query:
+        return jsonify({'error': 'Missing search query (q)'}), 400
+    
+    entries, has_more = search_logs(query, lines_per_page, page)
+    
+    return jsonify({
+        'query': query,
+        'entries': entries,
+        'page': page,
+        'has_more': has_more,
+        'lines_per_page': lines_per_page
+    })
+
+
+@app.route('/api/stream')
+def api_stream():
+    """
+    Server-Sent Events stream of new log lines.
+    
+    Query parameters:
+        level: Comma-separated level names to include
+        source: Comma-separated sources to include
+    
+    Each event carries one entry as JSON; event ids allow a
+    reconnecting client to receive the lines it missed.
+    """
+    from flask import request
+    
+    follower = get_follower()
+    if follower is None:
+        return jsonify({'error': 'Configuration not loaded'}), 503
+    
+    levels = split_filter(request.args.get('level'), upper=True)
+    sources = split_filter(request.args.get('source'))
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    max_seconds = 300
+    if 'webui' in config:
+        max_seconds = config.getint('webui', 'stream_max_seconds', fallback=300)
+    
+    subscriber, inode, offset = follower.subscribe()
+    
+    def format_events(lines: List[bytes], event_id: str) -> str:
+        events = [
+            f"data: {json.dumps(parse_log_line(raw.decode('utf-8', errors='replace').strip()))}\n"
+            for raw in lines
+            if (levels is None and sources is None) or line_matches(raw, levels, sources)
+        ]
+        if not events:
+            return ''
+        # The id goes on the last event so a resume starts after the batch
+        events[-1] = f"id: {event_id}\n" + events[-1]
+        return '\n'.join(events) + '\n'
+    
+    def generate():
+        try:
+            yield 'retry: 2000\n\n'
+            
+            if last_event_id:
+                missed = read_resume_lines(follower.log_path, last_event_id, inode, offset)
+                events = format_events(missed, f"{inode}:{offset}")
+                if events:
+                    yield events
+            
+            deadline = time.monotonic() + max_seconds
+            while time.monotonic() < deadline:
+                try:
+                    batch_inode, batch_offset, lines = subscriber.get(timeout=15)
+                except queue.Empty:
+                    # Keep proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                    continue
+                events = format_events(lines, f"{batch_inode}:{batch_offset}")
+                if events:
+                    yield events
+        finally:
+            follower.unsubscribe(subscriber)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
 @app.context_processor
@@ -0,0 +1,45 @@
+"""
+Shared fixtures for the LeuitLog test suite.
+"""
+
+import sys
+import logging
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+
+@pytest.fixture
+def logger():
+    """Logger that records what it is given instead of writing it."""
+    class Collector(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.records = []
+
+        def emit(self, record):
+            self.records.append(record)
+
+    log = logging.getLogger('leuitlog.test')
+    log.propagate = False
+    log.setLevel(logging.DEBUG)
+    collector = Collector()
+    log.addHandler(collector)
+    log.records = collector.records
+    yield log
+    log.removeHandler(collector)
+
+
+@pytest.fixture
+def webui_config(tmp_path, monkeypatch):
+    """Web UI configured with a log directory and PID file under tmp_path."""
+    webui = pytest.importorskip('leuitlog_webui')
+    config = webui.load_config(str(Path(__file__).resolve().parent.parent / 'config' / 'leuitlog.conf'))
+    config['logging']['log_dir'] = str(tmp_path / 'log')
+    config['service']['pid_file'] = str(tmp_path / 'leuitlog.pid')
+    (tmp_path / 'log').mkdir()
+    monkeypatch.setattr(webui, 'config', config)
+    webui._response_cache.clear()
+    return config
@@ -0,0 +1,108 @@
+"""
+Tests for the write queue and its overflow policies.
+"""
+
+import logging
+import threading
+
+import pytest
+
+import leuitlog_core as core
+
+
+class BlockingTarget(logging.Handler):
+    """Keeps what it is given; holds the writer on the first record until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.started = threading.Event()
+        self.unblock = threading.Event()
+
+    def emit(self, record):
+        self.started.set()
+        self.unblock.wait(5)
+        self.messages.append(record.getMessage())
+
+
+def make_record(message):
+    record = logging.LogRecord('leuitlog', logging.INFO, __file__, 0, message, None, None)
+    record.source = '192.0.2.1'
+    return record
+
+
+@pytest.fixture
+def stalled():
+    """Queue of two records whose writer is stuck on record 0."""
+    handlers = []
+
+    def build(policy):
+        target = BlockingTarget()
+        handler = core.AsyncLogHandler(target, max_queue=2, overflow_policy=policy)
+        handlers.append(handler)
+        handler.handle(make_record('0'))
+        assert target.started.wait(5)
+        return handler, target
+
+    yield build
+    for handler in handlers:
+        handler.target.unblock.set()
+        handler.close()
+
+
+def test_drop_newest_discards_incoming_records(stalled):
+    handler, target = stalled('drop-newest')
+    for number in range(1, 5):
+        handler.handle(make_record(str(number)))
+    target.unblock.set()
+    handler.close()
+
+    assert target.messages == [
+        '0', 'Write queue full, dropped 2 message(s) (policy: drop-newest)', '1', '2'
+    ]
+    assert handler.dropped == 2
+
+
+def test_drop_oldest_discards_queued_records(stalled):
+    handler, target = stalled('drop-oldest')
+    for number in range(1, 5):
+        handler.handle(make_record(str(number)))
+    target.unblock.set()
+    handler.close()
+
+    assert [message for message in target.messages if 'dropped' not in message] == ['0', '3', '4']
+    assert handler.dropped == 2
+
+
+def test_block_waits_for_room(stalled):
+    handler, target = stalled('block')
+    handler.handle(make_record('1'))
+    handler.handle(make_record('2'))
+    blocked = threading.Thread(target=handler.handle, args=(make_record('3'),))
+    blocked.start()
+    blocked.join(0.1)
+    assert blocked.is_alive()
+
+    target.unblock.set()
+    blocked.join(5)
+    handler.close()
+
+    assert target.messages == ['0', '1', '2', '3']
+    assert handler.dropped == 0
+
+
+def test_overfill_thread_is_never_dropped(stalled):
+    handler, target = stalled('drop-newest')
+    handler.allow_overfill(threading.get_ident())
+    for number in range(1, 5):
+        handler.handle(make_record(str(number)))
+    assert handler.headroom() == 0
+    target.unblock.set()
+    handler.close()
+
+    assert target.messages == ['0', '1', '2', '3', '4']
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(core.ConfigError):
+        core.AsyncLogHandler(BlockingTarget(), overflow_policy='spill')
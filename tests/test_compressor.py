@@ -0,0 +1,43 @@
+"""
+Tests for the background compressor of rotated segments.
+"""
+
+import time
+
+import leuitlog_core as core
+
+
+def test_compressor_survives_a_failing_job(tmp_path, monkeypatch, caplog):
+    log_path = tmp_path / 'leuitlog.log'
+    backup = tmp_path / 'leuitlog.log.1'
+    backup.write_bytes(b'line\n' * 100)
+    compressor = core.SegmentCompressor(log_path, 2, codec='gzip')
+    failures = []
+
+    def broken(codec, data):
+        failures.append(codec)
+        raise ValueError('codec failure')
+
+    monkeypatch.setattr(core, 'compress_frame', broken)
+    compressor.start()
+    try:
+        for _ in range(100):
+            if failures:
+                break
+            time.sleep(0.01)
+        assert failures
+        assert compressor._thread.is_alive()
+
+        monkeypatch.undo()
+        compressor.submit(backup)
+        for _ in range(200):
+            if backup.with_name('leuitlog.log.1.gz').exists():
+                break
+            time.sleep(0.01)
+    finally:
+        compressor.stop()
+
+    assert not backup.exists()
+    with core.open_segment(backup) as f:
+        assert f.read() == b'line\n' * 100
+    assert 'Cannot compress log segment' in caplog.text
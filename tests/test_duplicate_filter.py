@@ -0,0 +1,75 @@
+"""
+Tests for folding repeated messages into summaries.
+"""
+
+import logging
+
+import pytest
+
+import leuitlog_core as core
+
+
+def make_record(message, created, source='192.0.2.1'):
+    record = logging.LogRecord('leuitlog', logging.INFO, __file__, 0, message, None, None)
+    record.created = created
+    record.source = source
+    return record
+
+
+@pytest.fixture
+def folded(logger):
+    duplicate_filter = core.DuplicateFilter(logger, window=30, max_repeats=3)
+    logger.addFilter(duplicate_filter)
+    yield duplicate_filter
+    logger.removeFilter(duplicate_filter)
+
+
+def messages(logger):
+    return [record.getMessage() for record in logger.records]
+
+
+def test_repeats_are_folded_until_the_source_changes_message(logger, folded):
+    for offset in range(3):
+        logger.handle(make_record('link down', 1000.0 + offset))
+    logger.handle(make_record('link up', 1010.0))
+
+    assert messages(logger)[0] == 'link down'
+    assert messages(logger)[1].startswith('message repeated 2 times, last at ')
+    assert messages(logger)[1].endswith(': [link down]')
+    assert messages(logger)[2] == 'link up'
+    assert folded.suppressed == 2
+
+
+def test_summary_is_stamped_when_logged(logger, folded):
+    logger.handle(make_record('link down', 1000.0))
+    logger.handle(make_record('link down', 1001.0))
+    logger.handle(make_record('other host', 1020.0, source='192.0.2.2'))
+    folded.flush_expired(now=1040.0)
+
+    created = [record.created for record in logger.records]
+    assert created == sorted(created)
+    assert logger.records[-1].created == 1040.0
+    assert logger.records[-1].last_repeat == 1001.0
+
+
+def test_max_repeats_starts_a_new_run(logger, folded):
+    for offset in range(6):
+        logger.handle(make_record('link down', 1000.0 + offset))
+    folded.flush()
+
+    assert messages(logger)[0] == 'link down'
+    assert messages(logger)[1].startswith('message repeated 3 times')
+    assert messages(logger)[2] == 'link down'
+    assert messages(logger)[3].startswith('message repeated 1 times')
+    assert [getattr(record, 'repeat_count', 0) for record in logger.records] == [0, 3, 0, 1]
+
+
+def test_sources_are_folded_separately(logger, folded):
+    logger.handle(make_record('same', 1000.0, source='a'))
+    logger.handle(make_record('same', 1000.5, source='b'))
+    logger.handle(make_record('same', 1001.0, source='a'))
+    folded.flush()
+
+    assert messages(logger)[:2] == ['same', 'same']
+    assert len(logger.records) == 3
+    assert logger.records[2].source == 'a'
@@ -0,0 +1,82 @@
+"""
+Tests for the buffered log file handler.
+"""
+
+import logging
+
+import leuitlog_core as core
+
+
+def make_record(message):
+    record = logging.LogRecord('leuitlog', logging.INFO, __file__, 0, message, None, None)
+    record.source = '192.0.2.1'
+    return record
+
+
+def test_flush_without_a_write_leaves_nothing_to_sync(tmp_path):
+    handler = core.LeuitFileHandler(tmp_path / 'leuitlog.log', buffer_size=4096,
+                                    fsync='interval', flush_thread=False)
+    try:
+        handler.handle(make_record('first'))
+        handler.flush()
+        handler._sync()
+        handler.flush()
+        assert not handler._dirty
+
+        handler.handle(make_record('second'))
+        handler.flush()
+        assert handler._dirty
+    finally:
+        handler.close()
+
+
+def test_poll_logs_a_failing_flush_once(tmp_path, monkeypatch, caplog):
+    handler = core.LeuitFileHandler(tmp_path / 'leuitlog.log', buffer_size=4096,
+                                    flush_interval=1e-6, flush_thread=False)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    handler.handle(make_record('first'))
+
+    def broken(data):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(handler.stream, 'write', broken)
+    try:
+        with caplog.at_level(logging.ERROR, logger='leuitlog'):
+            handler.poll()
+            handler.handle(make_record('second'))
+            handler.poll()
+        messages = [record.getMessage() for record in caplog.records]
+        assert messages == [f'Cannot flush {handler.baseFilename}: disk full']
+    finally:
+        monkeypatch.undo()
+        handler.close()
+
+
+def test_failed_write_keeps_the_buffer(tmp_path, monkeypatch):
+    log_path = tmp_path / 'leuitlog.log'
+    handler = core.LeuitFileHandler(log_path, buffer_size=4096, flush_thread=False)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    record = make_record('first')
+    record.write_seq = core.write_progress.issue()
+    handler.handle(record)
+    core.write_progress.release(record.write_seq)
+
+    def broken(data):
+        raise OSError('disk full')
+
+    try:
+        monkeypatch.setattr(handler.stream, 'write', broken)
+        try:
+            handler.flush()
+        except OSError:
+            pass
+        monkeypatch.undo()
+        assert core.write_progress.position() < record.write_seq
+
+        handler.handle(make_record('second'))
+        handler.flush()
+        assert core.write_progress.position() >= record.write_seq
+    finally:
+        handler.close()
+
+    assert log_path.read_text() == 'first\nsecond\n'
@@ -0,0 +1,125 @@
+"""
+Tests for saving the journal cursor once entries are written.
+"""
+
+import logging
+
+import pytest
+
+import leuitlog_core as core
+
+
+class FakeJournal:
+    def __init__(self, entries):
+        self.entries = list(entries)
+
+    def get_next(self):
+        return self.entries.pop(0) if self.entries else {}
+
+
+@pytest.fixture
+def file_logger(tmp_path):
+    handler = core.LeuitFileHandler(tmp_path / 'leuitlog.log', buffer_size=1 << 20,
+                                    flush_thread=False)
+    handler.setFormatter(logging.Formatter(core.LOG_FORMAT, datefmt=core.LOG_DATE_FORMAT))
+    log = logging.getLogger('leuitlog.test.journal')
+    log.propagate = False
+    log.setLevel(logging.DEBUG)
+    log.addHandler(handler)
+    log.file_handler = handler
+    yield log
+    log.removeHandler(handler)
+    handler.close()
+
+
+def make_reader(logger, cursor_path, entries):
+    reader = core.JournalReader(logger, cursor_path=cursor_path)
+    reader.journal = FakeJournal(entries)
+    reader._available = True
+    return reader
+
+
+def test_cursor_is_saved_once_entries_are_written(tmp_path, file_logger):
+    cursor_path = tmp_path / 'journal.cursor'
+    reader = make_reader(file_logger, cursor_path, [
+        {'__CURSOR': 'c1', 'MESSAGE': 'first', 'SYSLOG_IDENTIFIER': 'sshd'},
+        {'__CURSOR': 'c2', 'MESSAGE': 'second', 'SYSLOG_IDENTIFIER': 'sshd'},
+        {'__CURSOR': 'c3', 'MESSAGE': ''},
+    ])
+
+    assert reader.process_entries() == 2
+    reader.save_cursor()
+    assert not cursor_path.exists()
+
+    file_logger.file_handler.flush()
+    reader.save_cursor()
+    assert cursor_path.read_text() == 'c3\n'
+
+
+def test_cursor_stops_at_the_oldest_buffered_entry(tmp_path, file_logger):
+    other = core.LeuitFileHandler(tmp_path / 'other.log', buffer_size=1 << 20,
+                                  flush_thread=False)
+    file_logger.addHandler(other)
+    try:
+        reader = make_reader(file_logger, tmp_path / 'journal.cursor', [
+            {'__CURSOR': 'c1', 'MESSAGE': 'first'},
+        ])
+        reader.process_entries()
+        other.flush()
+        reader.journal.entries.append({'__CURSOR': 'c2', 'MESSAGE': 'second'})
+        reader.process_entries()
+
+        file_logger.file_handler.flush()
+        assert reader.written_cursor() == 'c1'
+    finally:
+        file_logger.removeHandler(other)
+        other.close()
+
+
+def test_folded_repeats_count_as_written(tmp_path, file_logger):
+    cursor_path = tmp_path / 'journal.cursor'
+    duplicate_filter = core.DuplicateFilter(file_logger, window=30)
+    file_logger.addFilter(duplicate_filter)
+    try:
+        reader = make_reader(file_logger, cursor_path, [
+            {'__CURSOR': f'c{number}', 'MESSAGE': 'same', 'SYSLOG_IDENTIFIER': 'sshd'}
+            for number in range(1, 6)
+        ])
+        reader.process_entries()
+        duplicate_filter.flush()
+        file_logger.file_handler.flush()
+        reader.save_cursor()
+    finally:
+        file_logger.removeFilter(duplicate_filter)
+
+    assert cursor_path.read_text() == 'c5\n'
+    lines = (tmp_path / 'leuitlog.log').read_text().splitlines()
+    assert len(lines) == 2
+    assert 'message repeated 4 times, last at ' in lines[1]
+    assert lines[1].endswith(': [same]')
+
+
+def test_tee_holds_the_cursor_until_every_handler_has_the_record(tmp_path):
+    seen = []
+
+    class Probe(logging.Handler):
+        def emit(self, record):
+            seen.append((record.write_seq, core.write_progress.position()))
+
+    text = core.LeuitFileHandler(tmp_path / 'leuitlog.log', flush_thread=False)
+    log = logging.getLogger('leuitlog.test.tee')
+    log.propagate = False
+    log.setLevel(logging.DEBUG)
+    log.addHandler(core.TeeHandler([text, Probe()]))
+    try:
+        reader = make_reader(log, tmp_path / 'journal.cursor', [
+            {'__CURSOR': 'c1', 'MESSAGE': 'first'},
+        ])
+        reader.process_entries()
+    finally:
+        log.handlers[0].close()
+        log.handlers.clear()
+
+    seq, position = seen[0]
+    assert position < seq
+    assert reader.written_cursor() == 'c1'
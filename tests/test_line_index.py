@@ -0,0 +1,106 @@
+"""
+Tests for the line-offset index sidecar.
+"""
+
+import logging
+
+import pytest
+
+import leuitlog_core as core
+
+
+INTERVAL = 4
+
+
+def write_lines(handler, first, count):
+    for number in range(first, first + count):
+        record = logging.LogRecord('leuitlog', logging.INFO, __file__, 0,
+                                   f'message {number} host{number}.example.com', None, None)
+        record.source = '192.0.2.1'
+        handler.handle(record)
+    handler.flush()
+
+
+def read_line(path, index, line):
+    offset, skip = index.locate(line)
+    with core.open_segment(path) as f:
+        f.seek(offset)
+        for _ in range(skip):
+            f.readline()
+        return f.readline()
+
+
+@pytest.fixture
+def rotated(tmp_path):
+    """Log with 50 lines in backup .1 and 30 in the current file, both indexed."""
+    log_path = tmp_path / 'leuitlog.log'
+    handler = core.LeuitFileHandler(log_path, backupCount=2)
+    handler.setFormatter(logging.Formatter(core.LOG_FORMAT, datefmt=core.LOG_DATE_FORMAT))
+    indexer = core.LogIndexer(log_path, 2, interval=INTERVAL)
+    try:
+        write_lines(handler, 0, 50)
+        indexer.update_all()
+        handler.doRollover()
+        write_lines(handler, 50, 30)
+        indexer.update_all()
+    finally:
+        handler.close()
+    return log_path
+
+
+def test_line_index_follows_rotation(rotated):
+    backup = rotated.with_name('leuitlog.log.1')
+    assert backup.with_name('leuitlog.log.1.idx').exists()
+
+    index = core.LineIndex(backup)
+    assert index.load()
+    with core.open_segment(backup) as f:
+        assert index.matches(core.segment_stat(f), f)
+    assert index.line_count == 50
+    for line in (0, 3, 4, 27, 49):
+        assert b'| message %d host' % line in read_line(backup, index, line)
+
+
+def test_current_file_gets_a_new_index(rotated):
+    index = core.LineIndex(rotated)
+    assert index.load()
+    with core.open_segment(rotated) as f:
+        assert index.matches(core.segment_stat(f), f)
+    assert index.line_count == 30
+    assert b'| message 50 host' in read_line(rotated, index, 0)
+    assert b'| message 79 host' in read_line(rotated, index, 29)
+
+
+def test_total_lines_counts_past_the_index(rotated):
+    index = core.LineIndex(rotated)
+    assert index.load()
+    with open(rotated, 'ab') as f:
+        f.write(b'appended\npartial')
+    with core.open_segment(rotated) as f:
+        assert index.total_lines(f, core.segment_stat(f).st_size) == 32
+
+
+def test_index_is_rebuilt_after_truncation_in_place(rotated):
+    rotated.write_bytes(b'new line 0\nnew line 1\n')
+    index = core.LineIndex(rotated, interval=INTERVAL)
+    with core.open_segment(rotated) as f:
+        assert index.load() and not index.matches(core.segment_stat(f), f)
+
+    assert index.update()
+    assert index.line_count == 2
+    assert read_line(rotated, index, 1) == b'new line 1\n'
+
+
+def test_line_index_survives_a_second_rotation(rotated):
+    handler = core.LeuitFileHandler(rotated, backupCount=2)
+    try:
+        handler.doRollover()
+    finally:
+        handler.close()
+
+    oldest = rotated.with_name('leuitlog.log.2')
+    index = core.LineIndex(oldest)
+    assert index.load()
+    with core.open_segment(oldest) as f:
+        assert index.matches(core.segment_stat(f), f)
+    assert b'| message 49 host' in read_line(oldest, index, 49)
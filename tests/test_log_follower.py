@@ -0,0 +1,35 @@
+"""
+Tests for the Web UI's live stream follower.
+"""
+
+import pytest
+
+pytest.importorskip('flask')
+
+import leuitlog_webui as webui
+
+
+def test_event_offset_excludes_partial_line(tmp_path):
+    log_path = tmp_path / 'leuitlog.log'
+    log_path.write_bytes(b'')
+    follower = webui.LogFollower(log_path)
+    follower._open(at_end=True)
+
+    with open(log_path, 'ab') as f:
+        f.write(b'first line\nsecond li')
+    assert follower._poll() == [b'first line']
+    assert follower.line_offset == len(b'first line\n')
+
+    with open(log_path, 'ab') as f:
+        f.write(b'ne\n')
+    assert follower._poll() == [b'second line']
+    assert follower.line_offset == log_path.stat().st_size
+
+
+def test_resume_reads_only_complete_lines(tmp_path):
+    log_path = tmp_path / 'leuitlog.log'
+    log_path.write_bytes(b'one\ntwo\nthr')
+    inode = log_path.stat().st_ino
+
+    assert webui.read_resume_lines(log_path, f'{inode}:0', inode, len(b'one\ntwo\n')) == [b'one', b'two']
+    assert webui.read_resume_lines(log_path, f'{inode}:4', inode, len(b'one\ntwo\n')) == [b'two']
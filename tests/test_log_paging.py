@@ -0,0 +1,75 @@
+"""
+Tests for paging through the current log and its rotated backups.
+"""
+
+import pytest
+
+pytest.importorskip('flask')
+
+import leuitlog_core as core
+import leuitlog_webui as webui
+
+
+def log_line(number):
+    return f'2026-10-17 10:00:00 +0000 | INFO     | sshd            | message {number}\n'
+
+
+@pytest.fixture
+def log_path(webui_config, tmp_path):
+    """Backups .2 and .1 with 30 lines each, 15 lines in the current file."""
+    path = tmp_path / 'log' / webui_config['logging']['log_file']
+    for name, numbers in ((path.name + '.2', range(0, 30)),
+                          (path.name + '.1', range(30, 60)),
+                          (path.name, range(60, 75))):
+        path.with_name(name).write_text(''.join(log_line(number) for number in numbers))
+    return path
+
+
+def messages(entries):
+    return [int(entry['message'].split()[1]) for entry in entries]
+
+
+def test_pages_run_across_segments_newest_first(log_path):
+    entries, total_lines, total_pages = webui.read_log_tail(20, 1)
+    assert (total_lines, total_pages) == (75, 4)
+    assert messages(entries) == list(range(74, 54, -1))
+
+    entries, _, _ = webui.read_log_tail(20, 2)
+    assert messages(entries) == list(range(54, 34, -1))
+
+    entries, _, _ = webui.read_log_tail(20, 4)
+    assert messages(entries) == list(range(14, -1, -1))
+
+
+def test_page_past_the_last_is_clamped(log_path):
+    entries, _, total_pages = webui.read_log_tail(20, 99)
+
+    assert total_pages == 4
+    assert messages(entries) == list(range(14, -1, -1))
+
+
+def test_backup_counts_are_cached_until_the_file_changes(log_path, monkeypatch):
+    backup = log_path.with_name(log_path.name + '.1')
+    assert webui.segment_line_count(backup, False) == 30
+
+    def no_count(*args):
+        raise AssertionError('backup counted again')
+
+    monkeypatch.setattr(core, 'count_newlines', no_count)
+    assert webui.segment_line_count(backup, False) == 30
+
+    monkeypatch.undo()
+    with open(backup, 'a') as f:
+        f.write(log_line(60))
+    assert webui.segment_line_count(backup, False) == 31
+
+
+def test_current_file_count_follows_appends_and_truncation(log_path):
+    assert webui.count_lines(log_path) == 15
+
+    with open(log_path, 'a') as f:
+        f.write(log_line(75) + 'partial')
+    assert webui.count_lines(log_path) == 17
+
+    log_path.write_text(log_line(0))
+    assert webui.count_lines(log_path) == 1
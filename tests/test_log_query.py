@@ -0,0 +1,72 @@
+"""
+Tests for time-range, level and source filtered log queries.
+"""
+
+import time
+
+import pytest
+
+pytest.importorskip('flask')
+
+import leuitlog_webui as webui
+
+
+START = 1700000000
+
+
+def log_line(number):
+    stamp = time.strftime('%Y-%m-%d %H:%M:%S +0000', time.gmtime(START + number * 10))
+    level = 'ERROR' if number % 4 == 0 else 'INFO'
+    source = 'sshd' if number % 2 else 'cron'
+    return f'{stamp} | {level:<8} | {source:<15} | message {number}\n'
+
+
+@pytest.fixture
+def log_path(webui_config, tmp_path):
+    path = tmp_path / 'log' / webui_config['logging']['log_file']
+    path.write_text(''.join(log_line(number) for number in range(100)))
+    return path
+
+
+def messages(entries):
+    return [entry['message'] for entry in entries]
+
+
+def test_find_time_offset_bisects_to_the_first_line(log_path):
+    content = log_path.read_bytes()
+    with open(log_path, 'rb') as f:
+        offset = webui.find_time_offset(f, 0, len(content), START + 505)
+        assert content[offset:].startswith(log_line(51).encode())
+
+        offset = webui.find_time_offset(f, 0, len(content), START + 510, after=True)
+        assert content[offset:].startswith(log_line(52).encode())
+
+        assert webui.find_time_offset(f, 0, len(content), START - 1) == 0
+        assert webui.find_time_offset(f, 0, len(content), START + 10000) == len(content)
+
+
+def test_time_window_is_inclusive_and_newest_first(log_path):
+    entries, matched, total_pages = webui.query_log(100, 1, since=START + 200, until=START + 250)
+
+    assert messages(entries) == [f'message {number}' for number in range(25, 19, -1)]
+    assert (matched, total_pages) == (6, 1)
+
+
+def test_level_and_source_filters_combine(log_path):
+    entries, matched, _ = webui.query_log(100, 1, levels={b'ERROR'}, sources={b'cron'})
+
+    assert matched == 25
+    assert messages(entries)[:2] == ['message 96', 'message 92']
+
+
+def test_page_past_the_last_is_clamped(log_path):
+    entries, matched, total_pages = webui.query_log(10, 99, sources={b'sshd'})
+
+    assert (matched, total_pages) == (50, 5)
+    assert messages(entries) == [f'message {number}' for number in range(19, 0, -2)]
+
+
+def test_api_rejects_an_invalid_time(webui_config):
+    response = webui.app.test_client().get('/api/logs?since=yesterday-ish')
+
+    assert response.status_code == 400
@@ -0,0 +1,116 @@
+"""
+Tests for per-minute message statistics and their summary in the Web UI.
+"""
+
+import logging
+import time
+
+import pytest
+
+import leuitlog_core as core
+
+
+START = 1700000000 // 60 * 60
+
+
+def make_record(level, source, created):
+    record = logging.LogRecord('leuitlog', level, __file__, 0, 'message', None, None)
+    record.source = source
+    record.created = created
+    return record
+
+
+def counts(*pairs):
+    """Level counts in STATS_LEVELS order from (level name, count) pairs."""
+    row = [0] * len(core.STATS_LEVELS)
+    for level, count in pairs:
+        row[core.STATS_LEVELS.index(level)] = count
+    return row
+
+
+def test_records_are_counted_per_bucket_source_and_level():
+    stats = core.LogStats()
+    stats.filter(make_record(logging.INFO, 'sshd', START + 1))
+    stats.filter(make_record(logging.ERROR, 'sshd', START + 59))
+    stats.filter(make_record(logging.INFO, 'cron', START + 60))
+
+    summary = make_record(logging.INFO, 'sshd', START + 61)
+    summary.repeat_count = 5
+    assert stats.filter(summary)
+
+    assert stats.snapshot()['buckets'] == [
+        [START, {'sshd': counts(('INFO', 1), ('ERROR', 1))}],
+        [START + 60, {'cron': counts(('INFO', 1))}],
+    ]
+
+
+def test_sources_past_the_limit_are_counted_together():
+    stats = core.LogStats(max_sources=2)
+    for source in ('a', 'b', 'c', 'd', 'a'):
+        stats.filter(make_record(logging.WARNING, source, START))
+
+    ((_, bucket),) = stats.snapshot()['buckets']
+    assert bucket == {
+        'a': counts(('WARNING', 2)),
+        'b': counts(('WARNING', 1)),
+        core.LogStats.OTHER_SOURCE: counts(('WARNING', 2)),
+    }
+
+
+def test_old_buckets_are_dropped():
+    stats = core.LogStats(retention=120)
+    stats.filter(make_record(logging.INFO, 'sshd', START))
+    stats.filter(make_record(logging.INFO, 'sshd', START + 60))
+    stats.filter(make_record(logging.INFO, 'sshd', START + 180))
+
+    assert [start for start, _ in stats.snapshot()['buckets']] == [START + 60, START + 180]
+
+
+def test_stats_file_is_loaded_back(tmp_path):
+    path = tmp_path / 'stats.json'
+    now = int(time.time()) // 60 * 60
+    stats = core.LogStats()
+    stats.filter(make_record(logging.INFO, 'sshd', now))
+    stats.write(path)
+
+    restored = core.LogStats()
+    restored.filter(make_record(logging.INFO, 'sshd', now))
+    assert restored.load(path) == 1
+    assert restored.snapshot()['buckets'] == [[now, {'sshd': counts(('INFO', 2))}]]
+
+    assert core.LogStats(bucket_seconds=30).load(path) == 0
+
+
+def test_summary_fills_the_window_and_ranks_sources():
+    webui = pytest.importorskip('leuitlog_webui')
+    stats = core.LogStats()
+    for offset, level, source in ((0, logging.INFO, 'cron'),
+                                  (120, logging.ERROR, 'sshd'),
+                                  (120, logging.INFO, 'sshd'),
+                                  (-600, logging.INFO, 'old')):
+        stats.filter(make_record(level, source, START + offset))
+
+    summary = webui.summarize_stats(stats.snapshot(), minutes=3, limit=1, now=START + 150)
+
+    assert (summary['since'], summary['until']) == (START, START + 180)
+    assert [bucket['time'] for bucket in summary['buckets']] == [START, START + 60, START + 120]
+    assert summary['buckets'][1]['counts']['INFO'] == 0
+    assert (summary['totals']['INFO'], summary['totals']['ERROR']) == (2, 1)
+    (top,) = summary['sources']
+    assert (top['source'], top['total']) == ('sshd', 2)
+    assert top['counts'] == dict(zip(core.STATS_LEVELS, counts(('INFO', 1), ('ERROR', 1))))
+
+
+def test_api_stats_reads_the_stats_file(webui_config, tmp_path):
+    webui = pytest.importorskip('leuitlog_webui')
+    stats = core.LogStats()
+    stats.filter(make_record(logging.WARNING, 'sshd', time.time()))
+    stats.write(core.stats_file_path(webui_config))
+
+    data = webui.app.test_client().get('/api/stats?minutes=5').get_json()
+
+    assert len(data['buckets']) == 5
+    assert data['totals']['WARNING'] == 1
+
+    webui_config['service']['stats_interval'] = '0'
+    assert webui.app.test_client().get('/api/stats').status_code == 404
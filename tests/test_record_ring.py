@@ -0,0 +1,107 @@
+"""
+Tests for the shared-memory record ring of the ingest workers.
+"""
+
+import os
+import logging
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import leuitlog_core as core
+
+
+@pytest.fixture
+def ring():
+    ring = core.RecordRing(64, lock=threading.Lock())
+    yield ring
+    ring.close()
+
+
+def test_records_come_back_in_order(ring):
+    written, wake = ring.put([b'one', b'two', b'three'])
+
+    assert (written, wake) == (3, True)
+    assert ring.get(10) == ([b'one', b'two', b'three'], False)
+    assert ring.get(10) == ([], False)
+
+
+def test_wrap_around(ring):
+    # 4-byte length plus payload; sizes chosen so records hit the end
+    # of the data area both with and without room for a WRAP marker
+    sent = []
+    received = []
+    for number in range(200):
+        payload = bytes([number % 256]) * (number % 23 + 1)
+        while ring.put([payload])[0] == 0:
+            received.extend(ring.get(1)[0])
+        sent.append(payload)
+        if number % 3 == 0:
+            received.extend(ring.get(2)[0])
+
+    while True:
+        records, more = ring.get(10)
+        received.extend(records)
+        if not records and not more:
+            break
+
+    assert received == sent
+
+
+def test_put_stops_when_full(ring):
+    written, _ = ring.put([b'x' * 20] * 5)
+
+    assert written == 2
+    records, more = ring.get(1)
+    assert records == [b'x' * 20] and more
+    # A consumer that has not caught up needs no wakeup
+    assert ring.put([b'y' * 20]) == (1, False)
+
+
+def test_attach_by_name(ring):
+    consumer = core.RecordRing(name=ring.name, lock=ring.lock)
+    try:
+        ring.put([b'hello'])
+        assert consumer.get(10) == ([b'hello'], False)
+    finally:
+        consumer.close()
+
+
+def test_dead_lock_times_out(ring, monkeypatch):
+    monkeypatch.setattr(core.RecordRing, 'LOCK_TIMEOUT', 0.05)
+    ring.lock.acquire()
+    try:
+        with pytest.raises(TimeoutError):
+            ring.get(10)
+        with pytest.raises(TimeoutError):
+            ring.put([b'x'])
+    finally:
+        ring.lock.release()
+
+
+def test_records_keep_their_fields_through_the_ring(logger):
+    ring = core.RecordRing(4096, lock=threading.Lock())
+    read_end, write_end = os.pipe()
+    os.set_blocking(write_end, False)
+    worker = logging.getLogger('leuitlog.test.worker')
+    worker.propagate = False
+    worker.setLevel(logging.DEBUG)
+    handler = core.RingHandler(ring, write_end)
+    worker.addHandler(handler)
+    try:
+        frames = [(b'<11>Oct 11 22:14:15 core-sw1 kernel: link down', ('192.0.2.5', 514))]
+        core.log_syslog_messages(worker, frames, transport='udp')
+        handler.flush()
+        records, _ = ring.get(10)
+        core.IngestWorkers._log_records(SimpleNamespace(logger=logger), 0, records)
+    finally:
+        worker.removeHandler(handler)
+        os.close(read_end)
+        os.close(write_end)
+        ring.close()
+
+    record = logger.records[0]
+    assert (record.levelname, record.source, record.address) == ('ERROR', '192.0.2.5', '192.0.2.5')
+    assert record.syslog.hostname == 'core-sw1'
+    assert record.getMessage() == 'Oct 11 22:14:15 core-sw1 kernel: link down'
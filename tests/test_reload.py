@@ -0,0 +1,140 @@
+"""
+Tests for reloading the logging configuration on SIGHUP.
+"""
+
+import logging
+from pathlib import Path
+
+import pytest
+
+import leuitlog_core as core
+
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / 'config' / 'leuitlog.conf'
+
+
+@pytest.fixture
+def config(tmp_path):
+    config = core.load_config(str(CONFIG_PATH))
+    config['logging']['log_dir'] = str(tmp_path / 'log')
+    config['logging']['line_index'] = 'no'
+    config['logging']['search_index'] = 'no'
+    config['service']['stats_interval'] = '0'
+    return config
+
+
+@pytest.fixture
+def daemon_logger(config):
+    log = core.setup_logging(config)
+    yield log
+    core.close_logging(log)
+
+
+def queue_handler(logger):
+    (handler,) = logger.handlers
+    assert isinstance(handler, core.AsyncLogHandler)
+    return handler
+
+
+def test_records_queued_during_a_reload_reach_the_new_files(config, daemon_logger,
+                                                            tmp_path, monkeypatch):
+    create_log_handler = core.create_log_handler
+
+    def create_while_logging(*args, **kwargs):
+        # The writer is paused here, so these records wait in the queue
+        for number in range(3):
+            daemon_logger.info(f'queued {number}', extra={'source': 'test'})
+        return create_log_handler(*args, **kwargs)
+
+    daemon_logger.info('before', extra={'source': 'test'})
+    queue = queue_handler(daemon_logger)
+    config['logging']['log_file'] = 'other.log'
+    monkeypatch.setattr(core, 'create_log_handler', create_while_logging)
+    core.reload_logging(daemon_logger, config)
+    monkeypatch.undo()
+
+    assert queue_handler(daemon_logger) is queue
+    daemon_logger.info('after', extra={'source': 'test'})
+    core.close_logging(daemon_logger)
+
+    def messages(name):
+        text = (tmp_path / 'log' / name).read_text()
+        return [line.rsplit(' | ', 1)[1] for line in text.splitlines()]
+
+    assert messages('leuitlog.log') == ['before']
+    assert messages('other.log') == ['queued 0', 'queued 1', 'queued 2', 'after']
+
+
+def test_reload_builds_the_new_handler_chain(config, daemon_logger, tmp_path):
+    config['logging']['structured_log'] = 'jsonl'
+    config['routes'] = {'auth': 'regex denied'}
+    core.reload_logging(daemon_logger, config)
+
+    target = queue_handler(daemon_logger).target
+    assert isinstance(target, core.RoutingHandler)
+    assert isinstance(target.target, core.TeeHandler)
+
+    daemon_logger.warning('access denied', extra={'source': 'test'})
+    core.close_logging(daemon_logger)
+    assert 'access denied' in (tmp_path / 'log' / 'leuitlog.jsonl').read_text()
+    assert 'access denied' in (tmp_path / 'log' / 'streams' / 'auth.log').read_text()
+
+
+def test_unchanged_compressor_keeps_running(config):
+    config['logging']['compress'] = 'gzip'
+    log = core.setup_logging(config)
+    try:
+        (compressor,) = core.find_compressors(queue_handler(log).target).values()
+
+        core.reload_logging(log, config)
+        assert list(core.find_compressors(queue_handler(log).target).values()) == [compressor]
+        assert compressor._thread is not None
+
+        config['logging']['compress'] = 'none'
+        core.reload_logging(log, config)
+        assert core.find_compressors(queue_handler(log).target) == {}
+        assert compressor._thread is None
+    finally:
+        core.close_logging(log)
+
+
+def test_filters_are_updated_in_place(config, daemon_logger):
+    config['logging']['dedup_window'] = '5'
+    core.reload_logging(daemon_logger, config)
+    duplicate_filter = core.get_duplicate_filter(daemon_logger)
+    assert duplicate_filter.window == 5
+
+    config['logging']['dedup_window'] = '10'
+    core.reload_logging(daemon_logger, config)
+    assert core.get_duplicate_filter(daemon_logger) is duplicate_filter
+    assert duplicate_filter.window == 10
+
+    config['logging']['dedup_window'] = '0'
+    core.reload_logging(daemon_logger, config)
+    assert core.get_duplicate_filter(daemon_logger) is None
+
+
+def test_restart_only_keys_are_reported(config, daemon_logger, tmp_path, caplog):
+    config_path = tmp_path / 'leuitlog.conf'
+    with open(config_path, 'w') as f:
+        config.write(f)
+    queue_size = config['logging']['queue_size']
+    config_path.write_text(
+        config_path.read_text().replace(f'queue_size = {queue_size}', 'queue_size = 500')
+    )
+
+    with caplog.at_level(logging.INFO, logger='leuitlog'):
+        reloaded = core.reload_config(str(config_path), config, daemon_logger)
+
+    assert reloaded['logging']['queue_size'] == '500'
+    assert queue_handler(daemon_logger).max_queue == int(queue_size)
+    messages = [record.getMessage() for record in caplog.records]
+    assert 'Restart to apply: logging.queue_size' in messages
+
+
+def test_invalid_file_keeps_the_current_settings(config, daemon_logger, tmp_path, caplog):
+    with caplog.at_level(logging.ERROR, logger='leuitlog'):
+        reloaded = core.reload_config(str(tmp_path / 'missing.conf'), config, daemon_logger)
+
+    assert reloaded is config
+    assert caplog.records[0].getMessage().startswith('Configuration reload failed')
@@ -0,0 +1,89 @@
+"""
+Tests for conditional responses served from the Web UI response cache.
+"""
+
+import threading
+
+import pytest
+
+pytest.importorskip('flask')
+
+import leuitlog_webui as webui
+
+
+@pytest.fixture
+def client(webui_config):
+    return webui.app.test_client()
+
+
+def test_cache_renders_a_key_once():
+    cache = webui.ResponseCache(max_entries=2)
+    calls = []
+
+    def render():
+        calls.append(1)
+        return b'body'
+
+    assert cache.get(('a',), render) == b'body'
+    assert cache.get(('a',), render) == b'body'
+    assert len(calls) == 1
+
+
+def test_cache_evicts_the_least_recently_used_key():
+    cache = webui.ResponseCache(max_entries=2)
+    cache.get(('a',), lambda: b'a')
+    cache.get(('b',), lambda: b'b')
+    cache.get(('a',), lambda: b'stale')
+    cache.get(('c',), lambda: b'c')
+
+    assert cache.get(('a',), lambda: b'new a') == b'a'
+    assert cache.get(('b',), lambda: b'new b') == b'new b'
+
+
+def test_concurrent_misses_share_one_render():
+    cache = webui.ResponseCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def render():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return b'body'
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.get(('k',), render)))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=lambda: results.append(cache.get(('k',), render)))
+    second.start()
+    release.set()
+    first.join()
+    second.join()
+
+    assert results == [b'body', b'body']
+    assert len(calls) == 1
+
+
+def test_logs_answer_304_until_the_log_changes(client, webui_config, tmp_path):
+    log_path = tmp_path / 'log' / webui_config['logging']['log_file']
+    log_path.write_text('2026-10-17 10:00:00 +0000 | INFO     | sshd            | first\n')
+
+    response = client.get('/api/logs')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert client.get('/api/logs', headers={'If-None-Match': etag}).status_code == 304
+
+    with open(log_path, 'a') as f:
+        f.write('2026-10-17 10:00:01 +0000 | INFO     | sshd            | second\n')
+    response = client.get('/api/logs', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_status_body_has_no_time_of_its_own(client):
+    response = client.get('/api/status')
+    assert response.status_code == 200
+    assert 'timestamp' not in response.get_json()
+    assert client.get('/api/status', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
@@ -0,0 +1,136 @@
+"""
+Tests for the retention manager of the log directory.
+"""
+
+import os
+import time
+
+import pytest
+
+import leuitlog_core as core
+
+
+DAY = 86400
+
+
+def make_segment(path, size, age_days, now):
+    """Write a file of `size` bytes last modified `age_days` ago."""
+    path.write_bytes(b'x' * size)
+    os.utime(path, (now - age_days * DAY, now - age_days * DAY))
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    """Log directory with a current log and three backups, oldest last."""
+    now = time.time()
+    log_path = tmp_path / 'leuitlog.log'
+    make_segment(log_path, 100, 0, now)
+    for number in (1, 2, 3):
+        make_segment(tmp_path / f'leuitlog.log.{number}', 100, number, now)
+        make_segment(tmp_path / f'leuitlog.log.{number}.idx', 10, number, now)
+    return tmp_path
+
+
+def manager(log_dir, logger, **limits):
+    return core.RetentionManager(
+        [log_dir / 'leuitlog.log'], log_dir / core.STREAM_DIR, logger, **limits
+    )
+
+
+def names(directory):
+    return sorted(entry.name for entry in directory.iterdir() if entry.is_file())
+
+
+def test_scan_orders_oldest_first(log_dir, logger):
+    segments, total = manager(log_dir, logger).scan()
+
+    assert [segment.number for segment in segments] == [3, 2, 1, 0]
+    assert total == 4 * 100 + 3 * 10
+    assert segments[0].size == 110
+
+
+def test_backup_never_ordered_after_a_newer_one(log_dir, logger):
+    # .2 was touched after .1, but .1 must outlive it
+    now = time.time()
+    os.utime(log_dir / 'leuitlog.log.2', (now, now))
+
+    segments, _ = manager(log_dir, logger).scan()
+
+    numbers = [segment.number for segment in segments]
+    assert numbers.index(3) < numbers.index(2) < numbers.index(1)
+
+
+def test_size_budget_removes_oldest_with_sidecars(log_dir, logger):
+    manager(log_dir, logger, max_bytes=250).enforce()
+
+    assert names(log_dir) == ['leuitlog.log', 'leuitlog.log.1', 'leuitlog.log.1.idx']
+
+
+def test_max_age_removes_expired_segments(log_dir, logger):
+    manager(log_dir, logger, max_age=1.5 * DAY).enforce()
+
+    assert names(log_dir) == ['leuitlog.log', 'leuitlog.log.1', 'leuitlog.log.1.idx']
+
+
+def test_open_file_is_never_removed(log_dir, logger):
+    log_path = log_dir / 'leuitlog.log'
+    make_segment(log_path, 100, 10, time.time())
+    handler = core.LeuitFileHandler(log_path, delay=True)
+    try:
+        manager(log_dir, logger, max_bytes=1).enforce()
+        assert names(log_dir) == ['leuitlog.log']
+        assert 'only open files are left' in logger.records[-1].getMessage()
+    finally:
+        handler.close()
+
+    # Closed, the old current file is just another expired segment
+    manager(log_dir, logger, max_bytes=1).enforce()
+    assert names(log_dir) == []
+
+
+def test_orphan_sidecars_are_removed(log_dir, logger):
+    now = time.time()
+    make_segment(log_dir / 'leuitlog.log.5.idx', 10, 0, now)
+    make_segment(log_dir / 'leuitlog.log.5.tok', 10, 0, now)
+    make_segment(log_dir / 'leuitlog.log.2.expired', 10, 0, now)
+
+    manager(log_dir, logger, max_bytes=10 ** 9).enforce()
+
+    assert 'leuitlog.log.5.idx' not in names(log_dir)
+    assert 'leuitlog.log.5.tok' not in names(log_dir)
+    assert 'leuitlog.log.2.expired' not in names(log_dir)
+    assert 'leuitlog.log.3' in names(log_dir)
+
+
+def test_compressed_segment_counts_with_frame_index(log_dir, logger):
+    now = time.time()
+    os.unlink(log_dir / 'leuitlog.log.3')
+    make_segment(log_dir / 'leuitlog.log.3.gz', 40, 3, now)
+    make_segment(log_dir / 'leuitlog.log.3.fidx', 5, 3, now)
+
+    segments, _ = manager(log_dir, logger).scan()
+
+    assert segments[0].number == 3
+    assert segments[0].size == 40 + 5 + 10
+
+
+def test_other_files_are_left_alone(log_dir, logger):
+    make_segment(log_dir / 'stats.json', 1000, 30, time.time())
+    make_segment(log_dir / 'other.log.1', 1000, 30, time.time())
+
+    manager(log_dir, logger, max_bytes=1, max_age=DAY).enforce()
+
+    assert 'stats.json' in names(log_dir)
+    assert 'other.log.1' in names(log_dir)
+
+
+def test_streams_no_longer_written_expire(log_dir, logger):
+    stream_dir = log_dir / core.STREAM_DIR
+    stream_dir.mkdir()
+    make_segment(stream_dir / 'routers.log', 100, 5, time.time())
+    make_segment(stream_dir / 'routers.log.1', 100, 6, time.time())
+    make_segment(stream_dir / 'fresh.log', 100, 0, time.time())
+
+    manager(log_dir, logger, max_age=2 * DAY).enforce()
+
+    assert names(stream_dir) == ['fresh.log']
@@ -0,0 +1,134 @@
+"""
+Tests for routing records to stream files.
+"""
+
+import configparser
+import logging
+
+import pytest
+
+import leuitlog_core as core
+
+
+def make_config(routes):
+    config = configparser.ConfigParser()
+    config.optionxform = str
+    config.read_string('[routes]\n' + routes)
+    return config
+
+
+def make_record(message, address='192.0.2.1', syslog=None):
+    record = logging.LogRecord('leuitlog', logging.INFO, __file__, 0, message, None, None)
+    record.source = address
+    record.address = address
+    if syslog is not None:
+        record.syslog = core.parse_syslog(syslog)
+    return record
+
+
+class Collector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def routing(tmp_path):
+    handlers = []
+
+    def make(routes, **kwargs):
+        def open_stream(path):
+            handler = core.LeuitFileHandler(path, flush_thread=False)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            return handler
+
+        handler = core.RoutingHandler(Collector(), core.parse_routes(make_config(routes)),
+                                      tmp_path / 'streams', open_stream, **kwargs)
+        handlers.append(handler)
+        return handler
+
+    yield make
+    for handler in handlers:
+        handler.close()
+
+
+def test_rules_are_parsed_in_file_order():
+    rules = core.parse_routes(make_config(
+        'Routers = address 10.0.0.0/24\n'
+        'web-{source} = host web*\n'
+        'firewall = app\tfilterlog\n'
+        'auth = regex (?i)authentication failure\n'
+        'rest = any\n'
+    ))
+
+    assert [(rule.stream, rule.kind) for rule in rules] == [
+        ('Routers', 'address'), ('web-{source}', 'host'), ('firewall', 'app'),
+        ('auth', 'regex'), ('rest', 'any'),
+    ]
+    assert rules[2].pattern == 'filterlog'
+
+
+@pytest.mark.parametrize('routes', [
+    'bad name = any\n',
+    'routers = network 10.0.0.0/8\n',
+    'routers = address\n',
+    'routers = address 10.0.0.300\n',
+    'auth = regex (unclosed\n',
+])
+def test_invalid_rules_are_reported(routes):
+    with pytest.raises(core.ConfigError):
+        core.parse_routes(make_config(routes))
+
+
+def test_first_matching_rule_picks_the_stream(routing):
+    handler = routing(
+        'routers = address 10.0.0.0/24\n'
+        'web = host WEB*\n'
+        'firewall = app filterlog\n'
+        'auth = regex (?i)authentication failure\n'
+    )
+
+    assert handler.route(make_record('link down', address='10.0.0.7')) == 'routers'
+    assert handler.route(make_record(
+        'x', syslog='<13>Oct 11 22:14:15 web01 nginx: GET /'
+    )) == 'web'
+    assert handler.route(make_record(
+        'x', syslog='<13>Oct 11 22:14:15 fw filterlog: block'
+    )) == 'firewall'
+    assert handler.route(make_record('Authentication failure for root')) == 'auth'
+    assert handler.route(make_record('nothing to see')) is None
+
+
+def test_source_placeholder_gives_one_stream_per_sender(routing):
+    handler = routing('hosts-{source} = any\n')
+
+    assert handler.route(make_record('x', address='10.0.0.1')) == 'hosts-10.0.0.1'
+    assert handler.route(make_record('x', address='fe80::1')) == 'hosts-fe80__1'
+
+
+def test_routed_records_can_leave_the_main_log(routing, tmp_path):
+    handler = routing('auth = regex denied\n', keep_in_main=False)
+    handler.handle(make_record('access denied'))
+    handler.handle(make_record('access granted'))
+    handler.flush()
+
+    assert [record.getMessage() for record in handler.target.records] == ['access granted']
+    assert (tmp_path / 'streams' / 'auth.log').read_text() == 'access denied\n'
+
+
+def test_least_recently_written_stream_is_closed(routing, tmp_path):
+    handler = routing('{source} = any\n', max_open=2)
+    for address in ('a', 'b', 'a', 'c'):
+        handler.handle(make_record(f'to {address}', address=address))
+
+    assert list(handler._streams) == ['a', 'c']
+    assert (tmp_path / 'streams' / 'b.log').read_text() == 'to b\n'
+
+    handler.handle(make_record('to b again', address='b'))
+    handler.flush()
+    assert list(handler._streams) == ['c', 'b']
+    assert (tmp_path / 'streams' / 'b.log').read_text() == 'to b\nto b again\n'
+    assert (tmp_path / 'streams' / 'a.log').read_text() == 'to a\nto a\n'
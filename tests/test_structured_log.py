@@ -0,0 +1,103 @@
+"""
+Tests for the structured (JSONL) log and reading it back in the Web UI.
+"""
+
+import json
+import logging
+from datetime import datetime
+
+import pytest
+
+import leuitlog_core as core
+
+
+START = 1700000000
+
+
+def make_record(message, level=logging.INFO, source='192.0.2.1', created=START):
+    record = logging.LogRecord('leuitlog', level, __file__, 0, message, None, None)
+    record.source = source
+    record.created = created
+    return record
+
+
+def test_plain_record_has_the_basic_fields():
+    line = core.JsonLineFormatter().format(make_record('disk | full', logging.WARNING, 'leuitlog'))
+
+    assert line.startswith('{"ts":1700000000')
+    assert json.loads(line) == {
+        'ts': START, 'level': 'WARNING', 'source': 'leuitlog', 'message': 'disk | full',
+    }
+
+
+def test_syslog_record_carries_the_parsed_header():
+    record = make_record('full text')
+    record.syslog = core.parse_syslog('<165>1 2003-10-11T22:14:15.003Z mymachine evntslog 42 ID47 - An application event')
+    record.address = '192.0.2.1'
+
+    entry = json.loads(core.JsonLineFormatter().format(record))
+
+    assert entry['address'] == '192.0.2.1'
+    assert (entry['facility'], entry['severity']) == (20, 5)
+    assert entry['timestamp'] == '2003-10-11T22:14:15.003Z'
+    assert (entry['hostname'], entry['app_name'], entry['procid'], entry['msgid']) == (
+        'mymachine', 'evntslog', '42', 'ID47'
+    )
+    assert entry['message'] == 'evntslog[42]: An application event'
+
+
+def test_repeat_summary_keeps_its_text():
+    record = make_record('message repeated 3 times, last at 2023-11-14 22:13:40: [same]')
+    record.syslog = core.parse_syslog('<13>Nov 14 22:13:20 host app: same')
+    record.repeat_count = 3
+    record.last_repeat = START + 20
+
+    entry = json.loads(core.JsonLineFormatter().format(record))
+
+    assert entry['message'].startswith('message repeated 3 times')
+    assert (entry['repeated'], entry['last_repeat']) == (3, START + 20)
+
+
+@pytest.fixture
+def jsonl_path(webui_config, tmp_path):
+    webui = pytest.importorskip('leuitlog_webui')
+    webui_config['logging']['structured_log'] = 'jsonl'
+    path = webui.get_query_log_path()
+    assert path.suffix == '.jsonl'
+
+    formatter = core.JsonLineFormatter()
+    with open(path, 'w') as f:
+        for number in range(20):
+            level = logging.ERROR if number % 4 == 0 else logging.INFO
+            source = 'sshd' if number % 2 else 'cron'
+            f.write(formatter.format(
+                make_record(f'message | {number}', level, source, START + number * 10)
+            ) + '\n')
+    return path
+
+
+def test_records_are_read_back_intact(jsonl_path):
+    webui = pytest.importorskip('leuitlog_webui')
+
+    entries, total_lines, _ = webui.read_log_tail(5, 1)
+
+    assert total_lines == 20
+    assert [entry['message'] for entry in entries] == [
+        f'message | {number}' for number in range(19, 14, -1)
+    ]
+    assert entries[0]['source'] == 'sshd'
+    assert entries[0]['timestamp'] == datetime.fromtimestamp(START + 190).astimezone().strftime(
+        core.LOG_DATE_FORMAT
+    )
+
+
+def test_query_filters_structured_records(jsonl_path):
+    webui = pytest.importorskip('leuitlog_webui')
+
+    entries, matched, _ = webui.query_log(10, 1, since=START + 50, levels={b'ERROR'},
+                                          sources={b'cron'})
+
+    assert matched == 3
+    assert [entry['message'] for entry in entries] == [
+        'message | 16', 'message | 12', 'message | 8'
+    ]
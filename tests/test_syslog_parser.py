@@ -0,0 +1,118 @@
+"""
+Tests for the RFC 3164 and RFC 5424 syslog parser.
+"""
+
+import leuitlog_core as core
+
+
+def test_rfc3164_header():
+    parsed = core.parse_syslog(
+        "<34>Oct 11 22:14:15 mymachine su[12]: 'su root' failed for lonvick"
+    )
+
+    assert (parsed.facility, parsed.severity) == (4, 2)
+    assert parsed.text == "Oct 11 22:14:15 mymachine su[12]: 'su root' failed for lonvick"
+    assert parsed.timestamp == 'Oct 11 22:14:15'
+    assert parsed.hostname == 'mymachine'
+    assert parsed.app_name == 'su'
+    assert parsed.procid == '12'
+    assert parsed.msgid is None
+    assert parsed.message == "su[12]: 'su root' failed for lonvick"
+
+
+def test_rfc3164_without_tag():
+    parsed = core.parse_syslog('<13>Feb  5 17:32:18 10.0.0.99 Use the BFG!')
+
+    assert parsed.timestamp == 'Feb  5 17:32:18'
+    assert parsed.hostname == '10.0.0.99'
+    assert parsed.app_name is None
+    assert parsed.message == 'Use the BFG!'
+
+
+def test_rfc5424_header():
+    parsed = core.parse_syslog(
+        '<165>1 2003-10-11T22:14:15.003Z mymachine.example.com evntslog - ID47 '
+        '[exampleSDID@32473 iut="3"] An application event log entry'
+    )
+
+    assert (parsed.facility, parsed.severity) == (20, 5)
+    assert parsed.timestamp == '2003-10-11T22:14:15.003Z'
+    assert parsed.hostname == 'mymachine.example.com'
+    assert parsed.app_name == 'evntslog'
+    assert parsed.procid is None
+    assert parsed.msgid == 'ID47'
+    assert parsed.message == 'evntslog: [exampleSDID@32473 iut="3"] An application event log entry'
+
+
+def test_rfc5424_with_procid():
+    parsed = core.parse_syslog(
+        "<165>1 2003-08-24T05:14:15.000003-07:00 192.0.2.1 myproc 8710 - - It's time"
+    )
+
+    assert parsed.hostname == '192.0.2.1'
+    assert parsed.procid == '8710'
+    assert parsed.message == "myproc[8710]: It's time"
+
+
+def test_rfc5424_nil_fields():
+    parsed = core.parse_syslog('<0>1 - - - - - -')
+
+    assert parsed.fields() == (0, 0, None, None, None, None, None, '')
+
+
+def test_priority_bounds():
+    assert core.parse_syslog('<191>x').fields()[:2] == (23, 7)
+    # 192 is out of range and leading zeros are not allowed
+    for text in ('<192>x', '<013>x', '<>x', '<1x>y'):
+        parsed = core.parse_syslog(text)
+        assert parsed.severity is None
+        assert parsed.text == text
+
+
+def test_no_header():
+    parsed = core.parse_syslog('plain text')
+
+    assert parsed.fields() == (None, None, None, None, None, None, None, 'plain text')
+
+
+def test_header_decoded_on_first_access():
+    parsed = core.parse_syslog('<34>Oct 11 22:14:15 mymachine su: hello')
+
+    assert not parsed._decoded
+    assert parsed.severity == 2
+    assert not parsed._decoded
+    assert parsed.hostname == 'mymachine'
+    assert parsed._decoded
+
+
+def test_fields_round_trip():
+    parsed = core.parse_syslog('<34>Oct 11 22:14:15 mymachine su[12]: hello')
+    copy = core.SyslogMessage.from_fields(parsed.text, parsed.fields())
+
+    assert copy.fields() == parsed.fields()
+    assert copy.text == parsed.text
+
+
+def test_records_keep_the_sender_address_as_source(logger):
+    frames = [(b'<11>Oct 11 22:14:15 core-sw1 kernel: link down', ('192.0.2.5', 514))]
+    core.log_syslog_messages(logger, frames, transport='udp')
+
+    record = logger.records[0]
+    assert record.levelname == 'ERROR'
+    assert record.source == '192.0.2.5'
+    assert record.syslog.hostname == 'core-sw1'
+
+
+def test_hostname_source_uses_the_header_host(logger):
+    logger.addFilter(core.HostnameSource())
+    try:
+        frames = [
+            (b'<14>Oct 11 22:14:15 core-sw1 kernel: link up', ('192.0.2.5', 514)),
+            (b'no header at all', ('192.0.2.6', 514)),
+        ]
+        core.log_syslog_messages(logger, frames, transport='udp')
+    finally:
+        logger.filters.clear()
+
+    assert [record.source for record in logger.records] == ['core-sw1', '192.0.2.6']
+    assert logger.records[0].address == '192.0.2.5'
@@ -0,0 +1,176 @@
+"""
+Tests for RFC 6587 framing of TCP syslog connections and their pacing.
+"""
+
+import logging
+
+import pytest
+
+import leuitlog_core as core
+
+
+class FakeTransport:
+    def __init__(self):
+        self.aborted = False
+
+    def get_extra_info(self, name):
+        return ('192.0.2.7', 40000)
+
+    def abort(self):
+        self.aborted = True
+
+
+class FakeListener:
+    """Stands in for TcpSyslogListener and keeps every delivered frame."""
+
+    def __init__(self, max_message_size=65536):
+        self.max_message_size = max_message_size
+        self.logger = logging.getLogger('leuitlog.test.tcp')
+        self.frames = []
+
+    def register(self, connection):
+        return True
+
+    def unregister(self, connection):
+        pass
+
+    def deliver(self, connection):
+        self.frames.extend(data for data, _ in connection.pending)
+        connection.pending.clear()
+
+
+def connect(max_message_size=65536):
+    listener = FakeListener(max_message_size)
+    connection = core.TcpSyslogProtocol(listener)
+    connection.connection_made(FakeTransport())
+    return listener, connection
+
+
+def octet_counted(*messages):
+    return b''.join(b'%d %s' % (len(message), message) for message in messages)
+
+
+MESSAGES = [b'<13>first message', b'<14>second\nwith newline', b'<15>third']
+
+
+@pytest.mark.parametrize('split', range(1, len(octet_counted(*MESSAGES))))
+def test_octet_counting_across_chunks(split):
+    stream = octet_counted(*MESSAGES)
+    listener, connection = connect()
+
+    connection.data_received(stream[:split])
+    connection.data_received(stream[split:])
+
+    assert listener.frames == MESSAGES
+    assert not connection.buffer
+
+
+def test_octet_counting_byte_by_byte():
+    stream = octet_counted(*MESSAGES)
+    listener, connection = connect()
+
+    for position in range(len(stream)):
+        connection.data_received(stream[position:position + 1])
+
+    assert listener.frames == MESSAGES
+
+
+def test_mixed_framing():
+    listener, connection = connect()
+
+    connection.data_received(b'<13>lf framed\n' + octet_counted(b'<14>counted') + b'<15>again\n')
+
+    assert listener.frames == [b'<13>lf framed', b'<14>counted', b'<15>again']
+
+
+def test_oversized_octet_counted_frame_is_truncated():
+    listener, connection = connect(max_message_size=8)
+    stream = octet_counted(b'<13>0123456789', b'<14>next')
+
+    connection.data_received(stream[:10])
+    connection.data_received(stream[10:])
+
+    assert listener.frames == [b'<13>0123', b'<14>next']
+
+
+def test_oversized_lf_frame_is_truncated():
+    listener, connection = connect(max_message_size=8)
+
+    connection.data_received(b'<13>0123456789')
+    connection.data_received(b'abc\n<14>next\n')
+
+    assert listener.frames == [b'<13>0123', b'<14>next']
+
+
+def test_invalid_length_closes_connection():
+    listener, connection = connect()
+
+    connection.data_received(b'12345678901 <13>x')
+
+    assert connection.transport.aborted
+    assert listener.frames == []
+
+
+def test_unterminated_last_frame_is_kept():
+    listener, connection = connect()
+
+    connection.data_received(b'<13>no newline')
+    connection.connection_lost(None)
+
+    assert listener.frames == [b'<13>no newline']
+
+
+class FakeQueue:
+    max_queue = 8
+
+    def __init__(self, room):
+        self.room = room
+
+    def headroom(self):
+        return self.room
+
+
+class FakeLoop:
+    def __init__(self):
+        self.timers = []
+
+    def call_later(self, delay, callback):
+        self.timers.append(callback)
+        return callback
+
+
+class PausableTransport(FakeTransport):
+    def __init__(self):
+        super().__init__()
+        self.reading = True
+
+    def pause_reading(self):
+        self.reading = False
+
+    def resume_reading(self):
+        self.reading = True
+
+
+def test_connection_is_paused_until_the_queue_drains(logger):
+    listener = core.TcpSyslogListener(0, logger)
+    listener.queue = FakeQueue(room=2)
+    listener._loop = FakeLoop()
+    connection = core.TcpSyslogProtocol(listener)
+    transport = PausableTransport()
+    connection.connection_made(transport)
+
+    connection.data_received(b'<13>one\n<13>two\n<13>three\n<13>four\n<13>five\n')
+    assert len(logger.records) == 2
+    assert not transport.reading
+    assert listener._loop.timers
+
+    # Less than half empty: nothing is resumed yet
+    listener.queue.room = 3
+    listener._loop.timers.pop()()
+    assert len(logger.records) == 2
+
+    listener.queue.room = 8
+    listener._loop.timers.pop()()
+    assert [record.getMessage() for record in logger.records] == ['one', 'two', 'three', 'four', 'five']
+    assert transport.reading
+    assert not listener.paused
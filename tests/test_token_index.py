@@ -0,0 +1,124 @@
+"""
+Tests for the full-text token index sidecar.
+"""
+
+import logging
+
+import pytest
+
+import leuitlog_core as core
+
+
+INTERVAL = 4
+
+
+def write_lines(handler, first, count):
+    for number in range(first, first + count):
+        record = logging.LogRecord('leuitlog', logging.INFO, __file__, 0,
+                                   f'message {number} host{number}.example.com', None, None)
+        record.source = '192.0.2.1'
+        handler.handle(record)
+    handler.flush()
+
+
+@pytest.fixture
+def rotated(tmp_path):
+    """Log with 50 lines in backup .1 and 30 in the current file, both indexed."""
+    log_path = tmp_path / 'leuitlog.log'
+    handler = core.LeuitFileHandler(log_path, backupCount=2)
+    handler.setFormatter(logging.Formatter(core.LOG_FORMAT, datefmt=core.LOG_DATE_FORMAT))
+    indexer = core.LogIndexer(log_path, 2, interval=INTERVAL, tokens=True)
+    try:
+        write_lines(handler, 0, 50)
+        indexer.update_all()
+        handler.doRollover()
+        write_lines(handler, 50, 30)
+        indexer.update_all()
+    finally:
+        handler.close()
+    return log_path
+
+
+def test_tokenize_keeps_compound_tokens_and_their_parts():
+    tokens = core.tokenize(b'Failed password from 10.0.0.5 on GW1.example.com a')
+
+    assert {b'failed', b'password', b'10.0.0.5', b'gw1.example.com', b'gw1', b'example'} <= tokens
+    assert b'a' not in tokens
+
+
+def test_token_index_is_compacted_after_rotation(rotated):
+    backup = rotated.with_name('leuitlog.log.1')
+    line_index = core.LineIndex(backup)
+    line_index.load()
+    tokens = core.TokenIndex(backup)
+
+    assert tokens.load()
+    assert tokens.compacted
+    assert tokens.matches(line_index)
+    assert tokens.lookup(b'host27.example.com') == {27 // INTERVAL}
+    assert tokens.lookup(b'host27') == {27 // INTERVAL}
+    assert tokens.lookup(b'host60') == set()
+
+
+def test_token_index_of_current_file(rotated):
+    tokens = core.TokenIndex(rotated)
+
+    assert tokens.load()
+    assert not tokens.compacted
+    assert tokens.lookup(b'host61') == {(61 - 50) // INTERVAL}
+    assert tokens.lookup(b'host27') == set()
+
+
+def test_token_index_lookup_extends_its_postings(rotated):
+    tokens = core.TokenIndex(rotated)
+    assert tokens.load()
+    assert tokens.lookup(b'host85') == set()
+
+    handler = core.LeuitFileHandler(rotated, backupCount=2)
+    handler.setFormatter(logging.Formatter(core.LOG_FORMAT, datefmt=core.LOG_DATE_FORMAT))
+    indexer = core.LogIndexer(rotated, 2, interval=INTERVAL, tokens=True)
+    try:
+        write_lines(handler, 80, 10)
+        indexer.update_all()
+    finally:
+        handler.close()
+
+    assert tokens.load()
+    assert tokens.lookup(b'host85') == {(85 - 50) // INTERVAL}
+    assert tokens.lookup(b'host61') == {(61 - 50) // INTERVAL}
+
+
+def test_token_index_survives_a_second_rotation(rotated):
+    handler = core.LeuitFileHandler(rotated, backupCount=2)
+    try:
+        handler.doRollover()
+    finally:
+        handler.close()
+
+    oldest = rotated.with_name('leuitlog.log.2')
+    tokens = core.TokenIndex(oldest)
+    assert tokens.load()
+    assert tokens.compacted
+    assert tokens.lookup(b'host12') == {12 // INTERVAL}
+
+
+def test_search_uses_the_index_and_unindexed_tail(webui_config, tmp_path):
+    webui = pytest.importorskip('leuitlog_webui')
+    log_path = tmp_path / 'log' / webui_config['logging']['log_file']
+    handler = core.LeuitFileHandler(log_path, backupCount=2)
+    handler.setFormatter(logging.Formatter(core.LOG_FORMAT, datefmt=core.LOG_DATE_FORMAT))
+    indexer = core.LogIndexer(log_path, 2, interval=INTERVAL, tokens=True)
+    try:
+        write_lines(handler, 0, 20)
+        indexer.update_all()
+        handler.doRollover()
+        write_lines(handler, 20, 20)
+        indexer.update_all()
+        write_lines(handler, 40, 5)
+    finally:
+        handler.close()
+
+    for number in (7, 33, 42):
+        entries, has_more = webui.search_logs(f'host{number}.example.com', 10)
+        assert [entry['message'] for entry in entries] == [f'message {number} host{number}.example.com']
+        assert not has_more